@@ -30,4 +30,24 @@ def get_db():
 SessionDep = Annotated[Session, Depends(get_db)]
 
 # Create tables if they don't exist
-SQLModel.metadata.create_all(engine)
\ No newline at end of file
+SQLModel.metadata.create_all(engine)
+
+def _add_missing_columns():
+    """create_all never alters existing tables, so add columns introduced after a table was created."""
+    from sqlalchemy import text
+    statements = [
+        'ALTER TABLE messages ADD COLUMN IF NOT EXISTS "Emotion_model_version" VARCHAR(200)',
+        'ALTER TABLE messages ADD COLUMN IF NOT EXISTS "Semantic_model_version" VARCHAR(200)',
+        'ALTER TABLE messages ADD COLUMN IF NOT EXISTS "Analyzed_at" TIMESTAMP',
+        'CREATE INDEX IF NOT EXISTS "ix_messages_Emotion_model_version" ON messages ("Emotion_model_version")',
+        'CREATE INDEX IF NOT EXISTS "ix_messages_Semantic_model_version" ON messages ("Semantic_model_version")',
+    ]
+    try:
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+    except Exception as e:
+        print(f"Warning: could not add missing columns: {e}")
+
+
+_add_missing_columns()
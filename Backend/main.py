@@ -56,6 +56,15 @@ app.include_router(cache_routes)
 app.include_router(support_routes)
 app.include_router(daily_routes)
 app.include_router(stat_routes)
+@app.on_event("startup")
+async def build_vector_indexes():
+    """Build the pgvector indexes off the request path; searches work (slower) meanwhile."""
+    from services.RAGPipeline import RAG_RETRIEVAL_BACKEND
+    if RAG_RETRIEVAL_BACKEND == "pgvector":
+        import threading
+        from services.pgvector_retrieval import ensure_vector_indexes
+        threading.Thread(target=ensure_vector_indexes, name="pgvector-indexes", daemon=True).start()
+
 # Health check endpoint
 @app.get("/")
 async def root():
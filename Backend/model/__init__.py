@@ -12,7 +12,8 @@ from .userachievement import UserAchievement
 from .experienceinfo import ExperienceInfo
 from .skillinfo import SkillInfo
 from .daily import Challenge, DailyChallengeItem, UserChallengeClaim
+from .emotion_analysis import EmotionAnalysis
 
 
 
-__all__ = ["ModuleType", "ReadingsInfo", "ReadingProgress", "ReadingBlock", "UserInfo", "ScenarioWithConfig", "ScenarioCompletion","BadgeInfo","LevelSystem","UserAchievement","ExperienceInfo","SkillInfo","Challenge","DailyChallengeItem","UserChallengeClaim"]
\ No newline at end of file
+__all__ = ["ModuleType", "ReadingsInfo", "ReadingProgress", "ReadingBlock", "UserInfo", "ScenarioWithConfig", "ScenarioCompletion","BadgeInfo","LevelSystem","UserAchievement","ExperienceInfo","SkillInfo","Challenge","DailyChallengeItem","UserChallengeClaim","EmotionAnalysis"]
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlmodel import SQLModel, Field, Column, JSON
+from typing import Optional, Dict, List
+from datetime import datetime
+
+
+class EmotionAnalysis(SQLModel, table=True):
+    """Durable, content-addressed emotion analysis results (one row per text/model/mode)."""
+    __tablename__ = "emotion_analyses"
+
+    # sha256 of the message content, same hash as the Redis emotion:<sha256> keys
+    ContentHash: str = Field(primary_key=True, max_length=64)
+    ModelVersion: str = Field(primary_key=True, max_length=200)
+    PipelineMode: str = Field(primary_key=True, max_length=50)
+
+    Emotion_Embedding: List[float] = Field(sa_column=Column(JSON))
+    Emotion_labels: Dict[str, float] = Field(sa_column=Column(JSON))
+    Detected_emotion: Optional[str] = Field(max_length=100, default=None)
+    Processed_text: Optional[str] = Field(default=None)
+    Interpretation: Optional[str] = Field(default=None)
+
+    CreatedAt: datetime = Field(default_factory=datetime.utcnow)
+    UpdatedAt: datetime = Field(default_factory=datetime.utcnow)
@@ -29,4 +29,10 @@ class Message(SQLModel, table=True):
     # 🔹 Store top emotion label for fast filtering
     Detected_emotion: Optional[str] = Field(max_length=100, default=None)
     Interpretation : Optional[str] = Field(default=None)
-    Contact_id: Optional[int] = Field(default=None)
\ No newline at end of file
+    Contact_id: Optional[int] = Field(default=None)
+
+    # 🔹 Which pipeline produced the vectors; NULL means a pre-versioning row.
+    # Only vectors with the current version are comparable in similarity search.
+    Emotion_model_version: Optional[str] = Field(max_length=200, default=None, index=True)
+    Semantic_model_version: Optional[str] = Field(max_length=200, default=None, index=True)
+    Analyzed_at: Optional[datetime] = Field(default=None)
\ No newline at end of file
@@ -5,7 +5,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Query, HTTPException
 from pydantic import BaseModel
 from services.RAGPipeline import rag
-from services.emotion_pipeline import analyze_emotion
+from services.emotion_pipeline import analyze_emotion, get_cascade_metrics, get_interpretation, get_local_batch_metrics
 from sqlmodel import Session, select, or_
 from core.db_connection import engine
 from model.message import Message
@@ -220,7 +220,9 @@ def rag_sender_context(
             enhanced_query, 
             user_messages=user_messages,
             top_k=3,
-            use_reranker=True
+            use_reranker=True,
+            user_id=user_id,
+            contact_id=contact_id,
         )
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Failed to generate response: {exc}")
@@ -242,6 +244,8 @@ def recent_emotion_context(
     user_id: str = Query(..., description="The Firebase user ID"),
     contact_id: int = Query(..., description="Contact ID of the contact (Sender or Receiver)"),
     window_minutes: int = Query(20, description="Time window in minutes for context"),
+    lazy_interpretation: bool = Query(False, description="Return interpretation handles instead of waiting for interpretations"),
+    interpretation_engine: Optional[str] = Query(None, description="llm, local (template, no LLM call) or auto"),
 ):
     # Step 1: Get the absolute latest message
     # We need to determine the latest message sent by the contact (not the user).
@@ -285,7 +289,10 @@ def recent_emotion_context(
             "Sender": m.Sender,
             "MessageContent": m.MessageContent,
             "DateSent": m.DateSent,
-            "emotion_analysis": analyze_emotion(m.MessageContent, user_name=m.Sender)
+            "emotion_analysis": analyze_emotion(
+                m.MessageContent, user_name=m.Sender, lazy_interpretation=lazy_interpretation,
+                interpretation_engine=interpretation_engine,
+            )
         }
         for m in context_msgs
     ]
@@ -313,7 +320,10 @@ def recent_emotion_context(
         "Sender": target_message.Sender if target_message else None,
         "MessageContent": target_message.MessageContent if target_message else None,
         "DateSent": target_message.DateSent if target_message else None,
-        "emotion_analysis": analyze_emotion(target_message.MessageContent, user_name=target_message.Sender) if target_message else None
+        "emotion_analysis": analyze_emotion(
+            target_message.MessageContent, user_name=target_message.Sender, lazy_interpretation=lazy_interpretation,
+            interpretation_engine=interpretation_engine,
+        ) if target_message else None
     }
 
     # Determine if user should reply
@@ -341,7 +351,9 @@ def recent_emotion_context(
         rag_query, 
         user_messages=user_messages,
         top_k=3,
-        use_reranker=True
+        use_reranker=True,
+        user_id=user_id,
+        contact_id=contact_id,
     )
     rag_emotion = analyze_emotion(rag_response or "", user_name=user_true_name)
 
@@ -424,7 +436,8 @@ def manual_emotion_context(payload: ManualAnalysisRequest):
             rag_query, 
             user_messages=user_messages,
             top_k=3,
-            use_reranker=True
+            use_reranker=True,
+            user_id=payload.user_id,
         )
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=f"Failed to generate response: {exc}")
@@ -455,6 +468,8 @@ def manual_emotion_context(payload: ManualAnalysisRequest):
 def get_latest_message(
     user_id: str = Query(..., description="The Firebase user ID"),
     contact_id: int = Query(..., description="Contact ID of the contact (Sender or Receiver)"),
+    lazy_interpretation: bool = Query(False, description="Return an interpretation handle instead of waiting for the interpretation"),
+    interpretation_engine: Optional[str] = Query(None, description="llm, local (template, no LLM call) or auto"),
 ):
     messages = get_messages_for_conversation(user_id, contact_id, limit=1)
     latest_message = messages[0] if messages else None
@@ -464,5 +479,63 @@ def get_latest_message(
         "Sender": latest_message.Sender,
         "MessageContent": latest_message.MessageContent,
         "DateSent": latest_message.DateSent,
-        "emotion_analysis": analyze_emotion(latest_message.MessageContent, user_name=latest_message.Sender)
-    }
\ No newline at end of file
+        "emotion_analysis": analyze_emotion(
+            latest_message.MessageContent, user_name=latest_message.Sender, lazy_interpretation=lazy_interpretation,
+            interpretation_engine=interpretation_engine,
+        )
+    }
+
+
+@rag_router.get("/emotion-metrics")
+def emotion_metrics():
+    """Per-worker counters of which emotion analysis tier answered requests, plus
+    local classifier micro-batching stats (queue depth, batch sizes) and the size of
+    this worker's in-memory RAG document store."""
+    return {
+        "success": True,
+        "cascade": get_cascade_metrics(),
+        "local_batching": get_local_batch_metrics(),
+        "rag_store": rag.store.stats(),
+    }
+
+
+# Fetch an interpretation generated in the background (lazy_interpretation=true)
+@rag_router.get("/interpretation/{handle}")
+def fetch_interpretation(
+    handle: str,
+    wait_ms: int = Query(0, ge=0, le=10000, description="Long-poll up to this long for a pending interpretation"),
+):
+    import time
+    deadline = time.monotonic() + wait_ms / 1000
+    result = get_interpretation(handle)
+    while result["status"] == "pending" and time.monotonic() < deadline:
+        time.sleep(0.1)
+        result = get_interpretation(handle)
+    if result["status"] == "unknown":
+        raise HTTPException(status_code=404, detail="Interpretation handle not found or expired")
+    return {"success": True, **result}
+
+
+# Background re-analysis of messages produced by an older model/pipeline version
+@rag_router.post("/reanalysis")
+def start_message_reanalysis(
+    batch_size: Optional[int] = Query(None, ge=1, le=1000, description="Rows per bulk batch"),
+    max_rows_per_second: Optional[float] = Query(None, ge=0, description="Throttle (0 = unthrottled)"),
+    limit: Optional[int] = Query(None, ge=1, description="Stop after this many rows; resume with another call"),
+):
+    from services.reanalysis import start_reanalysis, get_reanalysis_progress
+    started = start_reanalysis(batch_size=batch_size, max_rows_per_second=max_rows_per_second, limit=limit)
+    return {"success": True, "started": started, "progress": get_reanalysis_progress()}
+
+
+@rag_router.get("/reanalysis")
+def message_reanalysis_progress():
+    from services.reanalysis import get_reanalysis_progress
+    return {"success": True, "progress": get_reanalysis_progress()}
+
+
+@rag_router.delete("/reanalysis")
+def pause_message_reanalysis():
+    """Pause the job after its current batch; the checkpoint is kept for the next start."""
+    from services.reanalysis import stop_reanalysis
+    return {"success": True, "stopping": stop_reanalysis()}
@@ -6,7 +6,7 @@ import os
 # Add the parent directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from services.emotion_pipeline import get_pipeline, analyze_emotion
+from services.emotion_pipeline import get_pipeline, analyze_emotion, aanalyze_emotion
 
 # Create APIRouter
 suggestion_router = APIRouter(prefix="/suggestion",tags=["Suggestion"])
@@ -15,6 +15,7 @@ suggestion_router = APIRouter(prefix="/suggestion",tags=["Suggestion"])
 class TextAnalysisRequest(BaseModel):
     text: str
     user_name: str = None  # Optional user name for personalized coaching
+    interpretation_engine: str = None  # "llm", "local" or "auto"; server default when omitted
 
 @suggestion_router.post("/analyze")
 async def analyze_emotion_endpoint(request: TextAnalysisRequest):
@@ -37,7 +38,9 @@ async def analyze_emotion_endpoint(request: TextAnalysisRequest):
             raise HTTPException(status_code=400, detail="Text cannot be empty")
         
         # Process through the complete emotion pipeline with user context
-        result = analyze_emotion(text, request.user_name)
+        result = await aanalyze_emotion(
+            text, request.user_name, interpretation_engine=request.interpretation_engine
+        )
         
         if result.get("pipeline_success", False):
             return {
@@ -1,9 +1,15 @@
 import os
 import json
-from typing import List, Dict, Any, Optional, Union
+import math
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Union, Callable, Tuple
 
 import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
 import torch.nn.functional as F
 
 # Absolute path to the local model directory
@@ -12,11 +18,47 @@ MODEL_DIR = os.path.normpath(
     os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AIModel")
 )
 
+# Inference runtime, picked at startup:
+#   torch - full-precision PyTorch model (GPU when available)
+#   int8  - PyTorch with dynamic int8 quantization of the Linear layers (CPU)
+#   onnx  - ONNX Runtime CPU session from <model_dir>/onnx (no PyTorch model in memory);
+#           create it with utilities/export_local_model.py
+LOCAL_INFERENCE_RUNTIME = os.getenv("LOCAL_INFERENCE_RUNTIME", "torch").strip().lower()
+LOCAL_ONNX_MODEL = os.getenv("LOCAL_ONNX_MODEL", "model.int8.onnx")  # file name inside <model_dir>/onnx, or a path
+LOCAL_ONNX_THREADS = int(os.getenv("LOCAL_ONNX_THREADS", "0"))  # 0 lets ONNX Runtime decide
+RUNTIMES = ("torch", "int8", "onnx")
+ONNX_SUBDIR = "onnx"
+
+Runner = Callable[[Dict[str, torch.Tensor]], torch.Tensor]  # tokenized batch -> logits [B, C] on CPU
+
 _tokenizer: Optional[AutoTokenizer] = None
-_model: Optional[AutoModelForSequenceClassification] = None
+_model: Optional[AutoModelForSequenceClassification] = None  # None with the onnx runtime
 _device: Optional[torch.device] = None
+_runner: Optional[Runner] = None
+_runtime: Optional[str] = None
 _id2label: Dict[int, str] = {}
 
+# Micro-batching: texts from concurrent callers are queued and classified together.
+# A batch is flushed when it reaches MICROBATCH_MAX_SIZE texts or when the oldest
+# queued text has waited MICROBATCH_MAX_WAIT_MS.
+MICROBATCH_MAX_SIZE = int(os.getenv("LOCAL_MICROBATCH_MAX_SIZE", "32"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("LOCAL_MICROBATCH_MAX_WAIT_MS", "5"))
+
+# Length-bucketed batching: texts are sorted by token length and grouped so that
+# no forward pass exceeds LOCAL_BATCH_MAX_ITEMS texts or LOCAL_BATCH_TOKEN_BUDGET
+# padded tokens (items x longest item). Truncation length follows the observed
+# token length distribution ("auto") unless LOCAL_MAX_LENGTH pins it.
+MODEL_MAX_LENGTH = 512
+LOCAL_BATCH_MAX_ITEMS = int(os.getenv("LOCAL_BATCH_MAX_ITEMS", "64"))
+LOCAL_BATCH_TOKEN_BUDGET = int(os.getenv("LOCAL_BATCH_TOKEN_BUDGET", "4096"))
+LOCAL_MAX_LENGTH = os.getenv("LOCAL_MAX_LENGTH", "auto").strip().lower()
+LOCAL_MAX_LENGTH_PERCENTILE = float(os.getenv("LOCAL_MAX_LENGTH_PERCENTILE", "99.5"))
+LOCAL_MIN_MAX_LENGTH = int(os.getenv("LOCAL_MIN_MAX_LENGTH", "128"))
+_LENGTH_SAMPLE_MIN = 200  # observations before "auto" moves off MODEL_MAX_LENGTH
+
+_observed_lengths: deque = deque(maxlen=10000)
+_observed_lengths_lock = threading.Lock()
+
 
 def _resolve_device() -> torch.device:
     if torch.cuda.is_available():
@@ -25,33 +67,102 @@ def _resolve_device() -> torch.device:
     return torch.device("cpu")
 
 
-def load_local_model(model_dir: str = MODEL_DIR) -> None:
+def onnx_model_path(model_dir: str = MODEL_DIR, file_name: Optional[str] = None) -> str:
+    file_name = file_name or LOCAL_ONNX_MODEL
+    if os.path.isabs(file_name):
+        return file_name
+    return os.path.join(model_dir, ONNX_SUBDIR, file_name)
+
+
+def build_runner(
+    model_dir: str = MODEL_DIR,
+    runtime: str = "torch",
+    onnx_file: Optional[str] = None,
+) -> Tuple[Runner, Any, Optional[torch.nn.Module]]:
+    """
+    Load the model for one runtime.
+
+    Args:
+        model_dir: Local Hugging Face model directory
+        runtime: One of RUNTIMES
+        onnx_file: ONNX file for the onnx runtime (defaults to LOCAL_ONNX_MODEL)
+
+    Returns:
+        (runner, model config, torch model or None for onnx)
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown inference runtime {runtime!r}, expected one of {RUNTIMES}")
+
+    if runtime == "onnx":
+        import numpy as np
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if LOCAL_ONNX_THREADS > 0:
+            options.intra_op_num_threads = LOCAL_ONNX_THREADS
+        session = ort.InferenceSession(
+            onnx_model_path(model_dir, onnx_file), options, providers=["CPUExecutionProvider"]
+        )
+        input_names = {i.name for i in session.get_inputs()}
+
+        def run_onnx(enc: Dict[str, torch.Tensor]) -> torch.Tensor:
+            feeds = {k: v.cpu().numpy().astype(np.int64) for k, v in enc.items() if k in input_names}
+            return torch.from_numpy(session.run(None, feeds)[0])
+
+        return run_onnx, AutoConfig.from_pretrained(model_dir, local_files_only=True), None
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir, local_files_only=True)
+    model.eval()
+    if runtime == "int8":
+        # Dynamic quantization only has CPU kernels
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        device = torch.device("cpu")
+    else:
+        device = _resolve_device()
+    model.to(device)
+
+    def run_torch(enc: Dict[str, torch.Tensor]) -> torch.Tensor:
+        with torch.no_grad():
+            return model(**{k: v.to(device) for k, v in enc.items()}).logits.detach().cpu()
+
+    return run_torch, model.config, model
+
+
+def load_local_model(model_dir: str = MODEL_DIR, runtime: Optional[str] = None) -> None:
     """
     Load tokenizer and model from a local directory once (singleton-style).
 
     Args:
         model_dir: Path to the local Hugging Face model directory
+        runtime: torch, int8 or onnx (defaults to LOCAL_INFERENCE_RUNTIME). If the
+            onnx runtime cannot be loaded, the full-precision torch model is used.
     """
-    global _tokenizer, _model, _device, _id2label
+    global _tokenizer, _model, _device, _runner, _runtime, _id2label
 
-    if _tokenizer is not None and _model is not None:
+    if _tokenizer is not None and _runner is not None:
         return
 
     if not os.path.isdir(model_dir):
         raise FileNotFoundError(f"Model directory not found: {model_dir}")
 
+    runtime = (runtime or LOCAL_INFERENCE_RUNTIME).lower()
+
     # Load tokenizer and model locally without internet
     _tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
-    _model = AutoModelForSequenceClassification.from_pretrained(
-        model_dir, local_files_only=True
-    )
-    _model.eval()
-
-    _device = _resolve_device()
-    _model.to(_device)
+    try:
+        _runner, cfg, _model = build_runner(model_dir, runtime)
+    except (ImportError, OSError) as e:
+        if runtime != "onnx":
+            raise
+        print(f"⚠️ ONNX runtime unavailable ({e}), loading the PyTorch model instead")
+        runtime = "torch"
+        _runner, cfg, _model = build_runner(model_dir, runtime)
+    _runtime = runtime
+    _device = next(_model.parameters()).device if _model is not None else torch.device("cpu")
+    print(f"🧠 Local emotion model loaded with the {runtime} runtime")
 
     # Build id2label mapping
-    cfg = getattr(_model, "config", None)
     if cfg and getattr(cfg, "id2label", None):
         # Keys may be strings; normalize to int
         _id2label = {int(k): v for k, v in cfg.id2label.items()}
@@ -61,8 +172,13 @@ def load_local_model(model_dir: str = MODEL_DIR) -> None:
         _id2label = {i: f"LABEL_{i}" for i in range(num_labels)}
 
 
+def get_runtime() -> Optional[str]:
+    """Runtime of the loaded model (None before load_local_model)."""
+    return _runtime
+
+
 def _ensure_model_loaded() -> None:
-    if _model is None or _tokenizer is None:
+    if _runner is None or _tokenizer is None:
         load_local_model()
 
 
@@ -70,6 +186,89 @@ def _softmax_logits(logits: torch.Tensor) -> torch.Tensor:
     return F.softmax(logits, dim=-1)
 
 
+def adaptive_max_length() -> int:
+    """Truncation length for batched inference.
+
+    With LOCAL_MAX_LENGTH=auto this is the LOCAL_MAX_LENGTH_PERCENTILE of recently
+    seen token lengths, clamped to [LOCAL_MIN_MAX_LENGTH, MODEL_MAX_LENGTH], so only
+    the rare outlier is truncated while typical batches stay short.
+    """
+    if LOCAL_MAX_LENGTH != "auto":
+        return max(1, min(MODEL_MAX_LENGTH, int(LOCAL_MAX_LENGTH)))
+    with _observed_lengths_lock:
+        lengths = sorted(_observed_lengths)
+    if len(lengths) < _LENGTH_SAMPLE_MIN:
+        return MODEL_MAX_LENGTH
+    index = min(len(lengths) - 1, max(0, math.ceil(LOCAL_MAX_LENGTH_PERCENTILE / 100 * len(lengths)) - 1))
+    return max(LOCAL_MIN_MAX_LENGTH, min(MODEL_MAX_LENGTH, lengths[index]))
+
+
+def _encode(texts: List[str]) -> List[Dict[str, List[int]]]:
+    """Tokenize without padding, recording lengths and applying the adaptive truncation."""
+    enc = _tokenizer(texts, truncation=True, max_length=MODEL_MAX_LENGTH, padding=False)
+    features = [{k: enc[k][i] for k in enc.keys()} for i in range(len(texts))]
+    lengths = [len(f["input_ids"]) for f in features]
+    with _observed_lengths_lock:
+        _observed_lengths.extend(lengths)
+
+    limit = adaptive_max_length()
+    long_idx = [i for i, n in enumerate(lengths) if n > limit]
+    if long_idx:
+        # Re-tokenize the few outliers so truncation keeps the tokenizer's special tokens
+        short = _tokenizer([texts[i] for i in long_idx], truncation=True, max_length=limit, padding=False)
+        for j, i in enumerate(long_idx):
+            features[i] = {k: short[k][j] for k in short.keys()}
+    return features
+
+
+def plan_batches(lengths: List[int], max_items: int, token_budget: int) -> List[List[int]]:
+    """
+    Group indices into length-sorted batches.
+
+    Args:
+        lengths: Token length per text
+        max_items: Maximum texts per batch
+        token_budget: Maximum padded tokens per batch (items x longest); a single
+            text longer than the budget gets a batch of its own
+
+    Returns:
+        Batches of indices into `lengths`, shortest texts first
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_max = 0
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        longest = max(current_max, lengths[i])
+        if current and (len(current) >= max_items or longest * (len(current) + 1) > token_budget):
+            batches.append(current)
+            current, longest = [], lengths[i]
+        current.append(i)
+        current_max = longest
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _forward_probs(
+    texts: List[str],
+    batch_size: Optional[int] = None,
+    token_budget: Optional[int] = None,
+) -> torch.Tensor:
+    """Class probabilities [N, C] for texts, in input order, via length-bucketed forward passes."""
+    if not texts:
+        return torch.empty(0, len(_id2label))
+    features = _encode(texts)
+    lengths = [len(f["input_ids"]) for f in features]
+    rows: List[Optional[torch.Tensor]] = [None] * len(texts)
+    for idx in plan_batches(lengths, batch_size or LOCAL_BATCH_MAX_ITEMS, token_budget or LOCAL_BATCH_TOKEN_BUDGET):
+        enc = _tokenizer.pad([features[i] for i in idx], return_tensors="pt")
+        probs = _softmax_logits(_runner(enc))
+        # Restore input order
+        for j, i in enumerate(idx):
+            rows[i] = probs[j]
+    return torch.stack(rows)
+
+
 def predict_one(text: str, top_k: int = 1) -> Dict[str, Any]:
     """
     Run prediction on a single text input.
@@ -89,12 +288,8 @@ def predict_one(text: str, top_k: int = 1) -> Dict[str, Any]:
         padding=False,
     )
 
-    enc = {k: v.to(_device) for k, v in enc.items()}
-
-    with torch.no_grad():
-        outputs = _model(**enc)
-        logits = outputs.logits.squeeze(0)
-        probs = _softmax_logits(logits).detach().cpu()
+    logits = _runner(dict(enc)).squeeze(0)
+    probs = _softmax_logits(logits)
 
     # Top-1
     score, idx = torch.max(probs, dim=-1)
@@ -115,9 +310,201 @@ def predict_one(text: str, top_k: int = 1) -> Dict[str, Any]:
     }
 
 
-def predict_batch(texts: List[str], top_k: int = 1, batch_size: int = 8) -> List[Dict[str, Any]]:
+def get_id2label() -> Dict[int, str]:
+    """Return the id -> label mapping of the loaded model (loads it if needed)."""
+    _ensure_model_loaded()
+    return dict(_id2label)
+
+
+def predict_scores(
+    texts: List[str],
+    batch_size: Optional[int] = None,
+    token_budget: Optional[int] = None,
+) -> List[Dict[str, float]]:
+    """
+    Run prediction on a batch of texts and return the full distribution per text.
+
+    Each item maps every model label (lowercased) to its probability, which is the
+    same shape as the HF Inference API text_classification output used by
+    EmotionEmbedder. Texts are batched by length (see plan_batches).
+    """
+    _ensure_model_loaded()
+
+    clean_texts = [t if isinstance(t, str) else str(t) for t in texts]
+    probs = _forward_probs(clean_texts, batch_size, token_budget)
+    return [
+        {_id2label.get(j, f"LABEL_{j}").lower(): float(p) for j, p in enumerate(row)}
+        for row in probs.tolist()
+    ]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent predict_scores calls into shared forward passes.
+
+    Callers get one Future per text; a single daemon thread drains the queue, runs
+    each flushed batch through predict_scores (one length-bucketed pass unless the
+    token budget splits it) and resolves the futures. Running all
+    forward passes on one thread also keeps concurrent requests from oversubscribing
+    the CPU with parallel passes.
+    """
+
+    def __init__(self, max_batch_size: int = MICROBATCH_MAX_SIZE, max_wait_ms: float = MICROBATCH_MAX_WAIT_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "batches": 0,
+            "items": 0,
+            "max_batch_size": 0,
+            "flushed_on_size": 0,
+            "flushed_on_timeout": 0,
+            "errors": 0,
+            "total_queue_wait_ms": 0.0,
+            "total_forward_ms": 0.0,
+        }
+        self._batch_size_histogram: Dict[str, int] = {}
+
+    def submit(self, text: str) -> Future:
+        """Queue one text; the Future resolves to its label -> probability dict."""
+        return self.submit_many([text])[0]
+
+    def submit_many(self, texts: List[str]) -> List[Future]:
+        """Queue texts (in order); returns one Future per text."""
+        self._ensure_started()
+        futures = []
+        now = time.monotonic()
+        for text in texts:
+            future: Future = Future()
+            self._queue.put((text if isinstance(text, str) else str(text), future, now))
+            futures.append(future)
+        return futures
+
+    def predict_scores(self, texts: List[str], timeout: Optional[float] = None) -> List[Dict[str, float]]:
+        """Blocking equivalent of predict_scores() that shares forward passes with other callers."""
+        return [future.result(timeout=timeout) for future in self.submit_many(texts)]
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and batch size statistics for this worker."""
+        with self._metrics_lock:
+            m = dict(self._metrics)
+            histogram = dict(self._batch_size_histogram)
+        batches = max(1, m["batches"])
+        return {
+            "queue_depth": self.queue_depth(),
+            "batches": m["batches"],
+            "items": m["items"],
+            "avg_batch_size": round(m["items"] / batches, 2),
+            "max_batch_size": m["max_batch_size"],
+            "flushed_on_size": m["flushed_on_size"],
+            "flushed_on_timeout": m["flushed_on_timeout"],
+            "errors": m["errors"],
+            "avg_queue_wait_ms": round(m["total_queue_wait_ms"] / max(1, m["items"]), 2),
+            "avg_forward_ms": round(m["total_forward_ms"] / batches, 2),
+            "batch_size_histogram": histogram,
+            "config": {"max_batch_size": self.max_batch_size, "max_wait_ms": self.max_wait * 1000},
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="emotion-microbatcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> tuple:
+        """Block for the first item, then gather more until the batch is full or the wait expires."""
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Take whatever is already queued even once the deadline has passed
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                return batch, "timeout"
+        return batch, "size"
+
+    def _run(self) -> None:
+        while True:
+            batch, reason = self._collect()
+            # Drop texts whose caller cancelled while they were queued
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                results = predict_scores([text for text, _, _ in batch], batch_size=len(batch))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                with self._metrics_lock:
+                    self._metrics["errors"] += 1
+                continue
+            finished = time.monotonic()
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            self._record(batch, reason, started, finished)
+
+    def _record(self, batch: List[tuple], reason: str, started: float, finished: float) -> None:
+        size = len(batch)
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        with self._metrics_lock:
+            m = self._metrics
+            m["batches"] += 1
+            m["items"] += size
+            m["max_batch_size"] = max(m["max_batch_size"], size)
+            m[f"flushed_on_{reason}"] += 1
+            m["total_queue_wait_ms"] += sum(started - queued_at for _, _, queued_at in batch) * 1000
+            m["total_forward_ms"] += (finished - started) * 1000
+            key = f"<={bucket}"
+            self._batch_size_histogram[key] = self._batch_size_histogram.get(key, 0) + 1
+
+
+_microbatcher: Optional[MicroBatcher] = None
+_microbatcher_lock = threading.Lock()
+
+
+def get_microbatcher() -> MicroBatcher:
+    """Process-wide micro-batcher (the model is loaded on its first batch if needed)."""
+    global _microbatcher
+    if _microbatcher is None:
+        with _microbatcher_lock:
+            if _microbatcher is None:
+                _microbatcher = MicroBatcher()
+    return _microbatcher
+
+
+def predict_scores_batched(texts: List[str], timeout: Optional[float] = None) -> List[Dict[str, float]]:
+    """predict_scores() through the shared micro-batcher."""
+    return get_microbatcher().predict_scores(texts, timeout=timeout)
+
+
+def get_microbatch_metrics() -> Optional[Dict[str, Any]]:
+    """Micro-batcher metrics, or None if it has not been used in this process."""
+    return _microbatcher.metrics() if _microbatcher is not None else None
+
+
+def predict_batch(
+    texts: List[str],
+    top_k: int = 1,
+    batch_size: Optional[int] = None,
+    token_budget: Optional[int] = None,
+) -> List[Dict[str, Any]]:
     """
     Run prediction on a batch of texts.
+
+    Texts are sorted into length buckets (at most `batch_size` texts and
+    `token_budget` padded tokens per forward pass); results keep input order.
     """
     _ensure_model_loaded()
 
@@ -125,32 +512,16 @@ def predict_batch(texts: List[str], top_k: int = 1, batch_size: int = 8) -> List
     clean_texts = [t if isinstance(t, str) else str(t) for t in texts]
 
     results: List[Dict[str, Any]] = []
-    for i in range(0, len(clean_texts), batch_size):
-        chunk = clean_texts[i : i + batch_size]
-        enc = _tokenizer(
-            chunk,
-            return_tensors="pt",
-            truncation=True,
-            max_length=512,
-            padding=True,
-        )
-        enc = {k: v.to(_device) for k, v in enc.items()}
-
-        with torch.no_grad():
-            outputs = _model(**enc)
-            logits = outputs.logits  # [B, C]
-            probs = _softmax_logits(logits).detach().cpu()
-
-        for row in probs:
-            score, idx = torch.max(row, dim=-1)
-            label = _id2label.get(idx.item(), f"LABEL_{idx.item()}")
-            topn = max(1, min(top_k, row.numel()))
-            ts, ti = torch.topk(row, k=topn)
-            top = [
-                {"label": _id2label.get(j.item(), f"LABEL_{j.item()}"), "score": s.item()}
-                for s, j in zip(ts, ti)
-            ]
-            results.append({"label": label, "score": score.item(), "top": top})
+    for row in _forward_probs(clean_texts, batch_size, token_budget):
+        score, idx = torch.max(row, dim=-1)
+        label = _id2label.get(idx.item(), f"LABEL_{idx.item()}")
+        topn = max(1, min(top_k, row.numel()))
+        ts, ti = torch.topk(row, k=topn)
+        top = [
+            {"label": _id2label.get(j.item(), f"LABEL_{j.item()}"), "score": s.item()}
+            for s, j in zip(ts, ti)
+        ]
+        results.append({"label": label, "score": score.item(), "top": top})
 
     return results
 
@@ -174,64 +545,209 @@ def analyze_emotion(text: str) -> Dict[str, Any]:
     }
 
 
-def analyze_file(file_path: str) -> List[Dict[str, Any]]:
+class _JsonArrayStream:
     """
-    Analyze a JSON file of messages using the local model. The input file can be:
-    - A dict with key "messages" mapping to list[dict|str]
-    - A list of dicts or strings
+    Incremental reader for the message array of a JSON export.
 
-    Output format per item:
-    {
-        "text": str,
-        "timestamp": Optional[str],
-        "emotion": str,        # model label
-        "score": float,        # probability 0..1
-        "analysis": str        # info
-    }
+    Reads the file in chunks and decodes one array element at a time with
+    json.JSONDecoder.raw_decode, so memory holds a single chunk plus the element
+    being decoded, whatever the size of the file.
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
 
-    if isinstance(data, dict) and "messages" in data:
-        msgs = data["messages"]
-    elif isinstance(data, list):
-        msgs = data
-    else:
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping what was already consumed; False at EOF."""
+        if self._eof:
+            return False
+        data = self._f.read(self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON export: expected {char!r}, found {found or 'end of file'!r}")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number cut off at the end of the chunk ("1." of "1.5") also decodes;
+                # it is only complete once a delimiter follows it
+                truncated = (
+                    isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end >= len(self._buf) or self._buf[end] not in " \t\r\n,]}")
+                )
+                if not truncated or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            if not self._fill():
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                self._pos = end
+                return value
+
+    def _items(self):
+        """Yield the elements of the array starting at the current position."""
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("]")
+            return
+
+    def messages(self):
+        """Yield messages from a top-level list, or from the "messages" key of a top-level object."""
+        first = self._peek()
+        if first == "[":
+            yield from self._items()
+            return
+        if first != "{":
+            raise ValueError("Unsupported file format: expected dict with 'messages' or list")
+        self._pos += 1
+        while self._peek() != "}":
+            key = self._value()
+            self._expect(":")
+            if key == "messages":
+                yield from self._items()
+                return
+            # Export metadata (name, type, id) preceding the array is small
+            self._value()
+            if self._peek() == ",":
+                self._pos += 1
         raise ValueError("Unsupported file format: expected dict with 'messages' or list")
 
-    texts: List[str] = []
-    meta: List[Dict[str, Any]] = []
 
-    for msg in msgs:
-        if isinstance(msg, dict) and "text" in msg:
-            texts.append(msg["text"] or "")
-            meta.append({"timestamp": msg.get("date")})
-        elif isinstance(msg, str):
-            texts.append(msg)
-            meta.append({"timestamp": None})
-        else:
-            # Skip unknown
-            continue
+def _message_text(msg: Any) -> Optional[str]:
+    """Plain text of an exported message, or None for entries that are not messages.
 
-    batch_preds = predict_batch(texts, top_k=3)
+    Telegram exports store formatted text as a list of strings and entity dicts.
+    """
+    if isinstance(msg, str):
+        return msg
+    if not isinstance(msg, dict) or "text" not in msg:
+        return None
+    text = msg["text"] or ""
+    if isinstance(text, list):
+        text = "".join(part if isinstance(part, str) else str(part.get("text", "")) for part in text)
+    return text
 
-    results: List[Dict[str, Any]] = []
-    for (text, m), pred in zip(zip(texts, meta), batch_preds):
-        results.append(
-            {
+
+def iter_analyze_file(file_path: str, batch_size: int = 256):
+    """
+    Stream-analyze a JSON file of messages with the local model.
+
+    Accepts the same formats as analyze_file, but parses the messages array
+    incrementally and classifies `batch_size` messages at a time, yielding each
+    result as soon as its batch is done. Memory stays flat regardless of file size.
+
+    Yields:
+        Dicts in the analyze_file output format
+    """
+    def _flush(texts, meta):
+        for text, m, pred in zip(texts, meta, predict_batch(texts, top_k=3)):
+            yield {
                 "text": text,
                 "timestamp": m.get("timestamp"),
                 "emotion": pred["label"],
                 "score": float(round(pred["score"], 6)),
                 "analysis": "Local model prediction",
             }
-        )
 
-    return results
+    texts: List[str] = []
+    meta: List[Dict[str, Any]] = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for msg in _JsonArrayStream(f).messages():
+            text = _message_text(msg)
+            if text is None:
+                # Skip unknown
+                continue
+            texts.append(text)
+            meta.append({"timestamp": msg.get("date") if isinstance(msg, dict) else None})
+            if len(texts) >= batch_size:
+                yield from _flush(texts, meta)
+                texts, meta = [], []
+    if texts:
+        yield from _flush(texts, meta)
+
+
+def write_jsonl(results, output_path: str) -> int:
+    """Write result dicts one JSON object per line as they arrive; returns the count written."""
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False))
+            out.write("\n")
+            count += 1
+    return count
+
+
+def analyze_file_to_jsonl(file_path: str, output_path: str, batch_size: int = 256) -> int:
+    """Stream-analyze a message export into a JSONL file; returns the number of messages written."""
+    return write_jsonl(iter_analyze_file(file_path, batch_size=batch_size), output_path)
+
+
+def analyze_file(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Analyze a JSON file of messages using the local model. The input file can be:
+    - A dict with key "messages" mapping to list[dict|str]
+    - A list of dicts or strings
+
+    Output format per item:
+    {
+        "text": str,
+        "timestamp": Optional[str],
+        "emotion": str,        # model label
+        "score": float,        # probability 0..1
+        "analysis": str        # info
+    }
+
+    Collects iter_analyze_file into a list; use iter_analyze_file or
+    analyze_file_to_jsonl for large exports.
+    """
+    return list(iter_analyze_file(file_path))
 
 
 if __name__ == "__main__":
-    # Basic manual test (adjust path if needed).
-    sample = "I am very happy to see you today!"
-    print("MODEL_DIR:", MODEL_DIR)
-    print("Prediction:", predict_one(sample))
+    import sys
+
+    if len(sys.argv) == 3:
+        # python services/AI_inferenece.py export.json results.jsonl
+        written = analyze_file_to_jsonl(sys.argv[1], sys.argv[2])
+        print(f"Wrote {written} results to {sys.argv[2]}")
+    else:
+        # Basic manual test (adjust path if needed).
+        sample = "I am very happy to see you today!"
+        print("MODEL_DIR:", MODEL_DIR)
+        print("Prediction:", predict_one(sample))
@@ -6,6 +6,8 @@ import requests
 from groq import Groq
 from dotenv import load_dotenv
 from .emotion_pipeline import EmotionEmbedder
+from .rag_store import PartitionedDocumentStore
+from .ann_index import MmapANNIndex
 from huggingface_hub import InferenceClient
 
 load_dotenv()
@@ -15,9 +17,18 @@ HF_MODEL = "BAAI/bge-m3"  # Specific embedding model for RAG
 HF_RERANKER_MODEL = "BAAI/bge-reranker-v2-m3"  # Reranker model
 MODEL_PATH = os.path.join(r"Backend\AIModel", "bge-m3")
 EMBEDDING_DIM = 1024 # BGE-M3 embedding dimension
+# Stored with each Semantic_Embedding; bump when the embedding model or its input changes
+SEMANTIC_MODEL_VERSION = os.getenv("SEMANTIC_MODEL_VERSION", HF_MODEL)
+
+EMOTION_DIM = 7  # 7 emotion classes
+RAG_EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "32"))  # texts per feature_extraction request
 
 # Weight for combining semantic and emotional similarity
 EMOTION_WEIGHT = 0.3  # Adjust this to control the importance of emotional similarity
+# "memory" searches this worker's in-process document store; "pgvector" searches the
+# messages table in Postgres; "ann" searches the on-disk IVF-PQ index every worker
+# mmaps read-only. pgvector and ann are shared by all workers and survive restarts.
+RAG_RETRIEVAL_BACKEND = os.getenv("RAG_RETRIEVAL_BACKEND", "memory").strip().lower()
 
 # Tone mapping for response policy
 RESPONSE_POLICY = {
@@ -34,7 +45,14 @@ class SimpleRAG:
     def __init__(self):
         self.client = Groq(api_key=GROQ_API_KEY)
         self.model = os.getenv("model")
-        self.documents = []
+        # Document store partitioned per (app user, contact) with LRU/TTL eviction and a
+        # memory budget; vectors are L2-normalized float32 rows so cosine similarity is
+        # a single matrix-vector product per partition
+        self.store = PartitionedDocumentStore(EMBEDDING_DIM, EMOTION_DIM)
+        # Shared on-disk index that replaces the in-process store when RAG_RETRIEVAL_BACKEND=ann
+        self.ann_index = None
+        if RAG_RETRIEVAL_BACKEND == "ann":
+            self.ann_index = MmapANNIndex(semantic_dim=EMBEDDING_DIM, emotion_dim=EMOTION_DIM)
         self.max_retries = 3
         self.base_delay = 1  # Initial delay in seconds
 
@@ -78,6 +96,43 @@ class SimpleRAG:
             # Return zero vector as fallback
             return np.zeros(EMBEDDING_DIM)
 
+    def embed_batch(self, texts, batch_size=None):
+        """
+        Semantic embeddings for many texts with one feature_extraction request per chunk.
+
+        Args:
+            texts: List of strings
+            batch_size: Texts per request (default RAG_EMBED_BATCH_SIZE)
+
+        Returns:
+            float32 array of shape (len(texts), EMBEDDING_DIM) in input order; rows
+            whose embedding failed are zeros, like _embed's fallback
+        """
+        texts = list(texts)
+        embeddings = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        batch_size = max(1, batch_size or RAG_EMBED_BATCH_SIZE)
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            for attempt in range(self.max_retries):
+                try:
+                    result = np.asarray(self.hf_client.feature_extraction(chunk), dtype=np.float32)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries - 1:
+                        print(f"Batch embedding error: {e}")
+                        result = None
+                    else:
+                        time.sleep(self.base_delay * (2 ** attempt))
+            if result is not None and result.shape == (len(chunk), EMBEDDING_DIM):
+                embeddings[start:start + len(chunk)] = result
+            else:
+                # Unexpected response shape or repeated failures: embed this chunk one by one
+                for i, text in enumerate(chunk, start):
+                    embedding = self._embed(text)
+                    if embedding.shape == (EMBEDDING_DIM,):
+                        embeddings[i] = embedding
+        return embeddings
+
     def _embed_with_emotion(self, text):
         """
         Get both semantic and emotion embeddings for RAG similarity calculations.
@@ -132,24 +187,28 @@ class SimpleRAG:
                 "processed_text": None
             }
 
-    def _calculate_similarity(self, query_embedding, doc_embedding):
-        # Calculate semantic similarity
-        semantic_sim = float(np.dot(query_embedding["semantic"], doc_embedding["semantic"]) / 
-                           (np.linalg.norm(query_embedding["semantic"]) * np.linalg.norm(doc_embedding["semantic"])))
-        
-        # Calculate emotion similarity
-        emotion_sim = float(np.dot(query_embedding["emotion"], doc_embedding["emotion"]) /
-                          (np.linalg.norm(query_embedding["emotion"]) * np.linalg.norm(doc_embedding["emotion"])))
-        
-        # Combine similarities with weighting
-        return (1 - EMOTION_WEIGHT) * semantic_sim + EMOTION_WEIGHT * emotion_sim
+    @staticmethod
+    def _normalize(vector, dim):
+        """float32 unit vector of length dim (zeros for a zero or malformed vector)."""
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != dim:
+            return np.zeros(dim, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
 
-    def add_document(self, text, metadata=None):
-        self.documents.append({
-            "content": text,
-            "embedding": self._embed_with_emotion(text),  # Use the full embedding for RAG
-            "metadata": metadata or {}
-        })
+    def add_document(self, text, metadata=None, semantic_embedding=None):
+        # Reuse the semantic vector when the caller already embedded the text (embed_batch)
+        if semantic_embedding is not None and np.any(semantic_embedding):
+            embedding = {"semantic": semantic_embedding, "emotion": self.emotion_embedder.get_embedding(text)}
+        else:
+            embedding = self._embed_with_emotion(text)  # Use the full embedding for RAG
+        semantic = self._normalize(embedding["semantic"], EMBEDDING_DIM)
+        emotion = self._normalize(embedding["emotion"], EMOTION_DIM)
+        # metadata "app_user_id"/"contact_id" choose the partition
+        if self.ann_index is not None:
+            self.ann_index.append(text, metadata, semantic, emotion)
+        else:
+            self.store.add(text, metadata, semantic, emotion)
 
     def _rerank(self, query, documents, top_k=3):
         """
@@ -194,7 +253,8 @@ class SimpleRAG:
             # Fall back to original ranking if reranking fails
             return documents[:top_k]
 
-    def search(self, query, top_k=3, use_reranker=True, initial_k=10):
+    def search(self, query, top_k=3, use_reranker=True, initial_k=10, user_id=None, contact_id=None,
+               backend=None):
         """
         Search for relevant documents with optional reranking.
         
@@ -203,23 +263,25 @@ class SimpleRAG:
             top_k: Number of final results to return
             use_reranker: Whether to use the reranker (default True)
             initial_k: Number of candidates to retrieve before reranking (default 10)
+            user_id: Only retrieve messages imported by this app user
+            contact_id: Only retrieve messages with this contact
+            backend: "memory", "pgvector" or "ann" (default RAG_RETRIEVAL_BACKEND)
             
         Returns:
             List of top_k most relevant documents
         """
         # Get initial candidates using embedding similarity
         query_embedding = self._embed_with_emotion(query)
-        results = [
-            {
-                "content": doc["content"],
-                "score": self._calculate_similarity(query_embedding, doc["embedding"]),
-                "metadata": doc["metadata"]
-            }
-            for doc in self.documents
-        ]
-        
-        # Sort and get initial candidates
-        initial_results = sorted(results, key=lambda x: x["score"], reverse=True)[:initial_k]
+        backend = backend or RAG_RETRIEVAL_BACKEND
+        if backend == "pgvector":
+            initial_results = self._db_candidates(query_embedding, initial_k, user_id, contact_id)
+        elif backend == "ann" and self.ann_index is not None:
+            initial_results = self.ann_index.search(
+                query_embedding["semantic"], query_embedding["emotion"], initial_k,
+                user_id=user_id, contact_id=contact_id, emotion_weight=EMOTION_WEIGHT,
+            )
+        else:
+            initial_results = self._top_candidates(query_embedding, initial_k, user_id, contact_id)
         
         # Apply reranking if enabled
         if use_reranker and len(initial_results) > 0:
@@ -227,9 +289,57 @@ class SimpleRAG:
         else:
             return initial_results[:top_k]
 
-    def generate_response(self, query, user_messages=None, top_k=3, use_reranker=True):
+    def _db_candidates(self, query_embedding, k, user_id=None, contact_id=None):
+        """Highest combined-similarity stored messages for a query embedding, best first."""
+        from .pgvector_retrieval import search_messages
+        from .emotion_pipeline import EMOTION_MODEL_VERSION
+        return search_messages(
+            query_embedding["semantic"],
+            query_embedding["emotion"],
+            top_k=k,
+            user_id=user_id,
+            contact_id=contact_id,
+            emotion_weight=EMOTION_WEIGHT,
+            semantic_version=SEMANTIC_MODEL_VERSION,
+            emotion_version=EMOTION_MODEL_VERSION,
+        )
+
+    def _top_candidates(self, query_embedding, k, user_id=None, contact_id=None):
+        """Highest combined-similarity documents in the caller's partitions, best first."""
+        partitions = self.store.partitions_for(user_id, contact_id)
+        if k <= 0 or not partitions:
+            return []
+
+        # Rows are unit vectors, so each matvec yields cosine similarities directly
+        query_semantic = self._normalize(query_embedding["semantic"], EMBEDDING_DIM)
+        query_emotion = self._normalize(query_embedding["emotion"], EMOTION_DIM)
+        documents = []
+        partition_scores = []
+        for semantic_matrix, emotion_matrix, partition_documents in partitions:
+            scores = (1 - EMOTION_WEIGHT) * (semantic_matrix @ query_semantic)
+            scores += EMOTION_WEIGHT * (emotion_matrix @ query_emotion)
+            partition_scores.append(scores)
+            documents.extend(partition_documents)
+        scores = np.concatenate(partition_scores)
+        n = len(documents)
+        k = min(k, n)
+
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {
+                "content": documents[i]["content"],
+                "score": float(scores[i]),
+                "metadata": documents[i]["metadata"]
+            }
+            for i in top
+        ]
+
+    def generate_response(self, query, user_messages=None, top_k=3, use_reranker=True, user_id=None, contact_id=None):
         # Use the enhanced search with reranker
-        search_results = self.search(query, top_k=top_k, use_reranker=use_reranker)
+        search_results = self.search(
+            query, top_k=top_k, use_reranker=use_reranker, user_id=user_id, contact_id=contact_id
+        )
         
         # Extract content from search results
         context = "\n".join([doc["content"] for doc in search_results])
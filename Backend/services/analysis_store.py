@@ -0,0 +1,167 @@
+"""
+Durable emotion analysis store.
+
+Postgres tier under MessageCache: emotion analyses are keyed by content hash,
+model version and pipeline mode in the emotion_analyses table. Reads go straight
+to the table on a Redis miss (read-through); writes are queued and upserted in
+batches by a background thread (write-behind) so request latency never includes
+a Postgres round trip.
+"""
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+ANALYSIS_STORE_ENABLED = os.getenv("ANALYSIS_STORE_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+ANALYSIS_STORE_BATCH_SIZE = int(os.getenv("ANALYSIS_STORE_BATCH_SIZE", "200"))
+ANALYSIS_STORE_FLUSH_SECONDS = float(os.getenv("ANALYSIS_STORE_FLUSH_SECONDS", "2"))
+ANALYSIS_STORE_QUEUE_SIZE = int(os.getenv("ANALYSIS_STORE_QUEUE_SIZE", "10000"))
+
+_pending: "queue.Queue[Tuple[Tuple[str, str, str], Dict]]" = queue.Queue(maxsize=ANALYSIS_STORE_QUEUE_SIZE)
+_writer_started = False
+_writer_lock = threading.Lock()
+_table_ready = False
+
+
+def _ensure_table():
+    """Create emotion_analyses on first use (the app has no migration step)."""
+    global _table_ready
+    if not _table_ready:
+        from core.db_connection import engine
+        from model.emotion_analysis import EmotionAnalysis
+        EmotionAnalysis.__table__.create(engine, checkfirst=True)
+        _table_ready = True
+
+
+class AnalysisStore:
+    """Read-through / write-behind access to the emotion_analyses table."""
+
+    @staticmethod
+    def get(content_hash: str, model_version: str, pipeline_mode: str) -> Optional[Dict]:
+        """Stored analysis in the MessageCache emotion_data shape, or None."""
+        if not ANALYSIS_STORE_ENABLED:
+            return None
+        try:
+            from sqlmodel import Session
+            from core.db_connection import engine
+            from model.emotion_analysis import EmotionAnalysis
+            _ensure_table()
+            with Session(engine) as session:
+                row = session.get(EmotionAnalysis, (content_hash, model_version, pipeline_mode))
+                if row is None:
+                    return None
+                emotion_data = {
+                    'vector': row.Emotion_Embedding,
+                    'labels': row.Emotion_labels,
+                    'top': row.Detected_emotion,
+                    'processed_text': row.Processed_text,
+                    'model_version': row.ModelVersion,
+                    'pipeline_mode': row.PipelineMode,
+                }
+                if row.Interpretation:
+                    emotion_data['interpretation'] = row.Interpretation
+                return emotion_data
+        except Exception as e:
+            print(f"Error reading stored emotion analysis: {e}")
+            return None
+
+    @staticmethod
+    def put(content_hash: str, model_version: str, pipeline_mode: str, emotion_data: Dict) -> bool:
+        """Queue an analysis for the background writer; False if it had to be dropped."""
+        if not ANALYSIS_STORE_ENABLED or 'vector' not in emotion_data or 'labels' not in emotion_data:
+            return False
+        AnalysisStore._start_writer()
+        try:
+            _pending.put_nowait(((content_hash, model_version, pipeline_mode), emotion_data))
+            return True
+        except queue.Full:
+            print("⚠️ Emotion analysis store queue full, dropping write")
+            return False
+
+    @staticmethod
+    def flush(max_items: Optional[int] = None, first: Optional[Tuple] = None) -> int:
+        """Upsert queued analyses now; returns how many were taken off the queue."""
+        batch: Dict[Tuple[str, str, str], Dict] = {}
+        taken = 0
+        if first is not None:
+            batch[first[0]] = first[1]
+            taken = 1
+        while max_items is None or len(batch) < max_items:
+            try:
+                key, emotion_data = _pending.get_nowait()
+            except queue.Empty:
+                break
+            # Later writes for the same key win; ON CONFLICT cannot touch one row twice
+            batch[key] = emotion_data
+            taken += 1
+        if not batch:
+            return 0
+
+        try:
+            from sqlalchemy import func
+            from sqlalchemy.dialects.postgresql import insert
+            from sqlmodel import Session
+            from core.db_connection import engine
+            from model.emotion_analysis import EmotionAnalysis
+            _ensure_table()
+
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "ContentHash": content_hash,
+                    "ModelVersion": model_version,
+                    "PipelineMode": pipeline_mode,
+                    "Emotion_Embedding": data['vector'],
+                    "Emotion_labels": data['labels'],
+                    "Detected_emotion": data.get('top'),
+                    "Processed_text": data.get('processed_text'),
+                    "Interpretation": data.get('interpretation'),
+                    "CreatedAt": now,
+                    "UpdatedAt": now,
+                }
+                for (content_hash, model_version, pipeline_mode), data in batch.items()
+            ]
+            stmt = insert(EmotionAnalysis.__table__).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["ContentHash", "ModelVersion", "PipelineMode"],
+                set_={
+                    "Emotion_Embedding": stmt.excluded.Emotion_Embedding,
+                    "Emotion_labels": stmt.excluded.Emotion_labels,
+                    "Detected_emotion": stmt.excluded.Detected_emotion,
+                    "Processed_text": stmt.excluded.Processed_text,
+                    # Keep an earlier interpretation when this write has none
+                    "Interpretation": func.coalesce(
+                        stmt.excluded.Interpretation, EmotionAnalysis.__table__.c.Interpretation
+                    ),
+                    "UpdatedAt": stmt.excluded.UpdatedAt,
+                },
+            )
+            with Session(engine) as session:
+                session.exec(stmt)
+                session.commit()
+        except Exception as e:
+            print(f"Error writing {len(batch)} emotion analyses to the store: {e}")
+        return taken
+
+    @staticmethod
+    def _start_writer():
+        global _writer_started
+        if _writer_started:
+            return
+        with _writer_lock:
+            if _writer_started:
+                return
+            threading.Thread(target=_writer_loop, name="emotion-analysis-store", daemon=True).start()
+            _writer_started = True
+
+
+def _writer_loop():
+    while True:
+        # Block until there is work, then give the batch a moment to fill up
+        first = _pending.get()
+        time.sleep(ANALYSIS_STORE_FLUSH_SECONDS)
+        taken = AnalysisStore.flush(ANALYSIS_STORE_BATCH_SIZE, first=first)
+        while taken >= ANALYSIS_STORE_BATCH_SIZE:
+            taken = AnalysisStore.flush(ANALYSIS_STORE_BATCH_SIZE)
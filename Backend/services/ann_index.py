@@ -0,0 +1,641 @@
+"""
+Memory-mapped approximate nearest-neighbour index for the RAG corpus.
+
+Every uvicorn worker used to hold its own copy of the document vectors. This
+index lives on disk and is opened read-only with mmap, so the vectors sit once
+in the OS page cache shared by all workers and opening it is instant.
+
+Layout (RAG_ANN_INDEX_DIR):
+    CURRENT                 name of the live generation, swapped atomically
+    gen-000003/
+        manifest.json       sizes, PQ parameters and the partition table
+        centroids.npy       (nlist, D)          IVF coarse centroids
+        codebooks.npy       (m, ksub, D / m)    PQ codebooks over residuals
+        list_offsets.npy    (nlist + 1,)        rows are stored grouped by list
+        codes.npy           (n, m) uint8        PQ codes
+        vectors.npy         (n, D) float16      exact re-ranking of the shortlist
+        emotion.npy         (n, 7) float32
+        partitions.npy      (n,) int32          (app_user_id, contact_id) per row
+        message_ids.npy     (n,) str            metadata message_id per row ("" if none)
+        documents.jsonl + doc_offsets.npy       content and metadata per row
+        append.vec / append.jsonl               append log, searched exactly
+
+Search probes the nearest IVF lists, scores their rows with PQ lookup tables,
+re-ranks a shortlist with the float16 vectors and the same combined
+semantic + emotion score SimpleRAG uses. New documents go to the append log
+(any worker, under a file lock); compaction folds the log into a new generation
+in the background and switches CURRENT, so readers never see a partial index.
+A document whose metadata message_id is already indexed is not appended again,
+and compaction keeps only the first row per message_id.
+"""
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines: locks only cover this process
+    fcntl = None
+
+RAG_ANN_INDEX_DIR = os.getenv(
+    "RAG_ANN_INDEX_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "rag_index")),
+)
+RAG_ANN_NPROBE = int(os.getenv("RAG_ANN_NPROBE", "16"))
+RAG_ANN_REFINE_FACTOR = int(os.getenv("RAG_ANN_REFINE_FACTOR", "10"))  # shortlist = k * this
+RAG_ANN_PQ_SUBVECTORS = int(os.getenv("RAG_ANN_PQ_SUBVECTORS", "64"))
+RAG_ANN_COMPACT_ROWS = int(os.getenv("RAG_ANN_COMPACT_ROWS", "5000"))  # append log size that triggers compaction
+RAG_ANN_EXACT_MAX_ROWS = int(os.getenv("RAG_ANN_EXACT_MAX_ROWS", "20000"))  # filtered searches below this are exact
+RAG_ANN_TRAIN_SAMPLE = int(os.getenv("RAG_ANN_TRAIN_SAMPLE", "20000"))
+MIN_IVF_ROWS = 1024  # smaller corpora use a single list
+CHUNK_ROWS = 8192
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _file_lock(path: str, blocking: bool = True):
+    """Exclusive lock across threads and (where fcntl exists) processes; yields whether it was acquired."""
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(path, threading.Lock())
+    if not thread_lock.acquire(blocking):
+        yield False
+        return
+    try:
+        with open(path, "a+b") as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+            try:
+                yield True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+    finally:
+        thread_lock.release()
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(norms > 0, norms, 1)
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest (L2) centroid for each row."""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), CHUNK_ROWS):
+        chunk = x[start:start + CHUNK_ROWS]
+        out[start:start + len(chunk)] = (centroid_norms - 2 * chunk @ centroids.T).argmin(axis=1)
+    return out
+
+
+def _kmeans(x: np.ndarray, k: int, iterations: int = 15, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means; empty clusters are re-seeded from random rows."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assign = _assign(x, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        present = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+        centroids[present] = np.add.reduceat(x[order], starts, axis=0) / counts[present, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=len(empty) > len(x))]
+    return centroids
+
+
+def _partition_key(metadata: Dict) -> Tuple[Optional[str], Optional[object]]:
+    user_id = metadata.get("app_user_id")
+    return (str(user_id) if user_id is not None else None, metadata.get("contact_id"))
+
+
+def _matches(key, user_id: Optional[str], contact_id) -> bool:
+    return user_id is None or (key[0] == str(user_id) and (contact_id is None or key[1] == contact_id))
+
+
+def _message_id(doc: Dict) -> Optional[str]:
+    message_id = (doc.get("metadata") or {}).get("message_id")
+    return str(message_id) if message_id else None
+
+
+class _Corpus:
+    """Rows of a generation (base + the first log_rows of its append log) for compaction.
+
+    Row numbers index the deduplicated corpus: only the first row per message_id is kept.
+    """
+
+    def __init__(self, base: Optional[Dict], log_vectors: np.ndarray, log_docs: List[Dict], semantic_dim: int):
+        self.base = base
+        self.base_n = base["n"] if base else 0
+        self.log_vectors = log_vectors
+        self.log_docs = log_docs
+        self.semantic_dim = semantic_dim
+        self.source_rows = self._unique_rows()
+        self.n = len(self.source_rows)
+        self.duplicates = self.base_n + len(log_docs) - self.n
+
+    def _unique_rows(self) -> np.ndarray:
+        base_ids = self.base.get("message_ids") if self.base else None
+        seen = set()
+        keep = []
+        for row in range(self.base_n + len(self.log_docs)):
+            if row < self.base_n:
+                # Generations written before message_ids.npy existed are read from their documents
+                message_id = (str(base_ids[row]) or None) if base_ids is not None \
+                    else _message_id(MmapANNIndex._base_document(self.base, row))
+            else:
+                message_id = _message_id(self.log_docs[row - self.base_n])
+            if message_id is not None:
+                if message_id in seen:
+                    continue
+                seen.add(message_id)
+            keep.append(row)
+        return np.asarray(keep, dtype=np.int64)
+
+    def semantic(self, rows: np.ndarray) -> np.ndarray:
+        rows = self.source_rows[rows]
+        out = np.empty((len(rows), self.semantic_dim), dtype=np.float32)
+        in_base = rows < self.base_n
+        if in_base.any():
+            out[in_base] = self.base["vectors"][rows[in_base]]
+        if (~in_base).any():
+            out[~in_base] = self.log_vectors[rows[~in_base] - self.base_n, :self.semantic_dim]
+        return out
+
+    def emotion(self, rows: np.ndarray) -> np.ndarray:
+        rows = self.source_rows[rows]
+        out = np.empty((len(rows), self.log_vectors.shape[1] - self.semantic_dim), dtype=np.float32)
+        in_base = rows < self.base_n
+        if in_base.any():
+            out[in_base] = self.base["emotion"][rows[in_base]]
+        if (~in_base).any():
+            out[~in_base] = self.log_vectors[rows[~in_base] - self.base_n, self.semantic_dim:]
+        return out
+
+    def document(self, row: int) -> Dict:
+        row = int(self.source_rows[row])
+        if row < self.base_n:
+            return MmapANNIndex._base_document(self.base, row)
+        return self.log_docs[row - self.base_n]
+
+
+class MmapANNIndex:
+    """IVF-PQ index over mmap'd generation files plus an exactly-searched append log."""
+
+    def __init__(self, root: str = RAG_ANN_INDEX_DIR, semantic_dim: int = 1024, emotion_dim: int = 7):
+        self.root = root
+        self.semantic_dim = semantic_dim
+        self.emotion_dim = emotion_dim
+        self.row_bytes = (semantic_dim + emotion_dim) * 4
+        os.makedirs(root, exist_ok=True)
+        self._write_lock_path = os.path.join(root, ".write.lock")
+        self._compact_lock_path = os.path.join(root, ".compact.lock")
+        self._lock = threading.Lock()
+        self._generation: Optional[str] = None
+        self._base: Optional[Dict] = None
+        self._log_docs: List[Dict] = []
+        self._log_keys: List[Tuple] = []
+        self._log_ids: set = set()
+        self._base_ids: Optional[np.ndarray] = None  # sorted message ids of the base, built on first append
+        self._log_bytes_read = 0
+        self._log_vectors = np.zeros((0, semantic_dim + emotion_dim), dtype=np.float32)
+        self._compaction: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------ files
+
+    def _current_generation(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, "CURRENT"), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _set_current(self, generation: str):
+        tmp = os.path.join(self.root, "CURRENT.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(generation)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.root, "CURRENT"))
+
+    def _ensure_generation_locked(self) -> str:
+        """Live generation name, creating an empty one on first use (caller holds the write lock)."""
+        generation = self._current_generation()
+        if generation is None:
+            generation = "gen-000000"
+            path = os.path.join(self.root, generation)
+            os.makedirs(path, exist_ok=True)
+            self._write_manifest(path, {"n": 0, "nlist": 0, "partitions": []})
+            self._set_current(generation)
+        return generation
+
+    @staticmethod
+    def _write_manifest(path: str, manifest: Dict):
+        with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    @staticmethod
+    def _open_base(path: str) -> Optional[Dict]:
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if not manifest["n"]:
+            return None
+        base = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in (
+            "centroids", "codebooks", "list_offsets", "codes", "vectors", "emotion", "partitions", "doc_offsets"
+        )}
+        base["documents"] = np.memmap(os.path.join(path, "documents.jsonl"), dtype=np.uint8, mode="r")
+        ids_path = os.path.join(path, "message_ids.npy")
+        base["message_ids"] = np.load(ids_path, mmap_mode="r") if os.path.exists(ids_path) else None
+        base["n"] = manifest["n"]
+        base["partition_keys"] = [tuple(key) for key in manifest["partitions"]]
+        base["manifest"] = manifest
+        return base
+
+    @staticmethod
+    def _base_document(base: Dict, row: int) -> Dict:
+        start, stop = base["doc_offsets"][row], base["doc_offsets"][row + 1]
+        return json.loads(base["documents"][start:stop].tobytes())
+
+    def _read_log(self, path: str, rows: int, offset: int = 0) -> Tuple[List[Dict], int]:
+        """Parse up to `rows` complete lines of append.jsonl from byte `offset`; returns (docs, new offset)."""
+        docs = []
+        if rows <= 0:
+            return docs, offset
+        with open(os.path.join(path, "append.jsonl"), "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a writer is mid-line
+                docs.append(json.loads(line))
+                offset += len(line)
+                if len(docs) == rows:
+                    break
+        return docs, offset
+
+    def _log_rows(self, path: str) -> int:
+        try:
+            return os.path.getsize(os.path.join(path, "append.vec")) // self.row_bytes
+        except FileNotFoundError:
+            return 0
+
+    def _refresh(self):
+        """Reopen after a compaction and pick up rows appended by any worker (caller holds self._lock)."""
+        generation = self._current_generation()
+        if generation is None:
+            return
+        path = os.path.join(self.root, generation)
+        if generation != self._generation:
+            self._base = self._open_base(path)
+            self._generation = generation
+            self._base_ids = None
+            self._log_docs, self._log_keys, self._log_bytes_read = [], [], 0
+            self._log_ids = set()
+            self._log_vectors = np.zeros((0, self.semantic_dim + self.emotion_dim), dtype=np.float32)
+
+        # Vectors are written after their document line, so every counted row has a document
+        rows = self._log_rows(path)
+        if rows > len(self._log_docs):
+            docs, self._log_bytes_read = self._read_log(path, rows - len(self._log_docs), self._log_bytes_read)
+            self._log_docs.extend(docs)
+            self._log_keys.extend(_partition_key(doc.get("metadata") or {}) for doc in docs)
+            self._log_ids.update(filter(None, (_message_id(doc) for doc in docs)))
+        if len(self._log_docs) != len(self._log_vectors):
+            self._log_vectors = np.memmap(
+                os.path.join(path, "append.vec"), dtype=np.float32, mode="r",
+                shape=(len(self._log_docs), self.semantic_dim + self.emotion_dim),
+            )
+
+    # ------------------------------------------------------------------ writes
+
+    def _is_indexed(self, message_id: str) -> bool:
+        """Whether a row with this message_id is already in the index (caller holds self._lock, refreshed)."""
+        if message_id in self._log_ids:
+            return True
+        if self._base is None:
+            return False
+        if self._base_ids is None:
+            ids = self._base["message_ids"]
+            if ids is None:
+                ids = [_message_id(self._base_document(self._base, row)) or "" for row in range(self._base["n"])]
+            self._base_ids = np.sort(np.asarray(ids, dtype=str))
+        position = np.searchsorted(self._base_ids, message_id)
+        return position < len(self._base_ids) and self._base_ids[position] == message_id
+
+    def append(self, content: str, metadata: Optional[Dict], semantic: Sequence[float], emotion: Sequence[float]) -> bool:
+        """Add a document (normalized vectors) to the shared append log.
+
+        Returns False without writing when its metadata message_id is already indexed.
+        """
+        record = np.concatenate([
+            np.asarray(semantic, dtype=np.float32).reshape(-1),
+            np.asarray(emotion, dtype=np.float32).reshape(-1),
+        ])
+        if record.shape[0] != self.semantic_dim + self.emotion_dim:
+            raise ValueError(f"Expected {self.semantic_dim}+{self.emotion_dim} dims, got {record.shape[0]}")
+        line = json.dumps({"content": content, "metadata": metadata or {}}, default=str, ensure_ascii=False)
+        message_id = _message_id({"metadata": metadata})
+        with _file_lock(self._write_lock_path):
+            path = os.path.join(self.root, self._ensure_generation_locked())
+            if message_id is not None:
+                # Under the write lock every worker's appends are visible, so the check is exact
+                with self._lock:
+                    self._refresh()
+                    if self._is_indexed(message_id):
+                        return False
+            with open(os.path.join(path, "append.jsonl"), "ab") as f:
+                f.write(line.encode("utf-8") + b"\n")
+            with open(os.path.join(path, "append.vec"), "ab") as f:
+                f.write(record.tobytes())
+            rows = self._log_rows(path)
+        if rows >= RAG_ANN_COMPACT_ROWS:
+            self.compact_in_background()
+        return True
+
+    def compact_in_background(self):
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._compaction = threading.Thread(target=self.compact, name="rag-ann-compaction", daemon=True)
+        self._compaction.start()
+
+    def compact(self, force: bool = False) -> Dict:
+        """
+        Fold the append log into a new generation and switch CURRENT to it.
+
+        Only one process compacts at a time; appends keep flowing into the old
+        log and rows that arrive during the build are carried over.
+
+        Args:
+            force: Compact (and retrain) even if the log is below RAG_ANN_COMPACT_ROWS
+
+        Returns:
+            Summary dict with "status" and row counts
+        """
+        with _file_lock(self._compact_lock_path, blocking=False) as acquired:
+            if not acquired:
+                return {"status": "busy"}
+            with _file_lock(self._write_lock_path):
+                generation = self._ensure_generation_locked()
+            path = os.path.join(self.root, generation)
+            log_rows = self._log_rows(path)
+            if not force and log_rows < RAG_ANN_COMPACT_ROWS:
+                return {"status": "skipped", "log_rows": log_rows}
+
+            base = self._open_base(path)
+            log_docs, log_bytes = self._read_log(path, log_rows)
+            log_rows = len(log_docs)
+            log_vectors = (
+                np.memmap(os.path.join(path, "append.vec"), dtype=np.float32, mode="r",
+                          shape=(log_rows, self.semantic_dim + self.emotion_dim))
+                if log_rows else np.zeros((0, self.semantic_dim + self.emotion_dim), dtype=np.float32)
+            )
+            corpus = _Corpus(base, log_vectors, log_docs, self.semantic_dim)
+
+            number = int(generation.split("-")[1]) + 1
+            new_generation = f"gen-{number:06d}"
+            new_path = os.path.join(self.root, new_generation)
+            tmp_path = new_path + ".tmp"
+            for stale in (tmp_path, new_path):  # left over from an interrupted compaction
+                shutil.rmtree(stale, ignore_errors=True)
+            os.makedirs(tmp_path)
+            manifest = self._build(tmp_path, corpus, None if force else (base or {}).get("manifest"), base)
+            del base, log_vectors, corpus
+
+            with _file_lock(self._write_lock_path):
+                # Carry over rows appended while the new generation was being built
+                for name, start in (("append.vec", log_rows * self.row_bytes), ("append.jsonl", log_bytes)):
+                    source = os.path.join(path, name)
+                    if os.path.exists(source):
+                        with open(source, "rb") as src, open(os.path.join(tmp_path, name), "wb") as dst:
+                            src.seek(start)
+                            shutil.copyfileobj(src, dst)
+                os.replace(tmp_path, new_path)
+                self._set_current(new_generation)
+
+        # Keep the previous generation for readers that have not switched yet
+        for name in os.listdir(self.root):
+            if name.startswith("gen-") and name not in (generation, new_generation):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        print(f"🗜️ Compacted RAG index into {new_generation}: {manifest['n']} rows, {manifest['nlist']} lists, "
+              f"{manifest['duplicates_dropped']} duplicates dropped")
+        return {
+            "status": "compacted",
+            "generation": new_generation,
+            "rows": manifest["n"],
+            "log_rows": log_rows,
+            "duplicates_dropped": manifest["duplicates_dropped"],
+        }
+
+    def _build(self, path: str, corpus: _Corpus, previous: Optional[Dict], previous_base: Optional[Dict]) -> Dict:
+        """Write a generation for every row of `corpus`, reusing the previous quantizers when still valid."""
+        n, dim = corpus.n, self.semantic_dim
+        if previous and previous.get("nlist") and n <= 2 * previous["trained_rows"] and (
+            previous["nlist"] > 1 or n < MIN_IVF_ROWS
+        ):
+            centroids = np.asarray(previous_base["centroids"], dtype=np.float32)
+            codebooks = np.asarray(previous_base["codebooks"], dtype=np.float32)
+            trained_rows = previous["trained_rows"]
+        else:
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(n, min(n, RAG_ANN_TRAIN_SAMPLE), replace=False))
+            train = corpus.semantic(sample)
+            nlist = 1 if n < MIN_IVF_ROWS else min(4096, int(4 * np.sqrt(n)))
+            centroids = _normalize_rows(_kmeans(train, nlist)) if nlist > 1 else train.mean(axis=0, keepdims=True)
+            residuals = train - centroids[_assign(train, centroids)]
+            m = max(1, min(RAG_ANN_PQ_SUBVECTORS, dim))
+            while dim % m:
+                m -= 1
+            ksub = min(256, len(train))
+            sub = residuals.reshape(len(train), m, dim // m)
+            codebooks = np.stack([_kmeans(np.ascontiguousarray(sub[:, j]), ksub, seed=j) for j in range(m)])
+            trained_rows = n
+        m, ksub, dsub = codebooks.shape
+
+        lists = np.empty(n, dtype=np.int64)
+        for start in range(0, n, CHUNK_ROWS):
+            rows = np.arange(start, min(n, start + CHUNK_ROWS))
+            lists[rows] = _assign(corpus.semantic(rows), centroids)
+        order = np.argsort(lists, kind="stable")
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=len(centroids)))])
+
+        save = lambda name, dtype, shape: np.lib.format.open_memmap(
+            os.path.join(path, f"{name}.npy"), mode="w+", dtype=dtype, shape=shape
+        )
+        codes = save("codes", np.uint8, (n, m))
+        vectors = save("vectors", np.float16, (n, dim))
+        emotion = save("emotion", np.float32, (n, self.emotion_dim))
+        partitions = save("partitions", np.int32, (n,))
+        doc_offsets = np.zeros(n + 1, dtype=np.int64)
+        message_ids: List[str] = [""] * n
+        partition_ids: Dict[Tuple, int] = {}
+
+        with open(os.path.join(path, "documents.jsonl"), "wb") as docs_file:
+            for start in range(0, n, CHUNK_ROWS):
+                rows = order[start:start + CHUNK_ROWS]
+                stop = start + len(rows)
+                semantic = corpus.semantic(rows)
+                vectors[start:stop] = semantic
+                emotion[start:stop] = corpus.emotion(rows)
+                residual = (semantic - centroids[lists[rows]]).reshape(len(rows), m, dsub)
+                for j in range(m):
+                    codes[start:stop, j] = _assign(residual[:, j], codebooks[j])
+                for i, row in enumerate(rows, start):
+                    doc = corpus.document(int(row))
+                    key = _partition_key(doc.get("metadata") or {})
+                    partitions[i] = partition_ids.setdefault(key, len(partition_ids))
+                    message_ids[i] = _message_id(doc) or ""
+                    encoded = json.dumps(doc, default=str, ensure_ascii=False).encode("utf-8")
+                    docs_file.write(encoded)
+                    doc_offsets[i + 1] = doc_offsets[i] + len(encoded)
+        for array in (codes, vectors, emotion, partitions):
+            array.flush()
+        np.save(os.path.join(path, "doc_offsets.npy"), doc_offsets)
+        np.save(os.path.join(path, "message_ids.npy"), np.asarray(message_ids, dtype=str))
+        np.save(os.path.join(path, "centroids.npy"), centroids.astype(np.float32))
+        np.save(os.path.join(path, "codebooks.npy"), codebooks.astype(np.float32))
+        np.save(os.path.join(path, "list_offsets.npy"), list_offsets.astype(np.int64))
+
+        manifest = {
+            "n": n,
+            "nlist": len(centroids),
+            "pq_subvectors": m,
+            "pq_centroids": ksub,
+            "trained_rows": trained_rows,
+            "partitions": [list(key) for key in partition_ids],
+            "duplicates_dropped": corpus.duplicates,
+        }
+        self._write_manifest(path, manifest)
+        return manifest
+
+    # ------------------------------------------------------------------ search
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return (self._base["n"] if self._base else 0) + len(self._log_docs)
+
+    def search(
+        self,
+        semantic: Sequence[float],
+        emotion: Sequence[float],
+        k: int = 10,
+        user_id: Optional[str] = None,
+        contact_id=None,
+        emotion_weight: float = 0.3,
+        nprobe: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Approximate top-k documents by combined semantic + emotion cosine similarity.
+
+        Args:
+            semantic: Query semantic vector
+            emotion: Query emotion vector
+            k: Number of results
+            user_id: Only documents whose metadata app_user_id matches
+            contact_id: Only documents whose metadata contact_id matches (with user_id)
+            emotion_weight: Weight of the emotion similarity
+            nprobe: IVF lists to scan (default RAG_ANN_NPROBE)
+
+        Returns:
+            List of {"content", "score", "metadata"} dicts, best first
+        """
+        with self._lock:
+            self._refresh()
+            base = self._base
+            log_docs, log_keys, log_vectors = self._log_docs, self._log_keys, self._log_vectors
+        if k <= 0:
+            return []
+        query = _normalize_rows(np.asarray(semantic, dtype=np.float32).reshape(1, -1))[0]
+        query_emotion = _normalize_rows(np.asarray(emotion, dtype=np.float32).reshape(1, -1))[0]
+
+        hits: List[Tuple[float, Callable[[], Dict]]] = []
+        if base is not None:
+            for row, score in self._search_base(base, query, query_emotion, k, user_id, contact_id,
+                                                emotion_weight, nprobe or RAG_ANN_NPROBE):
+                hits.append((score, lambda row=row: self._base_document(base, row)))
+        if len(log_docs):
+            rows = np.array([i for i, key in enumerate(log_keys) if _matches(key, user_id, contact_id)], dtype=np.int64)
+            if len(rows):
+                records = np.asarray(log_vectors[rows])
+                scores = (1 - emotion_weight) * (records[:, :self.semantic_dim] @ query)
+                scores += emotion_weight * (records[:, self.semantic_dim:] @ query_emotion)
+                for i in np.argsort(-scores)[:k]:
+                    hits.append((float(scores[i]), lambda row=int(rows[i]): log_docs[row]))
+
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        results = []
+        for score, load in hits[:k]:
+            doc = load()
+            results.append({"content": doc["content"], "score": score, "metadata": doc.get("metadata") or {}})
+        return results
+
+    def _search_base(self, base, query, query_emotion, k, user_id, contact_id, emotion_weight, nprobe):
+        allowed = None
+        if user_id is not None:
+            allowed = np.array(
+                [i for i, key in enumerate(base["partition_keys"]) if _matches(key, user_id, contact_id)],
+                dtype=np.int32,
+            )
+            if not len(allowed):
+                return []
+            rows = np.flatnonzero(np.isin(base["partitions"], allowed))
+            if len(rows) <= RAG_ANN_EXACT_MAX_ROWS:
+                return self._rerank(base, rows, query, query_emotion, k, emotion_weight)
+
+        # Coarse step: nearest IVF lists, then PQ inner-product lookup tables (ADC)
+        list_scores = np.asarray(base["centroids"]) @ query
+        probe = np.argsort(-list_scores)[:nprobe]
+        offsets = base["list_offsets"]
+        sizes = offsets[probe + 1] - offsets[probe]
+        if not sizes.sum():
+            return []
+        rows = np.concatenate([np.arange(offsets[l], offsets[l + 1]) for l in probe])
+        row_lists = np.repeat(probe, sizes)
+        if allowed is not None:
+            keep = np.isin(base["partitions"][rows], allowed)
+            rows, row_lists = rows[keep], row_lists[keep]
+            if not len(rows):
+                return []
+
+        codebooks = base["codebooks"]
+        m, _, dsub = codebooks.shape
+        table = np.einsum("jd,jkd->jk", query.reshape(m, dsub), codebooks)
+        codes = np.asarray(base["codes"][rows])
+        approx = list_scores[row_lists] + table[np.arange(m), codes].sum(axis=1)
+
+        shortlist = max(k, k * RAG_ANN_REFINE_FACTOR)
+        if len(rows) > shortlist:
+            rows = rows[np.argpartition(-approx, shortlist - 1)[:shortlist]]
+        return self._rerank(base, np.sort(rows), query, query_emotion, k, emotion_weight)
+
+    @staticmethod
+    def _rerank(base, rows, query, query_emotion, k, emotion_weight):
+        """Exact combined scores for `rows` (ascending, for mmap locality); returns (row, score) best first."""
+        scores = (1 - emotion_weight) * (np.asarray(base["vectors"][rows], dtype=np.float32) @ query)
+        scores += emotion_weight * (np.asarray(base["emotion"][rows]) @ query_emotion)
+        top = np.argsort(-scores)[:k]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._refresh()
+            manifest = self._base["manifest"] if self._base else {"n": 0, "nlist": 0}
+            return {
+                "generation": self._generation,
+                "rows": manifest["n"],
+                "log_rows": len(self._log_docs),
+                "nlist": manifest["nlist"],
+                "pq_subvectors": manifest.get("pq_subvectors"),
+            }
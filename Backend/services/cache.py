@@ -1,11 +1,17 @@
 
 import redis
 import json
+import re
+import hashlib
+import time
+import unicodedata
 from typing import Optional, Dict, List, Any
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
 
+from services.analysis_store import AnalysisStore
+
 load_dotenv()
 
 
@@ -36,6 +42,29 @@ MESSAGE_CACHE_TTL = 300  # 5 minutes
 USER_INFO_CACHE_TTL = 3600  # 1 hour
 EMOTION_CACHE_TTL = 600  # 10 minutes
 CONVERSATION_CACHE_TTL = 180  # 3 minutes
+EMOTION_LOCK_TTL = int(os.getenv("EMOTION_LOCK_TTL", "15"))  # seconds; holders refresh it, so it only bounds a crashed one
+INTERPRETATION_HANDLE_TTL = 900  # 15 minutes to fetch a lazily generated interpretation
+TRANSLATION_CACHE_TTL = int(os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))  # 30 days
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "200000"))
+TRANSLATION_INDEX_KEY = "translation_index"  # sorted set: key -> last access time (LRU)
+
+_REPEATED_LETTERS = re.compile(r"(\w)\1{2,}")
+
+# Compare-and-delete so a holder never releases a lock that expired and was re-acquired
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Compare-and-expire so a holder only extends a lock it still owns
+_REFRESH_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
 
 class MessageCache:
     """Cache service for Message model operations"""
@@ -151,13 +180,32 @@ class MessageCache:
     # ===================== Emotion Analysis Caching =====================
     
     @staticmethod
-    def cache_emotion_analysis(message_content: str, emotion_data: Dict, ttl: int = EMOTION_CACHE_TTL):
-        """Cache emotion analysis results for a message content"""
+    def _emotion_key(content_hash: str, model_version: str, pipeline_mode: str) -> str:
+        """Redis key for an emotion analysis; results from different pipelines never share one."""
+        return f"emotion:{model_version}:{pipeline_mode}:{content_hash}"
+
+    @staticmethod
+    def cache_emotion_analysis(
+        message_content: str,
+        emotion_data: Dict,
+        model_version: str,
+        pipeline_mode: str,
+        ttl: int = EMOTION_CACHE_TTL,
+        durable: bool = True,
+    ):
+        """Cache emotion analysis results for a message content.
+
+        The entry is stamped with model_version and pipeline_mode, which are also part
+        of its key. With durable it is queued for the Postgres store as well (see
+        services.analysis_store).
+        """
         try:
             # Use hash of message content as key to avoid duplicates
-            import hashlib
             content_hash = hashlib.sha256(message_content.encode()).hexdigest()
-            key = f"emotion:{content_hash}"
+            emotion_data = {**emotion_data, 'model_version': model_version, 'pipeline_mode': pipeline_mode}
+            if durable:
+                AnalysisStore.put(content_hash, model_version, pipeline_mode, emotion_data)
+            key = MessageCache._emotion_key(content_hash, model_version, pipeline_mode)
             r.setex(key, ttl, json.dumps(emotion_data))
             return True
         except Exception as e:
@@ -165,20 +213,232 @@ class MessageCache:
             return False
     
     @staticmethod
-    def get_cached_emotion_analysis(message_content: str) -> Optional[Dict]:
-        """Retrieve cached emotion analysis for a message content"""
+    def get_cached_emotion_analysis(
+        message_content: str,
+        model_version: str,
+        pipeline_mode: str,
+        read_through: bool = True,
+    ) -> Optional[Dict]:
+        """Retrieve cached emotion analysis for a message content.
+
+        Entries not stamped with the requested model_version and pipeline_mode are
+        ignored. On a Redis miss, falls back to the durable store and repopulates
+        Redis from it. Async callers pass read_through=False and call
+        get_stored_emotion_analysis in a worker thread.
+        """
+        content_hash = hashlib.sha256(message_content.encode()).hexdigest()
+        key = MessageCache._emotion_key(content_hash, model_version, pipeline_mode)
         try:
-            import hashlib
-            content_hash = hashlib.sha256(message_content.encode()).hexdigest()
-            key = f"emotion:{content_hash}"
             cached = r.get(key)
+            if cached:
+                emotion_data = json.loads(cached)
+                if (emotion_data.get('model_version') == model_version
+                        and emotion_data.get('pipeline_mode') == pipeline_mode):
+                    return emotion_data
+        except Exception as e:
+            print(f"Error retrieving cached emotion analysis: {e}")
+
+        if not read_through:
+            return None
+        return MessageCache.get_stored_emotion_analysis(message_content, model_version, pipeline_mode)
+
+    @staticmethod
+    def get_stored_emotion_analysis(
+        message_content: str,
+        model_version: str,
+        pipeline_mode: str,
+    ) -> Optional[Dict]:
+        """Read an analysis from the durable store and repopulate Redis with it.
+
+        Makes a blocking Postgres round trip; use asyncio.to_thread from async code.
+        """
+        content_hash = hashlib.sha256(message_content.encode()).hexdigest()
+        stored = AnalysisStore.get(content_hash, model_version, pipeline_mode)
+        if stored is not None:
+            try:
+                key = MessageCache._emotion_key(content_hash, model_version, pipeline_mode)
+                r.setex(key, EMOTION_CACHE_TTL, json.dumps(stored))
+            except Exception as e:
+                print(f"Error repopulating emotion cache: {e}")
+        return stored
+    
+    @staticmethod
+    def _emotion_lock_key(message_content: str, model_version: str, pipeline_mode: str) -> str:
+        """Redis key of the cross-worker analysis lock; scoped like the emotion cache key."""
+        content_hash = hashlib.sha256(message_content.encode()).hexdigest()
+        return f"emotion_lock:{model_version}:{pipeline_mode}:{content_hash}"
+
+    @staticmethod
+    def acquire_emotion_lock(
+        message_content: str,
+        model_version: str,
+        pipeline_mode: str,
+        ttl: int = EMOTION_LOCK_TTL,
+    ) -> Optional[str]:
+        """Try to take the cross-worker analysis lock for (model_version, pipeline_mode, content).
+
+        Returns a token to pass to refresh_emotion_lock/release_emotion_lock, or None if
+        another worker holds the lock (or Redis is unavailable).
+        """
+        try:
+            import uuid
+            token = uuid.uuid4().hex
+            key = MessageCache._emotion_lock_key(message_content, model_version, pipeline_mode)
+            if r.set(key, token, nx=True, ex=ttl):
+                return token
+            return None
+        except Exception as e:
+            print(f"Error acquiring emotion analysis lock: {e}")
+            return None
+
+    @staticmethod
+    def is_emotion_locked(message_content: str, model_version: str, pipeline_mode: str) -> bool:
+        """Whether some worker currently holds the analysis lock for (model_version, pipeline_mode, content)"""
+        try:
+            return bool(r.exists(MessageCache._emotion_lock_key(message_content, model_version, pipeline_mode)))
+        except Exception as e:
+            print(f"Error checking emotion analysis lock: {e}")
+            return False
+
+    @staticmethod
+    def refresh_emotion_lock(
+        message_content: str,
+        model_version: str,
+        pipeline_mode: str,
+        token: str,
+        ttl: int = EMOTION_LOCK_TTL,
+    ) -> bool:
+        """Extend the lock's expiry if it is still held with the given token"""
+        try:
+            key = MessageCache._emotion_lock_key(message_content, model_version, pipeline_mode)
+            return bool(r.eval(_REFRESH_LOCK_SCRIPT, 1, key, token, ttl))
+        except Exception as e:
+            print(f"Error refreshing emotion analysis lock: {e}")
+            return False
+
+    @staticmethod
+    def release_emotion_lock(message_content: str, model_version: str, pipeline_mode: str, token: str):
+        """Release the lock if it is still held with the given token"""
+        try:
+            key = MessageCache._emotion_lock_key(message_content, model_version, pipeline_mode)
+            r.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+            return True
+        except Exception as e:
+            print(f"Error releasing emotion analysis lock: {e}")
+            return False
+
+    @staticmethod
+    def publish_interpretation_handle(
+        message_content: str,
+        model_version: str,
+        pipeline_mode: str,
+        handle: str,
+        ttl: int = INTERPRETATION_HANDLE_TTL,
+    ):
+        """Record the handle of the lazy interpretation being generated for a content,
+        so workers that waited on its analysis lock can share it"""
+        try:
+            key = MessageCache._emotion_lock_key(message_content, model_version, pipeline_mode)
+            r.setex(f"interpretation_for:{key}", ttl, handle)
+            return True
+        except Exception as e:
+            print(f"Error publishing interpretation handle: {e}")
+            return False
+
+    @staticmethod
+    def get_published_interpretation_handle(
+        message_content: str, model_version: str, pipeline_mode: str
+    ) -> Optional[str]:
+        """Handle published by publish_interpretation_handle, if it has not expired"""
+        try:
+            key = MessageCache._emotion_lock_key(message_content, model_version, pipeline_mode)
+            handle = r.get(f"interpretation_for:{key}")
+            return handle.decode() if isinstance(handle, bytes) else handle
+        except Exception as e:
+            print(f"Error reading interpretation handle: {e}")
+            return None
+
+    @staticmethod
+    def cache_interpretation(handle: str, data: Dict, ttl: int = INTERPRETATION_HANDLE_TTL):
+        """Store the status/text of a lazily generated interpretation"""
+        try:
+            r.setex(f"interpretation:{handle}", ttl, json.dumps(data))
+            return True
+        except Exception as e:
+            print(f"Error caching interpretation {handle}: {e}")
+            return False
+
+    @staticmethod
+    def get_cached_interpretation(handle: str) -> Optional[Dict]:
+        """Retrieve a lazily generated interpretation by handle"""
+        try:
+            cached = r.get(f"interpretation:{handle}")
             if cached:
                 return json.loads(cached)
             return None
         except Exception as e:
-            print(f"Error retrieving cached emotion analysis: {e}")
+            print(f"Error retrieving interpretation {handle}: {e}")
             return None
     
+    # ===================== Background Jobs =====================
+
+    @staticmethod
+    def acquire_job_lock(job_name: str, ttl: int) -> Optional[str]:
+        """Take the cross-worker lock for a background job; returns a token or None"""
+        try:
+            import uuid
+            token = uuid.uuid4().hex
+            if r.set(f"job_lock:{job_name}", token, nx=True, ex=ttl):
+                return token
+            return None
+        except Exception as e:
+            print(f"Error acquiring job lock {job_name}: {e}")
+            return None
+
+    @staticmethod
+    def refresh_job_lock(job_name: str, token: str, ttl: int) -> bool:
+        """Extend a held job lock; False if it expired or belongs to someone else"""
+        try:
+            key = f"job_lock:{job_name}"
+            if r.get(key) != token:
+                return False
+            return bool(r.expire(key, ttl))
+        except Exception as e:
+            print(f"Error refreshing job lock {job_name}: {e}")
+            return False
+
+    @staticmethod
+    def release_job_lock(job_name: str, token: str):
+        """Release a job lock if it is still held with the given token"""
+        try:
+            r.eval(_RELEASE_LOCK_SCRIPT, 1, f"job_lock:{job_name}", token)
+            return True
+        except Exception as e:
+            print(f"Error releasing job lock {job_name}: {e}")
+            return False
+
+    @staticmethod
+    def cache_job_progress(job_name: str, progress: Dict):
+        """Store a job's progress/checkpoint (no TTL, so a paused job can resume)"""
+        try:
+            r.set(f"job_progress:{job_name}", json.dumps(progress, default=str))
+            return True
+        except Exception as e:
+            print(f"Error caching job progress {job_name}: {e}")
+            return False
+
+    @staticmethod
+    def get_job_progress(job_name: str) -> Optional[Dict]:
+        """Retrieve a job's last reported progress/checkpoint"""
+        try:
+            cached = r.get(f"job_progress:{job_name}")
+            if cached:
+                return json.loads(cached)
+            return None
+        except Exception as e:
+            print(f"Error retrieving job progress {job_name}: {e}")
+            return None
+
     # ===================== User Info Caching =====================
     
     @staticmethod
@@ -330,6 +590,91 @@ class MessageCache:
             return {}
 
 
+class TranslationCache:
+    """Long-lived, size-bounded cache of Taglish -> English translations.
+
+    Keys are hashes of a normalized form of the text, so "Grabeee  ka 😂" and
+    "grabee ka" share one entry across users and workers. Entries expire
+    TRANSLATION_CACHE_TTL after their last use and the least recently used ones
+    are evicted once the cache holds more than TRANSLATION_CACHE_MAX_ENTRIES.
+    """
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Casefold, drop emoji/symbols, squeeze letter runs to two and collapse whitespace."""
+        text = unicodedata.normalize("NFKC", text).casefold()
+        text = "".join(ch for ch in text if not unicodedata.category(ch).startswith(("S", "C")) or ch.isspace())
+        text = _REPEATED_LETTERS.sub(r"\1\1", text)
+        return " ".join(text.split())
+
+    @staticmethod
+    def _key(text: str) -> str:
+        normalized = TranslationCache.normalize(text)
+        return f"translation:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+    @staticmethod
+    def get_many(texts: List[str], ttl: int = TRANSLATION_CACHE_TTL) -> List[Optional[str]]:
+        """Cached translations for texts (None on a miss).
+
+        Hits are moved to the recent end of the LRU order and their TTL is reset, so
+        entries in use do not expire.
+        """
+        if not texts:
+            return []
+        try:
+            keys = [TranslationCache._key(t) for t in texts]
+            values = r.mget(keys)
+            now = time.time()
+            hits = {key: now for key, value in zip(keys, values) if value is not None}
+            if hits:
+                pipe = r.pipeline()
+                pipe.zadd(TRANSLATION_INDEX_KEY, hits)
+                for key in hits:
+                    pipe.expire(key, ttl)
+                pipe.execute()
+            return list(values)
+        except Exception as e:
+            print(f"Error retrieving cached translations: {e}")
+            return [None] * len(texts)
+
+    @staticmethod
+    def set_many(pairs: List[tuple], ttl: int = TRANSLATION_CACHE_TTL):
+        """Store (text, translation) pairs and evict the oldest entries beyond the size bound."""
+        if not pairs:
+            return True
+        try:
+            now = time.time()
+            pipe = r.pipeline()
+            index = {}
+            for text, translation in pairs:
+                key = TranslationCache._key(text)
+                pipe.setex(key, ttl, translation)
+                index[key] = now
+            pipe.zadd(TRANSLATION_INDEX_KEY, index)
+            # Entries that expired on their own also leave the index here
+            pipe.zremrangebyscore(TRANSLATION_INDEX_KEY, "-inf", now - ttl)
+            pipe.zcard(TRANSLATION_INDEX_KEY)
+            size = pipe.execute()[-1]
+
+            overflow = size - TRANSLATION_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                evicted = [key for key, _ in r.zpopmin(TRANSLATION_INDEX_KEY, overflow)]
+                if evicted:
+                    r.delete(*evicted)
+            return True
+        except Exception as e:
+            print(f"Error caching translations: {e}")
+            return False
+
+    @staticmethod
+    def get(text: str) -> Optional[str]:
+        return TranslationCache.get_many([text])[0]
+
+    @staticmethod
+    def set(text: str, translation: str, ttl: int = TRANSLATION_CACHE_TTL):
+        return TranslationCache.set_many([(text, translation)], ttl)
+
+
 # Convenience function exports
 cache_message = MessageCache.cache_message
 get_cached_message = MessageCache.get_cached_message
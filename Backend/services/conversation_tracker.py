@@ -38,6 +38,12 @@ class ConversationTracker:
             r"(repeat|same|again)"
         ]
 
+        # Compiled once; each pattern is searched on its own so overlapping indicators
+        # ("i'll try that helps") still score once each. Closure indicators match whole words.
+        self._closure_regexes = [re.compile(rf"(?<!\w){re.escape(indicator)}(?!\w)") for indicator in self.closure_indicators]
+        self._resolution_regexes = [re.compile(pattern) for pattern in self.resolution_patterns]
+        self._stagnation_regexes = [re.compile(pattern) for pattern in self.stagnation_patterns]
+
     async def analyze_conversation_flow(
         self, 
         conversation_history: List[Dict[str, str]],
@@ -102,29 +108,27 @@ class ConversationTracker:
         """Check for natural conversation closure signals"""
         score = 0.0
         for message in recent_messages:
-            for indicator in self.closure_indicators:
-                if indicator in message:
+            for indicator in self._closure_regexes:
+                if indicator.search(message):
                     score += 0.3
         return min(1.0, score)
 
     def _check_resolution_patterns(self, user_messages: List[str]) -> float:
         """Check if user shows signs of problem resolution"""
-        score = 0.0
         recent_messages = user_messages[-3:] if len(user_messages) > 3 else user_messages
-        
+        score = 0.0
         for message in recent_messages:
-            for pattern in self.resolution_patterns:
-                if re.search(pattern, message):
+            for pattern in self._resolution_regexes:
+                if pattern.search(message):
                     score += 0.4
-                    
         return min(1.0, score)
 
     def _check_stagnation(self, recent_messages: List[str]) -> float:
         """Check for conversation stagnation or confusion"""
         score = 0.0
         for message in recent_messages:
-            for pattern in self.stagnation_patterns:
-                if re.search(pattern, message):
+            for pattern in self._stagnation_regexes:
+                if pattern.search(message):
                     score += 0.3
                     
         # Check for repetitive responses
@@ -188,8 +192,10 @@ class ConversationTracker:
         
         return endings.get(reason, f"Thank you for this meaningful conversation. I hope our discussion has been helpful for your communication journey.")
 
+# Shared tracker so the keyword matchers are compiled once per process
+_default_tracker = ConversationTracker()
+
 # Usage helper function
 async def should_end_conversation(conversation_history: List[Dict[str, str]], scenario_config: Dict[str, Any]) -> ConversationAnalysis:
     """Helper function to check if conversation should end"""
-    tracker = ConversationTracker()
-    return await tracker.analyze_conversation_flow(conversation_history, scenario_config)
+    return await _default_tracker.analyze_conversation_flow(conversation_history, scenario_config)
@@ -0,0 +1,271 @@
+"""
+Class-prior calibration for the emotion classifier.
+
+The classifier over-predicts neutral/joy and under-predicts the rarer emotions.
+Instead of per-label multipliers applied one list index at a time, scores for a
+whole batch are corrected in one vectorized step:
+
+    calibrated = softmax(log(scores) / temperature + bias)
+
+With temperature 1 this is exactly "multiply each class by exp(bias) and
+renormalize", so the old hand-tuned multipliers are the v1 calibration file; its
+"clamp" of 1.0 reproduces their per-class min(1.0) before renormalizing. Rows
+that are all zero (failed classifications) stay all zero.
+utilities/fit_emotion_calibration.py fits newer versions offline.
+"""
+import ast
+import csv
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EMOTION_CALIBRATION_PATH = os.getenv(
+    "EMOTION_CALIBRATION_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration", "emotion_calibration.v1.json"),
+)
+
+_EPS = 1e-8
+
+# EMOTERA annotations -> classifier labels; Anticipation/Trust have no counterpart
+EMOTERA_LABEL_MAP = {
+    "anger": "anger",
+    "disgust": "disgust",
+    "fear": "fear",
+    "joy": "joy",
+    "sadness": "sadness",
+    "surprise": "surprise",
+    "other": "neutral",
+}
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class EmotionCalibrator:
+    """Temperature plus per-class bias correction over (n, classes) score matrices."""
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        bias: Optional[Sequence[float]] = None,
+        temperature: float = 1.0,
+        version: str = "identity",
+        metadata: Optional[Dict] = None,
+        clamp: Optional[float] = None,
+    ):
+        self.labels = list(labels)
+        self.bias = np.zeros(len(self.labels)) if bias is None else np.asarray(bias, dtype=np.float64)
+        if self.bias.shape != (len(self.labels),):
+            raise ValueError(f"Calibration bias has shape {self.bias.shape}, expected ({len(self.labels)},)")
+        if temperature <= 0:
+            raise ValueError("Calibration temperature must be positive")
+        self.temperature = float(temperature)
+        self.version = version
+        self.metadata = metadata or {}
+        # Upper bound on each reweighted class score before renormalizing (legacy multipliers)
+        self.clamp = None if clamp is None else float(clamp)
+
+    @classmethod
+    def from_file(cls, path: str) -> "EmotionCalibrator":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            labels=data["labels"],
+            bias=data["bias"],
+            temperature=data.get("temperature", 1.0),
+            version=data.get("version", os.path.basename(path)),
+            metadata={k: v for k, v in data.items() if k not in {"labels", "bias", "temperature", "version", "clamp"}},
+            clamp=data.get("clamp"),
+        )
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            "version": self.version,
+            "labels": self.labels,
+            "temperature": round(self.temperature, 6),
+            "bias": [round(float(b), 6) for b in self.bias],
+            **({"clamp": self.clamp} if self.clamp is not None else {}),
+            **self.metadata,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    def reorder(self, labels: Sequence[str]) -> "EmotionCalibrator":
+        """Same calibration with its parameters ordered like `labels` (missing labels get 0 bias)."""
+        index = {label: i for i, label in enumerate(self.labels)}
+        bias = [self.bias[index[label]] if label in index else 0.0 for label in labels]
+        return EmotionCalibrator(labels, bias, self.temperature, self.version, self.metadata, self.clamp)
+
+    def apply(self, scores: np.ndarray) -> np.ndarray:
+        """Calibrate a (n, classes) matrix of probabilities.
+
+        Rows of the result sum to 1, except all-zero rows, which are returned as zeros.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.ndim == 1:
+            return self.apply(scores[None, :])[0]
+        # p ** (1 / T) * exp(bias), renormalized, is softmax(log(p) / T + bias) without
+        # the log, so zero scores stay exactly zero
+        weighted = np.power(np.clip(scores, 0.0, None), 1.0 / self.temperature) * np.exp(self.bias)
+        if self.clamp is not None:
+            weighted = np.minimum(weighted, self.clamp)
+        totals = weighted.sum(axis=1, keepdims=True)
+        return np.divide(weighted, totals, out=np.zeros_like(weighted), where=totals > 0)
+
+    @classmethod
+    def fit(
+        cls,
+        scores: np.ndarray,
+        targets: np.ndarray,
+        labels: Sequence[str],
+        prior_bias: Optional[np.ndarray] = None,
+        l2: float = 0.01,
+        balanced: bool = True,
+        fit_temperature: bool = True,
+        iterations: int = 3000,
+        learning_rate: float = 0.05,
+        version: str = "fitted",
+    ) -> "EmotionCalibrator":
+        """
+        Fit bias (and temperature) by minimizing cross-entropy with gradient descent.
+
+        Args:
+            scores: (n, classes) classifier probabilities
+            targets: (n,) gold class indices
+            labels: Class names in column order
+            prior_bias: Starting point and L2 anchor for the bias (e.g. from benchmark CSVs)
+            l2: Strength of the pull towards prior_bias
+            balanced: Weight samples inversely to class frequency (optimizes for macro-F1
+                rather than accuracy, which is what the rare-class boosts were for)
+            fit_temperature: Also fit the temperature; otherwise it stays 1
+            iterations: Gradient steps
+            learning_rate: Step size
+
+        Returns:
+            Fitted EmotionCalibrator
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        targets = np.asarray(targets, dtype=np.int64)
+        n, k = scores.shape
+        logits = np.log(np.clip(scores, _EPS, None))
+        onehot = np.eye(k)[targets]
+
+        if balanced:
+            counts = np.bincount(targets, minlength=k).astype(np.float64)
+            class_weight = np.where(counts > 0, n / (np.maximum(counts, 1) * np.count_nonzero(counts)), 0.0)
+            weights = class_weight[targets]
+        else:
+            weights = np.ones(n)
+        weights = weights / weights.sum()
+
+        anchor = np.zeros(k) if prior_bias is None else np.asarray(prior_bias, dtype=np.float64)
+        bias = anchor.copy()
+        log_t = 0.0
+        for _ in range(iterations):
+            temperature = np.exp(log_t)
+            probs = _softmax(logits / temperature + bias)
+            grad_z = (probs - onehot) * weights[:, None]
+            grad_bias = grad_z.sum(axis=0) + 2 * l2 * (bias - anchor)
+            bias -= learning_rate * grad_bias
+            if fit_temperature:
+                grad_log_t = float((grad_z * (-logits / temperature)).sum())
+                log_t -= learning_rate * grad_log_t
+        # Softmax is shift invariant; centre the bias for readability
+        bias -= bias.mean()
+        return cls(labels, bias, float(np.exp(log_t)), version)
+
+
+def evaluate(calibrator: Optional[EmotionCalibrator], scores: np.ndarray, targets: np.ndarray) -> Dict[str, float]:
+    """Accuracy, macro-F1 (over classes present in targets) and NLL of calibrated scores."""
+    probs = calibrator.apply(scores) if calibrator is not None else np.asarray(scores, dtype=np.float64)
+    predicted = probs.argmax(axis=1)
+    f1s = []
+    for c in np.unique(targets):
+        tp = np.sum((predicted == c) & (targets == c))
+        fp = np.sum((predicted == c) & (targets != c))
+        fn = np.sum((predicted != c) & (targets == c))
+        f1s.append(2 * tp / max(1, 2 * tp + fp + fn))
+    return {
+        "accuracy": round(float(np.mean(predicted == targets)), 4),
+        "f1_macro": round(float(np.mean(f1s)), 4),
+        "nll": round(float(-np.mean(np.log(np.clip(probs[np.arange(len(targets)), targets], _EPS, None)))), 4),
+    }
+
+
+def load_emotera_labelled(tsv_path: str, labels: Sequence[str]) -> List[Tuple[str, int]]:
+    """(tweet, class index) pairs from the EMOTERA TSV, skipping emotions the classifier lacks."""
+    index = {label: i for i, label in enumerate(labels)}
+    samples = []
+    with open(tsv_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f, delimiter="\t"):
+            label = EMOTERA_LABEL_MAP.get((row.get("emotion") or "").strip().lower())
+            tweet = (row.get("tweet") or "").strip()
+            if label in index and tweet:
+                samples.append((tweet, index[label]))
+    return samples
+
+
+def benchmark_prior_bias(csv_paths: Iterable[str], model_id: str, labels: Sequence[str]) -> Optional[np.ndarray]:
+    """
+    Per-class bias implied by benchmark precision/recall for `model_id`.
+
+    A class predicted recall/precision times as often as it occurs needs a
+    log(precision / recall) correction. Results from every CSV row for the model
+    are averaged; returns None when no benchmark mentions the model.
+    """
+    index = {label: i for i, label in enumerate(labels)}
+    totals = np.zeros(len(labels))
+    counts = np.zeros(len(labels))
+    for path in csv_paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if model_id not in (row.get("model_id"), row.get("model_name")) or not row.get("per_class_metrics"):
+                    continue
+                try:
+                    per_class = ast.literal_eval(row["per_class_metrics"])
+                except (ValueError, SyntaxError):
+                    continue
+                for metrics in per_class:
+                    # "🤬 anger" -> "anger"
+                    label = str(metrics.get("Emotion", "")).split()[-1].lower() if metrics.get("Emotion") else ""
+                    precision = float(metrics.get("Precision", 0) or 0)
+                    recall = float(metrics.get("Recall", 0) or 0)
+                    if label in index and precision > 0 and recall > 0:
+                        totals[index[label]] += np.log(precision / recall)
+                        counts[index[label]] += 1
+    if not counts.any():
+        return None
+    bias = np.where(counts > 0, totals / np.maximum(counts, 1), 0.0)
+    return bias - bias.mean()
+
+
+_calibrator: Optional[EmotionCalibrator] = None
+_calibrator_lock = threading.Lock()
+
+
+def get_emotion_calibrator(labels: Sequence[str]) -> EmotionCalibrator:
+    """Process-wide calibrator ordered like `labels`; identity when no file can be loaded."""
+    global _calibrator
+    if _calibrator is None:
+        with _calibrator_lock:
+            if _calibrator is None:
+                try:
+                    calibrator = EmotionCalibrator.from_file(EMOTION_CALIBRATION_PATH)
+                    print(f"🎯 Loaded emotion calibration {calibrator.version}")
+                except Exception as e:
+                    print(f"⚠️ Emotion calibration unavailable ({e}), using raw classifier scores")
+                    calibrator = EmotionCalibrator(labels)
+                _calibrator = calibrator
+    if _calibrator.labels != list(labels):
+        return _calibrator.reorder(labels)
+    return _calibrator
@@ -0,0 +1,200 @@
+"""
+Compiled keyword lexicon matching.
+
+All terms of a lexicon are compiled into one alternation with a named group per
+term, so a text is scanned once for every category instead of once per word.
+Terms only match whole words; a trailing ``*`` turns a term into a word prefix.
+
+A lexicon can also declare a ``normalization`` block for informal Filipino and
+Taglish spelling: stretched letters ("wowwww", "tanginaaa") and common affixes
+("nakakatakot", "mahirap") then still match, and a matched word credits every
+term it contains ("nakakainis" counts nakakainis, kainis and inis), as the
+original substring matcher did.
+"""
+import os
+import re
+import json
+import bisect
+import threading
+from typing import Dict, List, Optional
+
+EMOTION_LEXICON_PATH = os.getenv(
+    "EMOTION_LEXICON_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons", "filipino_emotions.v1.json"),
+)
+
+# Joins batch texts into one scan; a newline is never a word character
+_BATCH_SEPARATOR = "\n"
+
+_REPEATED_LETTERS = re.compile(r"(\w)\1+")
+
+
+def _collapse_repeats(word: str) -> str:
+    """Lowercase and squeeze runs of a repeated letter to one ("wowwww" -> "wow")."""
+    return _REPEATED_LETTERS.sub(r"\1", word.lower())
+
+
+class LexiconMatcher:
+    """Word-boundary multi-term matcher over weighted categories."""
+
+    def __init__(
+        self,
+        categories: Dict[str, List[str]],
+        weights: Optional[Dict[str, float]] = None,
+        version: str = "inline",
+        regex_terms: bool = False,
+        normalization: Optional[Dict] = None,
+    ):
+        """
+        Args:
+            categories: Mapping of category name to its terms
+            weights: Score added per distinct matched term (default 1.0 per category)
+            version: Lexicon version string, reported alongside results
+            regex_terms: Treat terms as regular expressions instead of literal words
+            normalization: Optional {"stretched_letters", "prefixes", "suffixes",
+                "min_stem_length"} for informal spellings of literal terms
+        """
+        self.version = version
+        self.categories = list(categories.keys())
+        self.weights = {name: (weights or {}).get(name, 1.0) for name in self.categories}
+        self._term_category: Dict[str, str] = {}
+        self._term_text: Dict[str, str] = {}
+        self._normalized = bool(normalization) and not regex_terms
+        # (collapsed stem, category, term) for crediting every term inside a matched word
+        self._stems: List[tuple] = []
+
+        normalization = normalization or {}
+        stretched = bool(normalization.get("stretched_letters"))
+        min_stem = int(normalization.get("min_stem_length", 4))
+        prefixes = self._affix_pattern(normalization.get("prefixes", []))
+        suffixes = self._affix_pattern(normalization.get("suffixes", []))
+
+        alternatives = []
+        for name, terms in categories.items():
+            for term in terms:
+                group = f"t{len(self._term_text)}"
+                self._term_category[group] = name
+                self._term_text[group] = term
+                if regex_terms:
+                    alternatives.append((len(term), f"(?P<{group}>{term})"))
+                    continue
+                stem = term[:-1] if term.endswith("*") else term
+                if stretched:
+                    body = "".join(f"{re.escape(c)}+" for c in stem)
+                else:
+                    body = re.escape(stem)
+                if term.endswith("*"):
+                    body += r"\w*"
+                elif self._normalized and len(stem) >= min_stem:
+                    body = f"{prefixes}{body}{suffixes}"
+                if self._normalized:
+                    self._stems.append((_collapse_repeats(stem), name, term))
+                alternatives.append((len(term), f"(?P<{group}>{body})"))
+
+        # Longest terms first so "nakakainis" wins over "inis" at the same position
+        alternatives.sort(key=lambda item: -item[0])
+        pattern = "|".join(body for _, body in alternatives) or r"(?!x)x"
+        if regex_terms:
+            self._pattern = re.compile(pattern, re.IGNORECASE)
+        else:
+            self._pattern = re.compile(rf"(?<!\w)(?:{pattern})(?!\w)", re.IGNORECASE)
+
+    @staticmethod
+    def _affix_pattern(affixes: List[str]) -> str:
+        if not affixes:
+            return ""
+        # Longest first so "nakaka" is tried before "naka" and "na"
+        ordered = sorted(affixes, key=len, reverse=True)
+        return "(?:" + "|".join(re.escape(a) for a in ordered) + ")?"
+
+    @classmethod
+    def from_file(cls, path: str) -> "LexiconMatcher":
+        """Load a versioned lexicon JSON file ({"version", "emotions": {name: {weight, terms}}}).
+
+        The file's "examples" (text -> expected score per category) are checked on
+        load, so a lexicon edit that stops matching a known form fails loudly.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        entries = data["emotions"]
+        matcher = cls(
+            {name: entry["terms"] for name, entry in entries.items()},
+            weights={name: float(entry.get("weight", 1.0)) for name, entry in entries.items()},
+            version=str(data.get("version", os.path.basename(path))),
+            normalization=data.get("normalization"),
+        )
+        failures = matcher.check_examples(data.get("examples", {}))
+        if failures:
+            raise ValueError(f"Lexicon {matcher.version} fails its examples: {'; '.join(failures)}")
+        return matcher
+
+    def check_examples(self, examples: Dict[str, Dict[str, float]]) -> List[str]:
+        """Describe every example whose scores differ from the expected ones (unlisted categories expect 0)."""
+        texts = list(examples.keys())
+        failures = []
+        for text, scored in zip(texts, self.score_batch(texts)):
+            expected = examples[text]
+            for name in self.categories:
+                if abs(scored[name] - expected.get(name, 0.0)) > 1e-9:
+                    failures.append(f"{text!r} {name}={scored[name]:.2f}, expected {expected.get(name, 0.0):.2f}")
+        return failures
+
+    def matches(self, text: str) -> Dict[str, List[str]]:
+        """Distinct matched terms per category for one text."""
+        return self.matches_batch([text])[0]
+
+    def matches_batch(self, texts: List[str]) -> List[Dict[str, List[str]]]:
+        """Distinct matched terms per category for each text, in a single scan."""
+        results: List[Dict[str, List[str]]] = [{name: [] for name in self.categories} for _ in texts]
+        if not texts:
+            return results
+
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + len(_BATCH_SEPARATOR)
+        joined = _BATCH_SEPARATOR.join(texts)
+
+        for match in self._pattern.finditer(joined):
+            group = match.lastgroup
+            index = bisect.bisect_right(starts, match.start()) - 1
+            # regex terms may span the separator; keep only matches inside one text
+            if match.end() > starts[index] + len(texts[index]):
+                continue
+            if self._normalized:
+                word = _collapse_repeats(match.group(0))
+                credited = [(name, term) for stem, name, term in self._stems if stem in word]
+            else:
+                credited = [(self._term_category[group], self._term_text[group])]
+            for name, term in credited:
+                terms = results[index][name]
+                if term not in terms:
+                    terms.append(term)
+        return results
+
+    def score(self, text: str) -> Dict[str, float]:
+        """Weighted score per category for one text."""
+        return self.score_batch([text])[0]
+
+    def score_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Weighted score per category for each text, in a single scan."""
+        return [
+            {name: self.weights[name] * len(terms) for name, terms in matched.items()}
+            for matched in self.matches_batch(texts)
+        ]
+
+
+_emotion_lexicon: Optional[LexiconMatcher] = None
+_emotion_lexicon_lock = threading.Lock()
+
+
+def get_emotion_lexicon() -> LexiconMatcher:
+    """Return the process-wide Filipino emotion lexicon, compiling it on first use."""
+    global _emotion_lexicon
+    if _emotion_lexicon is None:
+        with _emotion_lexicon_lock:
+            if _emotion_lexicon is None:
+                _emotion_lexicon = LexiconMatcher.from_file(EMOTION_LEXICON_PATH)
+                print(f"📚 Loaded emotion lexicon {_emotion_lexicon.version}")
+    return _emotion_lexicon
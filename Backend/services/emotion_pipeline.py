@@ -1,8 +1,14 @@
 import os
 import time
+import asyncio
+import threading
+import contextlib
+import httpx
 import requests
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import Dict, List, Tuple, Optional
-from groq import Groq
+from groq import Groq, AsyncGroq
 from dotenv import load_dotenv
 from huggingface_hub import InferenceClient
 
@@ -10,65 +16,399 @@ load_dotenv()
 
 # Import cache for emotion analysis caching
 try:
-    from services.cache import MessageCache
+    from services.cache import MessageCache, TranslationCache, EMOTION_LOCK_TTL
     CACHE_AVAILABLE = True
 except ImportError:
     CACHE_AVAILABLE = False
     print("Warning: Cache not available for emotion analysis")
 
+from services.emotion_lexicon import get_emotion_lexicon
+from services.language_detector import get_language_detector
+from services.interpretation_templates import local_interpretation
+from services.emotion_calibration import get_emotion_calibrator
+
 HF_MODEL = "j-hartmann/emotion-english-roberta-large"  # Upgraded from distilroberta-base for better accuracy
+# Output order of the classifier head
+HF_LABELS = ('anger', 'disgust', 'fear', 'joy', 'neutral', 'sadness', 'surprise')
+# Part of the durable analysis store key; bump when the classifier or prompts change
+# so stored results from the old pipeline are no longer served. The calibration
+# file's version is included automatically.
+EMOTION_MODEL_VERSION = os.getenv("EMOTION_MODEL_VERSION") or (
+    f"{HF_MODEL}+{get_emotion_calibrator(list(HF_LABELS)).version}"
+)
+
+
+def _get_env_bool(name: str, default: bool = False) -> bool:
+    """Interpret common truthy strings from environment values."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+# Classifier backend: "remote" (HF Inference API) or "local" (in-process torch model
+# from services/AI_inferenece.py). With EMOTION_REMOTE_FALLBACK enabled, a failing
+# local backend falls back to the HF Inference API instead of returning zeros.
+EMOTION_BACKEND = os.getenv("EMOTION_BACKEND", "remote").strip().lower()
+EMOTION_REMOTE_FALLBACK = _get_env_bool("EMOTION_REMOTE_FALLBACK", True)
+EMOTION_LOCAL_MODEL_DIR = os.getenv("EMOTION_LOCAL_MODEL_DIR")  # Defaults to Backend/AIModel
+# Share local forward passes between concurrent requests (see AI_inferenece.MicroBatcher)
+EMOTION_LOCAL_MICROBATCH = _get_env_bool("EMOTION_LOCAL_MICROBATCH", True)
+
+# Maximum number of texts sent in one classifier / LLM request by analyze_texts_full
+EMOTION_MAX_BATCH_SIZE = int(os.getenv("EMOTION_MAX_BATCH_SIZE", "16"))
+
+# Raw HF Inference endpoint, used for multi-input classification requests
+HF_INFERENCE_URL = "https://router.huggingface.co/hf-inference/models"
+
+# Ensemble mode: run the classifier and the LLM vote concurrently. The LLM vote has a
+# deadline; when it is missed the classifier answer is used instead of stalling.
+EMOTION_ENSEMBLE_CONCURRENT = _get_env_bool("EMOTION_ENSEMBLE_CONCURRENT", True)
+EMOTION_LLM_DEADLINE_SECONDS = float(os.getenv("EMOTION_LLM_DEADLINE_SECONDS", "2.5"))
+EMOTION_ENSEMBLE_WORKERS = int(os.getenv("EMOTION_ENSEMBLE_WORKERS", "8"))
+
+_ensemble_executor = ThreadPoolExecutor(
+    max_workers=EMOTION_ENSEMBLE_WORKERS, thread_name_prefix="emotion-ensemble"
+)
+
+# Async API: cap on in-flight HF/Groq requests per worker, shared by all async callers
+EMOTION_MAX_INFLIGHT = int(os.getenv("EMOTION_MAX_INFLIGHT", "16"))
+_upstream_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_upstream_semaphore() -> asyncio.Semaphore:
+    """Return the worker-wide semaphore bounding concurrent async upstream calls."""
+    global _upstream_semaphore
+    if _upstream_semaphore is None:
+        _upstream_semaphore = asyncio.Semaphore(EMOTION_MAX_INFLIGHT)
+    return _upstream_semaphore
+
+# Translation is skipped when the local detector is at least this sure the text is English
+EMOTION_ENGLISH_CONFIDENCE = float(os.getenv("EMOTION_ENGLISH_CONFIDENCE", "0.98"))
+
+
+def detect_language(text: str) -> Dict:
+    """Local English vs. Taglish detection: {"language": "en"|"tl"|"unknown", "confidence": float}."""
+    detector = get_language_detector()
+    if detector is None:
+        return {"language": "unknown", "confidence": 0.0}
+    language, confidence = detector.detect(text)
+    return {"language": language, "confidence": round(confidence, 4)}
+
+
+def _is_confident_english(detection: Optional[Dict]) -> bool:
+    return bool(detection) and detection["language"] == "en" and detection["confidence"] >= EMOTION_ENGLISH_CONFIDENCE
+
+# Single-flight: concurrent analyze_emotion calls for the same text share one upstream
+# computation (in-process futures, plus a Redis lock across uvicorn workers that the
+# holder keeps refreshing). Waiters give up after roughly one slow pipeline run.
+EMOTION_SINGLE_FLIGHT = _get_env_bool("EMOTION_SINGLE_FLIGHT", True)
+EMOTION_LOCK_WAIT_SECONDS = float(os.getenv("EMOTION_LOCK_WAIT_SECONDS", "30"))
+EMOTION_LOCK_POLL_SECONDS = 0.1
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+_ainflight: Dict[str, "asyncio.Future"] = {}
+
+# Interpretations: texts per batched completion, and background workers for lazy mode
+EMOTION_INTERPRETATION_BATCH_SIZE = int(os.getenv("EMOTION_INTERPRETATION_BATCH_SIZE", "8"))
+_interpretation_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EMOTION_INTERPRETATION_WORKERS", "4")),
+    thread_name_prefix="emotion-interpretation",
+)
+_background_tasks: set = set()
+
+# Interpretation engine: "llm", "local" (template engine, no Groq call) or "auto"
+# (LLM unless EMOTION_INTERPRETATION_LOCAL_ABOVE LLM interpretations are already in flight)
+EMOTION_INTERPRETATION_ENGINE = os.getenv("EMOTION_INTERPRETATION_ENGINE", "auto").lower()
+EMOTION_INTERPRETATION_LOCAL_ABOVE = int(os.getenv("EMOTION_INTERPRETATION_LOCAL_ABOVE", "8"))
+_llm_interpretations_in_flight = 0
+_llm_interpretations_lock = threading.Lock()
+
+
+def _use_local_interpretation(engine: Optional[str] = None) -> bool:
+    """Whether this request's interpretation should come from the template engine."""
+    engine = (engine or EMOTION_INTERPRETATION_ENGINE).lower()
+    if engine == "local":
+        return True
+    if engine == "auto":
+        return _llm_interpretations_in_flight >= EMOTION_INTERPRETATION_LOCAL_ABOVE
+    return False
+
+
+@contextlib.contextmanager
+def _llm_interpretation_slot(count: int = 1):
+    """Count in-flight LLM interpretations for the "auto" engine's load check."""
+    global _llm_interpretations_in_flight
+    with _llm_interpretations_lock:
+        _llm_interpretations_in_flight += count
+    try:
+        yield
+    finally:
+        with _llm_interpretations_lock:
+            _llm_interpretations_in_flight -= count
+
+# Classifier guesses shown per text in the batched LLM verification prompt
+EMOTION_VERIFY_TOP_K = int(os.getenv("EMOTION_VERIFY_TOP_K", "3"))
+
+# Analysis mode for get_final_emotion: "ensemble" (classifier + LLM vote on every text)
+# or "cascade" (keyword lexicon -> classifier -> LLM only below the confidence
+# threshold and only while the per-request latency budget allows it).
+EMOTION_ANALYSIS_MODE = os.getenv("EMOTION_ANALYSIS_MODE", "ensemble").strip().lower()
+EMOTION_CASCADE_THRESHOLD = float(os.getenv("EMOTION_CASCADE_THRESHOLD", "0.65"))
+EMOTION_CASCADE_LEXICON_MIN = float(os.getenv("EMOTION_CASCADE_LEXICON_MIN", "0.3"))
+EMOTION_CASCADE_BUDGET_MS = float(os.getenv("EMOTION_CASCADE_BUDGET_MS", "1500"))
+
+# Pipeline-mode slot of the emotion cache key for bare classifier vectors, so
+# get_embedding's cache never mixes with full analyses
+EMBEDDING_CACHE_MODE = "embedding"
+
+# Which tier answered each cascade request, plus a running LLM latency estimate used
+# to decide whether the LLM tier still fits in the remaining budget
+_cascade_metrics = {
+    "cache": 0,
+    "lexicon": 0,
+    "classifier": 0,
+    "llm": 0,
+    "llm_skipped_budget": 0,
+    "llm_latency_ms_ewma": None,
+}
+_cascade_metrics_lock = threading.Lock()
+
+
+def _record_cascade_tier(tier: str, llm_latency_ms: Optional[float] = None) -> None:
+    with _cascade_metrics_lock:
+        _cascade_metrics[tier] += 1
+        if llm_latency_ms is not None:
+            previous = _cascade_metrics["llm_latency_ms_ewma"]
+            _cascade_metrics["llm_latency_ms_ewma"] = (
+                llm_latency_ms if previous is None else 0.8 * previous + 0.2 * llm_latency_ms
+            )
+
+
+def get_cascade_metrics() -> Dict:
+    """Snapshot of the cascade tier counters for this worker."""
+    with _cascade_metrics_lock:
+        return dict(_cascade_metrics)
+
+
+def get_local_batch_metrics() -> Optional[Dict]:
+    """Micro-batcher queue depth / batch size metrics, or None without a local backend."""
+    if _emotion_pipeline is None or _emotion_pipeline._local is None:
+        return None
+    return _emotion_pipeline._local.get_microbatch_metrics()
+
+class EmotionAnalysisContext:
+    """Request-scoped memo carried through one emotion analysis.
+
+    analyze_text_full, get_final_emotion and interpretation() read from and fill in
+    this object so translation, the classifier vector and keyword boosts are each
+    computed once per request, independently of whether Redis is reachable.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.processed_text: Optional[str] = None
+        self.language: Optional[Dict] = None  # detect_language() result for text
+        self.embedding: Optional[List[float]] = None
+        self.keyword_boosts: Optional[Dict[str, float]] = None
+        self.scores: Optional[Dict[str, float]] = None  # Keyword-boosted, renormalized
+        # In-flight LLM ensemble vote started alongside the classifier
+        self.llm_future: Optional[Future] = None
+        self.llm_deadline_at: Optional[float] = None
+        # Which tier produced the final label ("lexicon", "classifier", "llm", "cache")
+        self.answered_by: Optional[str] = None
+        # Start of the request; the cascade latency budget counts from here
+        self.started_at = time.monotonic()
+
 
 class EmotionEmbedder:
     """A class to generate emotion embeddings for text using a pre-trained model with translation support."""
     
-    def __init__(self, model_name: str = HF_MODEL, cache_dir: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str = HF_MODEL,
+        cache_dir: Optional[str] = None,
+        backend: Optional[str] = None,
+        remote_fallback: Optional[bool] = None,
+    ):
         """Initialize the emotion embedder with a pre-trained model and translation capability.
         
         Args:
             model_name: Name of the pre-trained model to use
             cache_dir: Directory to cache the model files (optional)
+            backend: "remote" or "local" (defaults to EMOTION_BACKEND)
+            remote_fallback: Fall back to the HF Inference API when the local backend fails
+                (defaults to EMOTION_REMOTE_FALLBACK)
         """
         self.model_name = model_name
-        
-        # HF Inference API setup with new syntax
-        self.hf_client = InferenceClient(
-            provider="hf-inference",
-            api_key=os.environ.get("HF_TOKEN")
-        )
-        
-        if not os.environ.get("HF_TOKEN"):
-            raise ValueError("HF_TOKEN not found in environment variables")
+        self.backend = (backend or EMOTION_BACKEND).lower()
+        if self.backend not in ("remote", "local"):
+            raise ValueError(f"Unknown emotion backend '{self.backend}', expected 'remote' or 'local'")
+        self.remote_fallback = EMOTION_REMOTE_FALLBACK if remote_fallback is None else remote_fallback
 
         # The labels must be in the correct order as expected by the model's output.
         # For "j-hartmann/emotion-english-distilroberta-base", this is the order.
-        self.labels = {
-            0: 'anger', 1: 'disgust', 2: 'fear', 3: 'joy', 4: 'neutral', 5: 'sadness', 6: 'surprise'
-        }
+        self.labels = dict(enumerate(HF_LABELS))
         self.label_names = list(self.labels.values())
-        print(f"Emotion analysis configured for Hugging Face model: {self.model_name}")
+        self.calibrator = get_emotion_calibrator(self.label_names)
+
+        # HF Inference API setup with new syntax (required for the remote backend,
+        # optional for the local backend where it only serves as fallback)
+        self.hf_client = None
+        if os.environ.get("HF_TOKEN"):
+            self.hf_client = InferenceClient(
+                provider="hf-inference",
+                api_key=os.environ.get("HF_TOKEN")
+            )
+        elif self.backend == "remote":
+            raise ValueError("HF_TOKEN not found in environment variables")
+        elif self.remote_fallback:
+            print("Warning: HF_TOKEN not set, remote fallback for the local emotion classifier is disabled")
+            self.remote_fallback = False
+
+        self._local = None
+        if self.backend == "local":
+            self._load_local_backend()
+            print(f"Emotion analysis configured for local model (remote fallback: {self.remote_fallback})")
+        else:
+            print(f"Emotion analysis configured for Hugging Face model: {self.model_name}")
         
         # Initialize Groq client for translation
         self.groq_client = None
+        self.async_groq_client = None
         self.groq_model = None
+        self._async_http: Optional[httpx.AsyncClient] = None
         groq_api_key = os.getenv("api_key")  # Using your existing env variable
         groq_model_name = os.getenv("model")  # Using your existing env variable
         
         if groq_api_key and groq_model_name:
             try:
                 self.groq_client = Groq(api_key=groq_api_key)
+                self.async_groq_client = AsyncGroq(api_key=groq_api_key)
                 self.groq_model = groq_model_name
                 print("Groq client initialized for translation support")
             except Exception as e:
                 print(f"Warning: Could not initialize Groq client: {e}")
                 print("Translation will be skipped for non-English text")
 
-    def _translate_text(self, text: str) -> str:
-        """Translate text to English if needed using Groq. Always attempts translation with emotion preservation."""
-        if not self.groq_client or not self.groq_model:
-            return text
-        
+    def _load_local_backend(self) -> None:
+        """Load and warm the in-process classifier so the first request pays no load cost."""
+        from services import AI_inferenece
+
+        if EMOTION_LOCAL_MODEL_DIR:
+            AI_inferenece.load_local_model(EMOTION_LOCAL_MODEL_DIR)
+        else:
+            AI_inferenece.load_local_model()
+
+        id2label = AI_inferenece.get_id2label()
+        model_labels = [id2label[i].lower() for i in sorted(id2label)]
+        if set(model_labels) != set(self.label_names):
+            if len(model_labels) != len(self.label_names):
+                raise ValueError(
+                    f"Local emotion model has {len(model_labels)} labels, expected {len(self.label_names)}"
+                )
+            # Generic LABEL_i names: assume the model uses our label order
+            print(f"Warning: local model labels {model_labels} are generic, assuming {self.label_names}")
+            self._local_label_map = {m: self.labels[i] for i, m in enumerate(model_labels)}
+        else:
+            self._local_label_map = {m: m for m in model_labels}
+
+        # Warm-up forward pass
+        AI_inferenece.predict_scores(["warm up"])
+        self._local = AI_inferenece
+
+    def _classify_local(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Classify texts with the in-process model. Returns raw label -> score dicts."""
+        if EMOTION_LOCAL_MICROBATCH:
+            raw = self._local.predict_scores_batched(texts)
+        else:
+            raw = self._local.predict_scores(texts)
+        return self._map_local_labels(raw)
+
+    def _map_local_labels(self, raw: List[Dict[str, float]]) -> List[Dict[str, float]]:
+        return [
+            {self._local_label_map.get(label, label): score for label, score in item.items()}
+            for item in raw
+        ]
+
+    def _classify_remote(self, text: str) -> Dict[str, float]:
+        """Classify a single text with the HF Inference API. Returns raw label -> score."""
+        if self.hf_client is None:
+            raise RuntimeError("HF Inference API client is not configured (HF_TOKEN missing)")
+        # Use the new client syntax for text classification
+        api_response = self.hf_client.text_classification(
+            text=text,
+            model=self.model_name
+        )
+        # The API returns a list of dicts. We need to process them.
+        return {item['label'].lower(): item['score'] for item in api_response}
+
+    def _classify_remote_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Classify many texts with a single HF Inference API request.
+
+        Falls back to one request per text if the batched call fails or returns
+        an unexpected shape.
+        """
+        if self.hf_client is None:
+            raise RuntimeError("HF Inference API client is not configured (HF_TOKEN missing)")
         try:
-            translate_prompt = f"""You are an expert Filipino-English translator specializing in emotional expressions.
+            response = requests.post(
+                f"{HF_INFERENCE_URL}/{self.model_name}",
+                headers={"Authorization": f"Bearer {os.environ.get('HF_TOKEN')}"},
+                json={"inputs": texts, "parameters": {"top_k": len(self.label_names)}},
+                timeout=30,
+            )
+            response.raise_for_status()
+            payload = response.json()
+            if (
+                isinstance(payload, list)
+                and len(payload) == len(texts)
+                and all(isinstance(row, list) for row in payload)
+            ):
+                return [{item['label'].lower(): item['score'] for item in row} for row in payload]
+            print("Batched HF classification returned an unexpected shape, falling back to per-item requests")
+        except Exception as e:
+            print(f"Batched HF classification failed: {e}, falling back to per-item requests")
+        return [self._classify_remote(t) for t in texts]
+
+    def _classify_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Run the configured classifier backend on many texts in one call, keeping input order."""
+        if not texts:
+            return []
+        if self.backend == "local":
+            try:
+                return self._classify_local(texts)
+            except Exception as e:
+                if not self.remote_fallback:
+                    raise
+                print(f"Local emotion classifier failed: {e}, falling back to HF Inference API")
+        return self._classify_remote_batch(texts)
+
+    def _classify(self, text: str) -> Dict[str, float]:
+        """Run the configured classifier backend on a single text."""
+        if self.backend == "local":
+            try:
+                return self._classify_local([text])[0]
+            except Exception as e:
+                if not self.remote_fallback:
+                    raise
+                print(f"Local emotion classifier failed: {e}, falling back to HF Inference API")
+        return self._classify_remote(text)
+
+    def _reweight(self, scores_dict: Dict[str, float]) -> List[float]:
+        """Order raw classifier scores by self.label_names and apply the class calibration."""
+        return self._reweight_batch([scores_dict])[0]
+
+    def _reweight_batch(self, scores_dicts: List[Dict[str, float]]) -> List[List[float]]:
+        """Calibrate many raw classifier score dicts in one vectorized step (see services.emotion_calibration)."""
+        if not scores_dicts:
+            return []
+        scores = np.array([[d.get(label, 0.0) for label in self.label_names] for d in scores_dicts])
+        return self.calibrator.apply(scores).tolist()
+
+    def _translation_messages(self, text: str) -> List[Dict[str, str]]:
+        """Chat messages for translating a single text (shared by sync and async paths)."""
+        translate_prompt = f"""You are an expert Filipino-English translator specializing in emotional expressions.
 
 Translate this Filipino/Taglish text to English while:
 1. Preserving the EXACT emotional intensity (anger, joy, sadness, fear, disgust, surprise, neutral)
@@ -80,31 +420,142 @@ Translate this Filipino/Taglish text to English while:
 Text: {text}
 
 Translation:"""
-            
+        return [
+            {"role": "system", "content": "You are a Filipino-English emotion-preserving translator. Maintain emotional tone, intensity, and informal language precisely."},
+            {"role": "user", "content": translate_prompt}
+        ]
+
+    @staticmethod
+    def _clean_translation(translated: str, text: str) -> str:
+        """Strip prefixes the LLM might add; fall back to the original text if empty."""
+        translated = translated.strip()
+        # Remove common prefixes that LLM might add
+        prefixes = ["Translation:", "English:", "Translated:", "Output:"]
+        for prefix in prefixes:
+            if translated.startswith(prefix):
+                translated = translated[len(prefix):].strip()
+        return translated if translated else text
+
+    def _translate_text(self, text: str, detection: Optional[Dict] = None) -> str:
+        """Translate text to English if needed using Groq.
+
+        Text the local detector confidently labels English is returned unchanged
+        without an LLM call; everything else is translated with emotion preservation.
+        """
+        if not self.groq_client or not self.groq_model:
+            return text
+        if _is_confident_english(detection or detect_language(text)):
+            return text
+        cached = TranslationCache.get(text) if CACHE_AVAILABLE else None
+        if cached is not None:
+            return cached
+        
+        try:
             response = self.groq_client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a Filipino-English emotion-preserving translator. Maintain emotional tone, intensity, and informal language precisely."},
-                    {"role": "user", "content": translate_prompt}
-                ],
+                messages=self._translation_messages(text),
                 model=self.groq_model,
                 temperature=0.1,  # Lower temperature for more consistent translations
                 max_tokens=200
             )
-            translated = response.choices[0].message.content.strip()
-            # Remove common prefixes that LLM might add
-            prefixes = ["Translation:", "English:", "Translated:", "Output:"]
-            for prefix in prefixes:
-                if translated.startswith(prefix):
-                    translated = translated[len(prefix):].strip()
-            return translated if translated else text
+            translated = self._clean_translation(response.choices[0].message.content, text)
+            if CACHE_AVAILABLE:
+                TranslationCache.set(text, translated)
+            return translated
         except Exception as e:
             print(f"Translation error: {e}")
             return text
 
+    @staticmethod
+    def _batch_translation_messages(chunk: List[Tuple[int, str]]) -> List[Dict[str, str]]:
+        """Chat messages asking for a JSON translation of (id, text) pairs."""
+        # Build a structured prompt asking for JSON output
+        items_block = "\n".join([f"{i}: {t}" for i, t in chunk])
+        prompt = (
+            "Translate the following texts to English preserving the EXACT emotional intensity, "
+            "informal tone (slang stays slang) and punctuation. Return EXACTLY valid JSON: "
+            "[{\"id\":<id>, \"translation\": \"...\"}, ...] with the original ids.\n\n"
+            f"Texts:\n{items_block}\n\nJSON:"
+        )
+        return [
+            {"role": "system", "content": "You are a precise Filipino-English translator, keep emotional intensity and informal language exactly."},
+            {"role": "user", "content": prompt}
+        ]
+
+    @staticmethod
+    def _apply_batch_translation(
+        content: str,
+        chunk: List[Tuple[int, str]],
+        results: list,
+        parsed_ids: Optional[set] = None,
+    ) -> List[Tuple[int, str]]:
+        """Parse a batch translation response into `results`.
+
+        Ids that came from well-formed JSON are added to `parsed_ids` when given.
+        Returns the (id, text) pairs that could not be parsed and still need translating.
+        """
+        import json
+        content = content.strip()
+        parsed = None
+        try:
+            parsed = json.loads(content)
+            if not isinstance(parsed, list):
+                parsed = None
+        except Exception:
+            parsed = None
+
+        if parsed:
+            # map back to indices
+            for item in parsed:
+                try:
+                    item_id = int(item.get("id"))
+                    translation = item.get("translation") or item.get("text") or ""
+                    results[item_id] = translation
+                    if parsed_ids is not None and translation:
+                        parsed_ids.add(item_id)
+                except Exception:
+                    continue
+        else:
+            # Fallback: try splitting lines and heuristics
+            lines = [l.strip() for l in content.splitlines() if l.strip()]
+            for line, (idx, _) in zip(lines, chunk):
+                # naive assignment — better to fallback to single translations
+                results[idx] = line
+
+        return [(idx, raw_text) for idx, raw_text in chunk if results[idx] is None]
+
+    @staticmethod
+    def _pending_translations(texts: List[str], results: List[Optional[str]]) -> List[Tuple[int, str]]:
+        """Fill results for English and cached texts; return the (idx, text) pairs still to translate."""
+        candidates = []
+        for idx, t in enumerate(texts):
+            if _is_confident_english(detect_language(t)):
+                results[idx] = t
+            else:
+                candidates.append((idx, t))
+
+        cached = TranslationCache.get_many([t for _, t in candidates]) if CACHE_AVAILABLE else [None] * len(candidates)
+        pending = []
+        for (idx, t), translation in zip(candidates, cached):
+            if translation is not None:
+                results[idx] = translation
+            else:
+                pending.append((idx, t))
+        return pending
+
+    @staticmethod
+    def _store_translations(chunk: List[Tuple[int, str]], parsed_ids: set, results: List[Optional[str]]):
+        """Write the JSON-parsed translations of a chunk to the TranslationCache.
+
+        Line-split fallbacks are not cached; a misaligned guess would otherwise live for the full TTL.
+        """
+        if not CACHE_AVAILABLE:
+            return
+        TranslationCache.set_many([(t, results[idx]) for idx, t in chunk if idx in parsed_ids])
+
     def _translate_batch(self, texts: list, chunk_size: int = 8) -> list:
         """Translate a list of texts in as few calls as possible using Groq.
 
-        - Checks cache (MessageCache) for already-translated inputs and uses those.
+        - Skips confidently English inputs and reuses TranslationCache hits.
         - Sends inputs in chunks to avoid token limits.
         - Attempts to parse a JSON array [{"id":0,"translation":"..."}, ...] from the model.
         - Falls back to per-item translate if the model output can't be parsed.
@@ -119,78 +570,26 @@ Translation:"""
         # Results array in original order
         results = [None] * len(texts)
 
-        # Prepare list of items that need translation (skip cache hits)
-        to_translate = []  # list of (idx, text)
-        for idx, t in enumerate(texts):
-            if CACHE_AVAILABLE:
-                cached = MessageCache.get_cached_emotion_analysis(t)
-                if cached and cached.get("processed_text"):
-                    results[idx] = cached.get("processed_text")
-                    continue
-            to_translate.append((idx, t))
-
-        # Helper to parse expected JSON output from model
-        def _parse_json_output(content: str):
-            import json
-            try:
-                parsed = json.loads(content)
-                if isinstance(parsed, list):
-                    return parsed
-            except Exception:
-                return None
-            return None
+        # Prepare list of items that need translation (skip English and cache hits)
+        to_translate = self._pending_translations(texts, results)
 
         # Chunk the untranslated items and call the model
         for start in range(0, len(to_translate), chunk_size):
             chunk = to_translate[start:start + chunk_size]
-            ids = [i for (i, _) in chunk]
-            chunk_texts = [t for (_, t) in chunk]
-
-            # Build a structured prompt asking for JSON output
-            items_block = "\n".join([f"{i}: {t}" for i, t in zip(ids, chunk_texts)])
-            prompt = (
-                "Translate the following texts to English preserving the EXACT emotional intensity, "
-                "informal tone (slang stays slang) and punctuation. Return EXACTLY valid JSON: "
-                "[{\"id\":<id>, \"translation\": \"...\"}, ...] with the original ids.\n\n"
-                f"Texts:\n{items_block}\n\nJSON:"
-            )
-
             try:
                 resp = self.groq_client.chat.completions.create(
-                    messages=[
-                        {"role": "system", "content": "You are a precise Filipino-English translator, keep emotional intensity and informal language exactly."},
-                        {"role": "user", "content": prompt}
-                    ],
+                    messages=self._batch_translation_messages(chunk),
                     model=self.groq_model,
                     temperature=0.1,
                     max_tokens=2000
                 )
-
-                content = resp.choices[0].message.content.strip()
-
-                parsed = _parse_json_output(content)
-                if parsed:
-                    # map back to indices
-                    for item in parsed:
-                        try:
-                            item_id = int(item.get("id"))
-                            translation = item.get("translation") or item.get("text") or ""
-                            results[item_id] = translation
-                        except Exception:
-                            continue
-                else:
-                    # Fallback: try splitting lines and heuristics
-                    lines = [l.strip() for l in content.splitlines() if l.strip()]
-                    for line, (idx, _) in zip(lines, chunk):
-                        # naive assignment — better to fallback to single translations
-                        results[idx] = line
+                parsed_ids = set()
+                missing = self._apply_batch_translation(resp.choices[0].message.content, chunk, results, parsed_ids)
+                self._store_translations(chunk, parsed_ids, results)
 
                 # If some results were not parsed, fallback to per-item translation for those
-                missing = [i for i, r in zip(ids, [results[i] for i in ids]) if r is None]
-                if missing:
-                    for mi in missing:
-                        _, raw_text = next(filter(lambda x: x[0] == mi, chunk))
-                        results[mi] = self._translate_text(raw_text)
+                for mi, raw_text in missing:
+                    results[mi] = self._translate_text(raw_text)
 
             except Exception as e:
                 # On failure, try per-item translation to be safe
@@ -205,19 +604,32 @@ Translation:"""
 
         return results
 
-    def get_embedding(self, text: str, translate_if_needed: bool = True) -> List[float]:
+    def get_embedding(
+        self,
+        text: str,
+        translate_if_needed: bool = True,
+        context: Optional[EmotionAnalysisContext] = None,
+    ) -> List[float]:
         """Generate emotion embedding for the input text.
         
         Args:
             text: Input text to analyze
             translate_if_needed: Whether to translate non-English text
+            context: Optional request-scoped memo; reused and filled in when given
             
         Returns:
             List of emotion probabilities corresponding to different emotions
         """
+        if context is not None:
+            if context.embedding is None:
+                context.embedding = self.get_embedding(text, translate_if_needed)
+            return context.embedding
+
         # Check cache first
         if CACHE_AVAILABLE:
-            cached_emotion = MessageCache.get_cached_emotion_analysis(text)
+            cached_emotion = MessageCache.get_cached_emotion_analysis(
+                text, EMOTION_MODEL_VERSION, EMBEDDING_CACHE_MODE, read_through=False
+            )
             if cached_emotion and 'vector' in cached_emotion:
                 print(f"✅ Cache hit for emotion embedding")
                 return cached_emotion['vector']
@@ -227,62 +639,11 @@ Translation:"""
             processed_text = self._translate_text(text)
         
         try:
-            # Use the new client syntax for text classification
-            api_response = self.hf_client.text_classification(
-                text=processed_text,
-                model=self.model_name
-            )
-            
-            # The API returns a list of dicts. We need to process them.
-            scores_dict = {item['label'].lower(): item['score'] for item in api_response}
-            
-            # Reorder scores to match self.label_names
-            embedding = [scores_dict.get(label, 0.0) for label in self.label_names]
-            
-            # Handle class imbalance: boost underrepresented emotions (AGGRESSIVE)
-            if 'disgust' in self.label_names:
-                disgust_idx = self.label_names.index('disgust')
-                embedding[disgust_idx] = min(1.0, embedding[disgust_idx] * 1.5)  # Boost by 50%
-            
-            if 'fear' in self.label_names:
-                fear_idx = self.label_names.index('fear')
-                embedding[fear_idx] = min(1.0, embedding[fear_idx] * 1.3)  # Boost by 30%
-            
-            if 'surprise' in self.label_names:
-                surprise_idx = self.label_names.index('surprise')
-                embedding[surprise_idx] = min(1.0, embedding[surprise_idx] * 1.25)  # Boost by 25%
-            
-            # Slightly boost anger and sadness too
-            if 'anger' in self.label_names:
-                anger_idx = self.label_names.index('anger')
-                embedding[anger_idx] = min(1.0, embedding[anger_idx] * 1.1)  # Boost by 10%
-            
-            if 'sadness' in self.label_names:
-                sadness_idx = self.label_names.index('sadness')
-                embedding[sadness_idx] = min(1.0, embedding[sadness_idx] * 1.1)  # Boost by 10%
-            
-            # Apply stronger penalty to over-predicted classes
-            if 'neutral' in self.label_names:
-                neutral_idx = self.label_names.index('neutral')
-                embedding[neutral_idx] = max(0, embedding[neutral_idx] * 0.8)  # Reduce by 20%
-            
-            if 'joy' in self.label_names:
-                joy_idx = self.label_names.index('joy')
-                embedding[joy_idx] = max(0, embedding[joy_idx] * 0.9)  # Reduce by 10%
-            
-            # Renormalize to ensure valid probability distribution
-            total = sum(embedding)
-            if total > 0:
-                embedding = [score / total for score in embedding]
+            scores_dict = self._classify(processed_text)
+            embedding = self._reweight(scores_dict)
             
             # Cache the result
-            if CACHE_AVAILABLE:
-                emotion_data = {
-                    'vector': embedding,
-                    'labels': {label: score for label, score in zip(self.label_names, embedding)},
-                    'top': self.label_names[embedding.index(max(embedding))]
-                }
-                MessageCache.cache_emotion_analysis(text, emotion_data)
+            if self._cache_embedding(text, embedding):
                 print(f"💾 Cached emotion embedding")
             
             return embedding
@@ -290,21 +651,62 @@ Translation:"""
             print(f"Emotion embedding error: {e}")
             return [0.0] * len(self.label_names)
 
-    def get_emotion_scores(self, text: str, translate_if_needed: bool = True) -> Dict[str, float]:
+    def _cache_embedding(self, text: str, embedding: List[float]) -> bool:
+        """Store a bare classifier vector in Redis under the EMBEDDING_CACHE_MODE key.
+
+        Kept apart from full analyses so it is never served as one, and not persisted.
+        """
+        if not CACHE_AVAILABLE:
+            return False
+        emotion_data = {
+            'vector': embedding,
+            'labels': {label: score for label, score in zip(self.label_names, embedding)},
+            'top': self.label_names[embedding.index(max(embedding))]
+        }
+        return MessageCache.cache_emotion_analysis(
+            text, emotion_data, EMOTION_MODEL_VERSION, EMBEDDING_CACHE_MODE, durable=False
+        )
+
+    def get_emotion_scores(
+        self,
+        text: str,
+        translate_if_needed: bool = True,
+        context: Optional[EmotionAnalysisContext] = None,
+    ) -> Dict[str, float]:
         """Get emotion scores with their labels, enhanced with Filipino keyword detection.
         
         Args:
             text: Input text to analyze
             translate_if_needed: Whether to translate non-English text
+            context: Optional request-scoped memo; reused and filled in when given
             
         Returns:
             Dictionary mapping emotion labels to their probabilities
         """
-        embedding = self.get_embedding(text, translate_if_needed)
+        if context is not None and context.scores is not None:
+            return context.scores
+
+        embedding = self.get_embedding(text, translate_if_needed, context=context)
+        if context is None:
+            return self._apply_keyword_boosts(embedding, text)
+
+        if context.keyword_boosts is None:
+            context.keyword_boosts = self._detect_filipino_emotion_keywords(text)
+        context.scores = self._apply_keyword_boosts(embedding, text, context.keyword_boosts)
+        return context.scores
+
+    def _apply_keyword_boosts(
+        self,
+        embedding: List[float],
+        text: str,
+        keyword_boosts: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, float]:
+        """Combine a classifier vector with Filipino keyword boosts into renormalized scores."""
         scores = {label: score for label, score in zip(self.label_names, embedding)}
         
         # Apply Filipino keyword boosts
-        keyword_boosts = self._detect_filipino_emotion_keywords(text)
+        if keyword_boosts is None:
+            keyword_boosts = self._detect_filipino_emotion_keywords(text)
         for emotion, boost in keyword_boosts.items():
             if emotion in scores and boost > 0:
                 scores[emotion] = min(1.0, scores[emotion] + boost)
@@ -332,31 +734,81 @@ Translation:"""
         dominant_emotion = max(scores.items(), key=lambda x: x[1])
         return dominant_emotion
 
-    def analyze_text_full(self, text: str, translate_if_needed: bool = True) -> Dict:
-        """Get complete emotion analysis for text, using LLM fallback for dominant emotion if needed."""
+    def analyze_text_full(
+        self,
+        text: str,
+        translate_if_needed: bool = True,
+        context: Optional[EmotionAnalysisContext] = None,
+        mode: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None,
+    ) -> Dict:
+        """Get complete emotion analysis for text, using LLM fallback for dominant emotion if needed.
+
+        Pass an EmotionAnalysisContext to share the translation, classifier vector and
+        keyword boosts with later stages (e.g. interpretation()). `mode` and
+        `latency_budget_ms` are forwarded to get_final_emotion; the tier that produced
+        the label is returned as "answered_by". In cascade mode a decisive lexicon
+        match is answered before translation and classification: "emotion_scores" is
+        the keyword distribution and "embedding" is None, since no classifier vector
+        was computed.
+        """
+        mode = (mode or EMOTION_ANALYSIS_MODE).lower()
         # Check cache first for complete analysis
-        if CACHE_AVAILABLE:
-            cached_emotion = MessageCache.get_cached_emotion_analysis(text)
-            if cached_emotion and 'vector' in cached_emotion and 'labels' in cached_emotion:
-                print(f"✅ Cache hit for full emotion analysis")
-                return {
+        cached_result = self._cached_full_analysis(text, mode)
+        if cached_result is not None:
+            print(f"✅ Cache hit for full emotion analysis")
+            if mode == "cascade":
+                _record_cascade_tier("cache")
+            return cached_result
+        
+        if context is None:
+            context = EmotionAnalysisContext(text)
+
+        if context.language is None:
+            context.language = detect_language(text)
+
+        # Cascade tier 1 needs neither translation nor the classifier
+        if mode == "cascade":
+            lexicon_boosts = self._detect_filipino_emotion_keywords(text)
+            lexicon_label = self._lexicon_decision(lexicon_boosts)
+            if lexicon_label:
+                context.answered_by = "lexicon"
+                _record_cascade_tier("lexicon")
+                total = sum(max(0.0, boost) for boost in lexicon_boosts.values())
+                scores = {label: max(0.0, lexicon_boosts.get(label, 0.0)) / total for label in self.label_names}
+                result = {
                     "original_text": text,
-                    "processed_text": cached_emotion.get("processed_text"),
-                    "embedding": cached_emotion['vector'],
-                    "emotion_scores": cached_emotion['labels'],
-                    "dominant_emotion": cached_emotion['top'],
-                    "dominant_score": cached_emotion['labels'].get(cached_emotion['top'], 0.0)
+                    "processed_text": None,
+                    # Keyword scores are not a classifier vector; keep them out of the
+                    # emotion similarity space
+                    "embedding": None,
+                    "emotion_scores": scores,
+                    "dominant_emotion": lexicon_label,
+                    "dominant_score": scores[lexicon_label],
+                    "answered_by": context.answered_by,
+                    "language": context.language
                 }
-        
-        processed_text = text
-        if translate_if_needed:
-            processed_text = self._translate_text(text)
+                if self._cache_full_analysis(text, result, mode):
+                    print(f"💾 Cached full emotion analysis")
+                return result
+
+        if context.processed_text is None:
+            context.processed_text = (
+                self._translate_text(text, context.language) if translate_if_needed else text
+            )
+        processed_text = context.processed_text
+
+        # Start the LLM ensemble vote now so it overlaps with classification
+        if mode == "ensemble" and EMOTION_ENSEMBLE_CONCURRENT:
+            self._ensure_llm_vote(processed_text, context)
 
-        embedding = self.get_embedding(processed_text, translate_if_needed=False)  # Already processed
+        # Use get_final_emotion for robust dominant emotion (LLM fallback); it classifies
+        # only when its mode needs the classifier, memoizing the vector on the context
+        dominant_emotion = self.get_final_emotion(
+            processed_text, context=context, mode=mode, latency_budget_ms=latency_budget_ms
+        )
+        embedding = self.get_embedding(processed_text, translate_if_needed=False, context=context)  # Already processed
         scores = {label: score for label, score in zip(self.label_names, embedding)}
-        
-        # Use get_final_emotion for robust dominant emotion (LLM fallback)
-        dominant_emotion = self.get_final_emotion(processed_text)
         dominant_score = scores.get(dominant_emotion, 0.0)
 
         result = {
@@ -365,27 +817,132 @@ Translation:"""
             "embedding": embedding,
             "emotion_scores": scores,
             "dominant_emotion": dominant_emotion,
-            "dominant_score": dominant_score
+            "dominant_score": dominant_score,
+            "answered_by": context.answered_by,
+            "language": context.language
         }
         
         # Cache the complete analysis
-        if CACHE_AVAILABLE:
-            cache_data = {
-                'vector': embedding,
-                'labels': scores,
-                'top': dominant_emotion,
-                'processed_text': processed_text if processed_text != text else None
-            }
-            MessageCache.cache_emotion_analysis(text, cache_data)
+        if self._cache_full_analysis(text, result, mode):
             print(f"💾 Cached full emotion analysis")
         
         return result
 
-    def analyze_texts_full(self, texts: list, translate_if_needed: bool = True) -> list:
+    @staticmethod
+    def _cached_full_analysis(
+        text: str, pipeline_mode: Optional[str] = None, read_through: bool = True
+    ) -> Optional[Dict]:
+        """Return a full analysis result rebuilt from the emotion cache, or None on a miss.
+
+        Redis is checked first, then (with read_through) the durable store for
+        (EMOTION_MODEL_VERSION, pipeline_mode).
+        """
+        if not CACHE_AVAILABLE:
+            return None
+        cached_emotion = MessageCache.get_cached_emotion_analysis(
+            text, EMOTION_MODEL_VERSION, (pipeline_mode or EMOTION_ANALYSIS_MODE).lower(), read_through
+        )
+        return EmotionEmbedder._full_analysis_from_cache(text, cached_emotion)
+
+    @staticmethod
+    async def _acached_full_analysis(text: str, pipeline_mode: Optional[str] = None) -> Optional[Dict]:
+        """Async variant of _cached_full_analysis; the durable store is read in a worker thread."""
+        if not CACHE_AVAILABLE:
+            return None
+        pipeline_mode = (pipeline_mode or EMOTION_ANALYSIS_MODE).lower()
+        cached_emotion = MessageCache.get_cached_emotion_analysis(
+            text, EMOTION_MODEL_VERSION, pipeline_mode, read_through=False
+        )
+        if cached_emotion is None:
+            cached_emotion = await asyncio.to_thread(
+                MessageCache.get_stored_emotion_analysis, text, EMOTION_MODEL_VERSION, pipeline_mode
+            )
+        return EmotionEmbedder._full_analysis_from_cache(text, cached_emotion)
+
+    @staticmethod
+    def _full_analysis_from_cache(text: str, cached_emotion: Optional[Dict]) -> Optional[Dict]:
+        """Shape a cached emotion_data entry as an analyze_text_full result."""
+        if not cached_emotion or 'vector' not in cached_emotion or 'labels' not in cached_emotion:
+            return None
+        # Never serve an unversioned entry or one written by an older pipeline
+        if cached_emotion.get('model_version') != EMOTION_MODEL_VERSION:
+            return None
+        return {
+            "original_text": text,
+            "processed_text": cached_emotion.get("processed_text"),
+            "embedding": cached_emotion['vector'],
+            "emotion_scores": cached_emotion['labels'],
+            "dominant_emotion": cached_emotion.get('top'),
+            "dominant_score": cached_emotion['labels'].get(cached_emotion.get('top'), 0.0),
+            "interpretation": cached_emotion.get("interpretation"),
+            "answered_by": "cache",
+            "language": detect_language(text)
+        }
+
+    @staticmethod
+    def _cache_full_analysis(text: str, result: Dict, pipeline_mode: Optional[str] = None) -> bool:
+        """Store the cacheable part of a full analysis result under the text's emotion key
+        and queue it for the durable store."""
+        if not CACHE_AVAILABLE:
+            return False
+        cache_data = {
+            'vector': result["embedding"],
+            'labels': result["emotion_scores"],
+            'top': result["dominant_emotion"],
+            'processed_text': result.get("processed_text"),
+        }
+        if result.get("interpretation"):
+            cache_data['interpretation'] = result["interpretation"]
+        return MessageCache.cache_emotion_analysis(
+            text,
+            cache_data,
+            model_version=EMOTION_MODEL_VERSION,
+            pipeline_mode=(pipeline_mode or EMOTION_ANALYSIS_MODE).lower(),
+        )
+
+    def _build_batch_result(
+        self,
+        text: str,
+        processed_text: str,
+        embedding: List[float],
+        llm_emotion: Optional[str],
+        keyword_boosts: Optional[Dict[str, float]] = None,
+    ) -> Dict:
+        """Assemble one analyze_texts_full item from its classifier vector and LLM vote."""
+        scores = {label: score for label, score in zip(self.label_names, embedding)}
+        boosted = self._apply_keyword_boosts(embedding, processed_text, keyword_boosts)
+        top_emotion, top_score = max(boosted.items(), key=lambda x: x[1])
+        dominant_emotion = self._combine_votes(top_emotion, top_score, llm_emotion)
+        return {
+            "original_text": text,
+            "processed_text": processed_text if processed_text != text else None,
+            "embedding": embedding,
+            "emotion_scores": scores,
+            "dominant_emotion": dominant_emotion,
+            "dominant_score": scores.get(dominant_emotion, 0.0),
+            "answered_by": "llm" if llm_emotion else "classifier",
+            "language": detect_language(text)
+        }
+
+    def _failed_analysis(self, text: str) -> Dict:
+        """Neutral placeholder result for a text whose analysis failed."""
+        return {
+            "original_text": text,
+            "processed_text": None,
+            "embedding": [0.0] * len(self.label_names),
+            "emotion_scores": {label: 0.0 for label in self.label_names},
+            "dominant_emotion": "neutral",
+            "dominant_score": 0.0,
+            "interpretation": "Unable to analyze emotions for this text."
+        }
+
+    def analyze_texts_full(self, texts: list, translate_if_needed: bool = True, batch_size: Optional[int] = None) -> list:
         """Analyze multiple texts in one call.
 
         - Performs batched translation for all texts that need it.
         - Reuses cache when available.
+        - Classifies and LLM-verifies texts in chunks of at most `batch_size`
+          (defaults to EMOTION_MAX_BATCH_SIZE), one request of each kind per chunk.
         - Returns a list of analysis dicts (same shape as analyze_text_full result) in input order.
         """
         # Output list
@@ -397,19 +954,11 @@ Translation:"""
 
         # Check cache first
         for i, t in enumerate(texts):
-            if CACHE_AVAILABLE:
-                cached = MessageCache.get_cached_emotion_analysis(t)
-                if cached and 'vector' in cached and 'labels' in cached:
-                    print(f"✅ Cache hit for full emotion analysis (batch) for index {i}")
-                    results[i] = {
-                        "original_text": t,
-                        "processed_text": cached.get('processed_text'),
-                        "embedding": cached['vector'],
-                        "emotion_scores": cached['labels'],
-                        "dominant_emotion": cached.get('top'),
-                        "dominant_score": cached['labels'].get(cached.get('top'), 0.0)
-                    }
-                    continue
+            cached_result = self._cached_full_analysis(t, "batch")
+            if cached_result is not None:
+                print(f"✅ Cache hit for full emotion analysis (batch) for index {i}")
+                results[i] = cached_result
+                continue
             to_process_idx.append(i)
             to_process_texts.append(t)
 
@@ -422,118 +971,101 @@ Translation:"""
             processed_texts = self._translate_batch(to_process_texts)
         else:
             processed_texts = list(to_process_texts)
-
-        # Generate embeddings and analysis per item
-        for local_idx, processed_text in enumerate(processed_texts):
-            i = to_process_idx[local_idx]
+        keyword_boosts = self._detect_filipino_emotion_keywords_batch(processed_texts)
+
+        # Classify and verify chunk by chunk: one classifier request and one LLM
+        # request per chunk instead of one of each per text
+        max_batch = max(1, batch_size or EMOTION_MAX_BATCH_SIZE)
+        computed = []  # (index, result) pairs awaiting interpretation
+        for start in range(0, len(processed_texts), max_batch):
+            chunk_idx = to_process_idx[start:start + max_batch]
+            chunk_texts = processed_texts[start:start + max_batch]
+            chunk_boosts = keyword_boosts[start:start + max_batch]
             try:
-                embedding = self.get_embedding(processed_text, translate_if_needed=False)
-                scores = {label: score for label, score in zip(self.label_names, embedding)}
-                dominant_emotion = self.get_final_emotion(processed_text)
-                dominant_score = scores.get(dominant_emotion, 0.0)
-
-                # Generate interpretation (may call Groq per-item)
-                interp = interpretation({"emotion_scores": scores}, dominant_emotion)
-
-                result = {
-                    "original_text": texts[i],
-                    "processed_text": processed_text if processed_text != texts[i] else None,
-                    "embedding": embedding,
-                    "emotion_scores": scores,
-                    "dominant_emotion": dominant_emotion,
-                    "dominant_score": dominant_score,
-                    "interpretation": interp
-                }
-
-                # Cache it
-                if CACHE_AVAILABLE:
-                    cache_data = {
-                        'vector': embedding,
-                        'labels': scores,
-                        'top': dominant_emotion,
-                        'processed_text': processed_text if processed_text != texts[i] else None
-                    }
-                    MessageCache.cache_emotion_analysis(texts[i], cache_data)
-
-                results[i] = result
-
+                embeddings = self._reweight_batch(self._classify_batch(chunk_texts))
+                llm_emotions = self._get_llm_emotions_batch(
+                    chunk_texts, [dict(zip(self.label_names, e)) for e in embeddings]
+                )
             except Exception as e:
-                print(f"Batch analysis failed at index {i}: {e}")
-                results[i] = {
-                    "original_text": texts[i],
-                    "processed_text": None,
-                    "embedding": [0.0] * len(self.label_names),
-                    "emotion_scores": {label: 0.0 for label in self.label_names},
-                    "dominant_emotion": "neutral",
-                    "dominant_score": 0.0,
-                    "interpretation": "Unable to analyze emotions for this text."
-                }
+                print(f"Batch analysis failed for indices {chunk_idx}: {e}")
+                for i in chunk_idx:
+                    results[i] = self._failed_analysis(texts[i])
+                continue
+
+            for i, processed_text, embedding, llm_emotion, boosts in zip(
+                chunk_idx, chunk_texts, embeddings, llm_emotions, chunk_boosts
+            ):
+                try:
+                    computed.append((i, self._build_batch_result(texts[i], processed_text, embedding, llm_emotion, boosts)))
+                except Exception as e:
+                    print(f"Batch analysis failed at index {i}: {e}")
+                    results[i] = self._failed_analysis(texts[i])
+
+        # One interpretation completion per EMOTION_INTERPRETATION_BATCH_SIZE texts
+        interpretations = interpretations_batch([result for _, result in computed])
+        for (i, result), interp in zip(computed, interpretations):
+            result["interpretation"] = interp
+            self._cache_full_analysis(texts[i], result, "batch")
+            results[i] = result
 
         return results
 
     def _detect_filipino_emotion_keywords(self, text: str) -> Dict[str, float]:
         """Detect Filipino emotion keywords and boost corresponding emotions."""
-        text_lower = text.lower()
-        
-        keyword_boosts = {
-            'anger': 0.0,
-            'disgust': 0.0,
-            'fear': 0.0,
-            'joy': 0.0,
-            'neutral': 0.0,
-            'sadness': 0.0,
-            'surprise': 0.0
-        }
-        
-        # Anger keywords
-        anger_words = ['galit', 'inis', 'badtrip', 'nakakainis', 'nakakagalit', 'hassle', 
-                       'kainis', 'tangina', 'putang', 'gago', 'bobo']
-        for word in anger_words:
-            if word in text_lower:
-                keyword_boosts['anger'] += 0.15
-        
-        # Joy keywords
-        joy_words = ['masaya', 'happy', 'saya', 'love', 'haha', 'yay', 'yey', 
-                     'nice', 'astig', 'galing', 'enjoy']
-        for word in joy_words:
-            if word in text_lower:
-                keyword_boosts['joy'] += 0.15
-        
-        # Sadness keywords  
-        sad_words = ['lungkot', 'malungkot', 'sad', 'nakakalungkot', 'saklap', 
-                     'hirap', 'kawawa', 'huhu', 'hay']
-        for word in sad_words:
-            if word in text_lower:
-                keyword_boosts['sadness'] += 0.15
-        
-        # Fear keywords
-        fear_words = ['takot', 'scary', 'worried', 'kinakabahan', 'nervous', 
-                      'delikado', 'danger']
-        for word in fear_words:
-            if word in text_lower:
-                keyword_boosts['fear'] += 0.15
-        
-        # Disgust keywords
-        disgust_words = ['kadiri', 'yuck', 'eww', 'gross', 'diri']
-        for word in disgust_words:
-            if word in text_lower:
-                keyword_boosts['disgust'] += 0.2  # Extra boost for rare emotion
-        
-        # Surprise keywords
-        surprise_words = ['gulat', 'wow', 'omg', 'grabe', 'wtf', 'whoa']
-        for word in surprise_words:
-            if word in text_lower:
-                keyword_boosts['surprise'] += 0.15
-        
-        return keyword_boosts
+        return self._detect_filipino_emotion_keywords_batch([text])[0]
+
+    def _detect_filipino_emotion_keywords_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Keyword boosts for several texts from a single scan of the compiled lexicon."""
+        boosts = []
+        for scored in get_emotion_lexicon().score_batch(texts):
+            keyword_boosts = {label: 0.0 for label in self.label_names}
+            for emotion, boost in scored.items():
+                if emotion in keyword_boosts:
+                    keyword_boosts[emotion] = boost
+            boosts.append(keyword_boosts)
+        return boosts
     
-    def _get_llm_emotion_direct(self, text: str) -> str:
-        """Get emotion prediction directly from LLM without classifier - optimized for Filipino/Taglish."""
-        if not self.groq_client or not self.groq_model:
+    def _ensure_llm_vote(
+        self,
+        text: str,
+        context: Optional[EmotionAnalysisContext] = None,
+        deadline: Optional[float] = None,
+    ) -> Tuple[Optional[Future], float]:
+        """Start (or reuse the context's) background LLM vote for text.
+
+        Returns the future and the monotonic time by which it must have completed.
+        """
+        if context is not None and context.llm_future is not None:
+            return context.llm_future, context.llm_deadline_at
+
+        deadline = EMOTION_LLM_DEADLINE_SECONDS if deadline is None else deadline
+        deadline_at = time.monotonic() + deadline
+        future = None
+        if self.groq_client and self.groq_model:
+            future = _ensemble_executor.submit(self._get_llm_emotion_direct, text, deadline)
+
+        if context is not None:
+            context.llm_future = future
+            context.llm_deadline_at = deadline_at
+        return future, deadline_at
+
+    def _await_llm_vote(self, future: Optional[Future], deadline_at: float) -> Optional[str]:
+        """Wait for a background LLM vote until its deadline; None if missed or failed."""
+        if future is None:
             return None
-        
         try:
-            prompt = f"""You are an expert at detecting emotions in Filipino/Taglish social media text.
+            return future.result(timeout=max(0.0, deadline_at - time.monotonic()))
+        except FuturesTimeoutError:
+            future.cancel()
+            print("LLM emotion vote missed its deadline, using classifier answer")
+        except Exception as e:
+            print(f"LLM emotion vote failed: {e}")
+        return None
+
+    @staticmethod
+    def _llm_direct_prompt(text: str) -> str:
+        """Single-text emotion labelling prompt for the LLM ensemble vote."""
+        prompt = f"""You are an expert at detecting emotions in Filipino/Taglish social media text.
 
 Text: "{text}"
 
@@ -555,74 +1087,281 @@ Choose EXACTLY ONE emotion from these 7 options:
 - surprise (gulat, wow): shock, amazement
 
 Answer with ONLY the emotion label (lowercase, one word):"""
-            
+        return prompt
+
+    def _parse_llm_label(self, content: str) -> Optional[str]:
+        """Normalize an LLM label answer; None if it is not one of our labels."""
+        llm_label = content.strip().lower()
+        # Clean up response
+        llm_label = llm_label.replace('.', '').replace(',', '').replace('!', '').strip()
+        return llm_label if llm_label in self.label_names else None
+
+    def _get_llm_emotion_direct(self, text: str, timeout: Optional[float] = None) -> str:
+        """Get emotion prediction directly from LLM without classifier - optimized for Filipino/Taglish."""
+        if not self.groq_client or not self.groq_model:
+            return None
+        
+        try:
             response = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
+                messages=[{"role": "user", "content": self._llm_direct_prompt(text)}],
                 model=self.groq_model,
                 temperature=0.1,  # Lower for consistency
-                max_tokens=15
+                max_tokens=15,
+                **({"timeout": timeout} if timeout is not None else {})
             )
-            llm_label = response.choices[0].message.content.strip().lower()
-            
-            # Clean up response
-            llm_label = llm_label.replace('.', '').replace(',', '').replace('!', '').strip()
-            
             # Validate the label
-            if llm_label in self.label_names:
-                return llm_label
+            return self._parse_llm_label(response.choices[0].message.content)
         except Exception as e:
             print(f"LLM direct prediction failed: {e}")
         
         return None
-    
-    def get_final_emotion(self, text: str, threshold: float = 0.45, use_ensemble: bool = True) -> str:
+
+    @staticmethod
+    def _format_top_k(scores: Dict[str, float], k: int = None) -> str:
+        """'anger 0.42, sadness 0.31, ...' for the k highest classifier scores."""
+        top = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k or EMOTION_VERIFY_TOP_K]
+        return ", ".join(f"{label} {score:.2f}" for label, score in top)
+
+    def _llm_batch_prompt(self, texts: List[str], classifier_scores: Optional[List[Dict[str, float]]] = None) -> str:
+        """Prompt asking the LLM to label many texts at once as JSON by id.
+
+        When classifier scores are given, each item carries the classifier's top-k
+        so the LLM verifies them instead of labelling from scratch.
+        """
+        lines = []
+        for i, t in enumerate(texts):
+            lines.append(f"{i}: {t}")
+            if classifier_scores is not None:
+                lines.append(f"   classifier: {self._format_top_k(classifier_scores[i])}")
+        items_block = "\n".join(lines)
+        classifier_note = (
+            "\nEach text lists the classifier's top guesses with confidence. Confirm them when they fit, "
+            "but override them for Taglish slang, sarcasm and Filipino humor the classifier misses.\n"
+            if classifier_scores is not None else ""
+        )
+        prompt = f"""You are an expert at detecting emotions in Filipino/Taglish social media text.
+
+For EACH text below, choose the PRIMARY emotion expressed. Consider strong emotional words
+(galit, saya, lungkot, takot), punctuation intensity (!!!, ???), ALL CAPS, sarcasm and
+Filipino humor context.
+{classifier_note}
+Choose EXACTLY ONE emotion per text from these 7 options:
+- anger (galit, inis, badtrip): frustration, irritation, rage
+- disgust (yuck, kadiri): revulsion, distaste
+- fear (takot, worried): anxiety, concern, worry
+- joy (masaya, happy): happiness, excitement, positivity
+- neutral (normal lang): factual, no strong emotion
+- sadness (malungkot, sad): sadness, disappointment
+- surprise (gulat, wow): shock, amazement
+
+Texts:
+{items_block}
+
+Return EXACTLY valid JSON: [{{"id": <id>, "emotion": "<label>"}}, ...] with the original ids.
+JSON:"""
+        return prompt
+
+    def _parse_llm_batch(self, content: str, count: int) -> List[Optional[str]]:
+        """Parse a JSON list of {"id", "emotion"} items; unparsed/invalid ids stay None."""
+        import json
+        labels: List[Optional[str]] = [None] * count
+        content = content.strip()
+        # Tolerate prose or ``` fences around the JSON array
+        start, end = content.find("["), content.rfind("]")
+        try:
+            parsed = json.loads(content[start:end + 1] if 0 <= start < end else content)
+        except Exception:
+            return labels
+        if isinstance(parsed, list):
+            for item in parsed:
+                try:
+                    item_id = int(item.get("id"))
+                    label = str(item.get("emotion", "")).strip().lower()
+                    if 0 <= item_id < count and label in self.label_names:
+                        labels[item_id] = label
+                except Exception:
+                    continue
+        return labels
+
+    def _get_llm_emotions_batch(
+        self,
+        texts: List[str],
+        classifier_scores: Optional[List[Dict[str, float]]] = None,
+    ) -> List[Optional[str]]:
+        """Get direct LLM emotion predictions for many texts with a single Groq call.
+
+        Args:
+            texts: Texts to label
+            classifier_scores: Optional per-text classifier scores; their top-k is
+                included in the prompt for verification
+
+        Returns one label (or None when unavailable/invalid) per text, in input order.
+        Items the batch answer does not cover are retried one by one.
+        """
+        if not texts:
+            return []
+        if not self.groq_client or not self.groq_model:
+            return [None] * len(texts)
+
+        try:
+            response = self.groq_client.chat.completions.create(
+                messages=[{"role": "user", "content": self._llm_batch_prompt(texts, classifier_scores)}],
+                model=self.groq_model,
+                temperature=0.1,
+                max_tokens=20 * len(texts) + 50
+            )
+        except Exception as e:
+            print(f"Batched LLM emotion prediction failed: {e}")
+            return [None] * len(texts)
+
+        labels = self._parse_llm_batch(response.choices[0].message.content, len(texts))
+        missing = [i for i, label in enumerate(labels) if label is None]
+        if missing:
+            print(f"Batched LLM answer missed {len(missing)}/{len(texts)} items, retrying them individually")
+            for i in missing:
+                labels[i] = self._get_llm_emotion_direct(texts[i])
+        return labels
+
+    def _combine_votes(self, dominant_emotion: str, dominant_score: float, llm_emotion: Optional[str]) -> str:
+        """Ensemble voting between the classifier's top label and the LLM label."""
+        if not llm_emotion or llm_emotion == dominant_emotion:
+            return dominant_emotion
+        # LLM disagrees even with high classifier confidence: trust the
+        # classifier only when it is very confident
+        if dominant_score >= 0.65:
+            return llm_emotion if dominant_score < 0.75 else dominant_emotion
+        # Medium-low confidence: prefer LLM (better at Filipino context)
+        return llm_emotion
+
+    def _lexicon_decision(self, keyword_boosts: Dict[str, float]) -> Optional[str]:
+        """Return the lexicon label when keyword evidence alone is decisive, else None."""
+        ranked = sorted(keyword_boosts.items(), key=lambda x: x[1], reverse=True)
+        if not ranked or ranked[0][1] < EMOTION_CASCADE_LEXICON_MIN:
+            return None
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        # Require a clear winner: at least twice the evidence of any other emotion
+        if ranked[0][1] < 2 * runner_up:
+            return None
+        return ranked[0][0]
+
+    def _get_cascade_emotion(
+        self,
+        text: str,
+        context: Optional[EmotionAnalysisContext] = None,
+        latency_budget_ms: Optional[float] = None,
+    ) -> str:
+        """Tiered cascade: keyword lexicon, then classifier, then LLM.
+
+        The LLM is only consulted when the classifier's top score is below
+        EMOTION_CASCADE_THRESHOLD and the expected LLM latency still fits in the
+        request's budget (default EMOTION_CASCADE_BUDGET_MS). The answering tier is
+        stored on the context and counted in get_cascade_metrics().
+        """
+        # Translation and anything else done for this request count against the budget
+        started = context.started_at if context is not None else time.monotonic()
+        budget_ms = EMOTION_CASCADE_BUDGET_MS if latency_budget_ms is None else latency_budget_ms
+
+        def _answer(label: str, tier: str, llm_latency_ms: Optional[float] = None) -> str:
+            if context is not None:
+                context.answered_by = tier
+            _record_cascade_tier(tier, llm_latency_ms)
+            return label
+
+        # Tier 1: Filipino keyword lexicon on the untranslated text
+        lexicon_text = context.text if context is not None else text
+        lexicon_label = self._lexicon_decision(self._detect_filipino_emotion_keywords(lexicon_text))
+        if lexicon_label:
+            return _answer(lexicon_label, "lexicon")
+
+        # Tier 2: classifier
+        scores = self.get_emotion_scores(text, translate_if_needed=False, context=context)
+        if not scores:
+            return _answer("neutral", "classifier")
+        dominant_emotion, dominant_score = max(scores.items(), key=lambda x: x[1])
+        if dominant_score >= EMOTION_CASCADE_THRESHOLD or not self.groq_client or not self.groq_model:
+            return _answer(dominant_emotion, "classifier")
+
+        # Tier 3: LLM, only if it is expected to finish within the remaining budget
+        remaining_ms = budget_ms - (time.monotonic() - started) * 1000
+        expected_ms = get_cascade_metrics()["llm_latency_ms_ewma"] or 0.0
+        if remaining_ms <= 0 or expected_ms > remaining_ms:
+            with _cascade_metrics_lock:
+                _cascade_metrics["llm_skipped_budget"] += 1
+            return _answer(dominant_emotion, "classifier")
+
+        llm_started = time.monotonic()
+        llm_emotion = self._get_llm_emotion_direct(text, timeout=remaining_ms / 1000)
+        llm_latency_ms = (time.monotonic() - llm_started) * 1000
+        if not llm_emotion:
+            return _answer(dominant_emotion, "classifier", llm_latency_ms)
+        return _answer(self._combine_votes(dominant_emotion, dominant_score, llm_emotion), "llm", llm_latency_ms)
+
+    def get_final_emotion(
+        self,
+        text: str,
+        threshold: float = 0.45,
+        use_ensemble: bool = True,
+        context: Optional[EmotionAnalysisContext] = None,
+        concurrent: Optional[bool] = None,
+        llm_deadline: Optional[float] = None,
+        mode: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None,
+    ) -> str:
         """
         Get final single-label emotion with AGGRESSIVE ensemble and LLM fallback.
         Uses classifier by default, but calls LLM if confidence < threshold.
         Very low threshold (0.45) means most predictions get LLM verification.
         Ensemble mode combines classifier and LLM predictions for better accuracy.
+        When a context is given, the classifier scores already computed for this
+        request are reused instead of classifying the text again.
+
+        With `concurrent` (default EMOTION_ENSEMBLE_CONCURRENT) the LLM vote runs in
+        parallel with the classifier; if it has not answered within `llm_deadline`
+        seconds (default EMOTION_LLM_DEADLINE_SECONDS) the classifier answer is used.
+
+        `mode="cascade"` (default EMOTION_ANALYSIS_MODE) replaces the ensemble with
+        the tiered cascade in _get_cascade_emotion.
         """
-        scores = self.get_emotion_scores(text, translate_if_needed=False)
+        if (mode or EMOTION_ANALYSIS_MODE).lower() == "cascade":
+            return self._get_cascade_emotion(text, context, latency_budget_ms)
+
+        if concurrent is None:
+            concurrent = EMOTION_ENSEMBLE_CONCURRENT
+
+        llm_future, deadline_at = None, 0.0
+        if use_ensemble and concurrent:
+            llm_future, deadline_at = self._ensure_llm_vote(text, context, llm_deadline)
+
+        scores = self.get_emotion_scores(text, translate_if_needed=False, context=context)
         if not scores:
             return "neutral"
         dominant_emotion, dominant_score = max(scores.items(), key=lambda x: x[1])
         
-        # High confidence - but still use ensemble for validation
-        if dominant_score >= 0.65:  # Lowered from 0.7
-            if use_ensemble:
-                llm_emotion = self._get_llm_emotion_direct(text)
-                if llm_emotion and llm_emotion != dominant_emotion:
-                    # LLM disagrees even with high classifier confidence
-                    # Use weighted voting
-                    if dominant_score < 0.75:
-                        return llm_emotion  # Trust LLM more
-                    # else trust classifier for very high confidence
-            return dominant_emotion
-        
-        # Medium-low confidence - ALWAYS use ensemble
+        # Ensemble mode: always ask the LLM and vote (see _combine_votes)
         if use_ensemble:
-            # Get LLM prediction for ensemble
-            llm_emotion = self._get_llm_emotion_direct(text)
-            
-            if llm_emotion:
-                # If both agree, return with confidence
-                if llm_emotion == dominant_emotion:
-                    return dominant_emotion
-                
-                # If they disagree, trust LLM more often
-                if dominant_score < 0.55:  # Increased from 0.6
-                    return llm_emotion
-                
-                # For close calls, prefer LLM (better at Filipino context)
-                return llm_emotion
-            
+            if concurrent:
+                llm_emotion = self._await_llm_vote(llm_future, deadline_at)
+            else:
+                llm_emotion = self._get_llm_emotion_direct(text)
+            if context is not None:
+                context.answered_by = "llm" if llm_emotion else "classifier"
+            return self._combine_votes(dominant_emotion, dominant_score, llm_emotion)
+
+        # High confidence - trust the classifier
+        if dominant_score >= 0.65:  # Lowered from 0.7
+            if context is not None:
+                context.answered_by = "classifier"
             return dominant_emotion
         
         # Low confidence - verify with LLM
-        if not self.groq_client or not self.groq_model:
-            print("Warning: Groq not available, falling back to classifier output")
-            return dominant_emotion
-
+        llm_label = self._verify_low_confidence(text, dominant_emotion, dominant_score)
+        if context is not None:
+            context.answered_by = "llm" if llm_label else "classifier"
+        return llm_label or dominant_emotion
+
+    @staticmethod
+    def _llm_check_prompt(text: str, dominant_emotion: str, dominant_score: float) -> str:
+        """Single-text verification prompt for a low-confidence classifier label."""
         check_prompt = f"""You are verifying emotion classification for Filipino/Taglish social media text.
 
 Original Text: "{text}"
@@ -650,10 +1389,17 @@ The classifier predicted "{dominant_emotion}" but confidence is low.
 What is the CORRECT emotion?
 
 Answer with ONLY ONE emotion label (lowercase):"""
-        
+        return check_prompt
+
+    def _verify_low_confidence(self, text: str, dominant_emotion: str, dominant_score: float) -> Optional[str]:
+        """Ask the LLM to verify one low-confidence label; None when it cannot answer."""
+        if not self.groq_client or not self.groq_model:
+            print("Warning: Groq not available, falling back to classifier output")
+            return None
+
         try:
             response = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": check_prompt}],
+                messages=[{"role": "user", "content": self._llm_check_prompt(text, dominant_emotion, dominant_score)}],
                 model=self.groq_model,
                 temperature=0,
                 max_tokens=10
@@ -662,12 +1408,386 @@ Answer with ONLY ONE emotion label (lowercase):"""
             # Ensure the label is valid
             if llm_label in self.label_names:
                 return llm_label
-            else:
-                print(f"LLM returned invalid label '{llm_label}', falling back to classifier.")
-                return dominant_emotion
+            print(f"LLM returned invalid label '{llm_label}', falling back to classifier.")
         except Exception as e:
             print(f"LLM check failed: {e}, falling back to classifier")
-            return dominant_emotion
+        return None
+
+    def get_final_emotions_batch(self, texts: List[str], use_ensemble: bool = True) -> List[str]:
+        """Batch variant of get_final_emotion (sequential ensemble, no cascade).
+
+        Classifies all texts in one call and verifies them with one LLM call: every
+        text in ensemble mode, only the low-confidence ones (< 0.65) otherwise.
+        Items the batched answer misses fall back to the per-text prompt.
+        """
+        if not texts:
+            return []
+        embeddings = self._reweight_batch(self._classify_batch(texts))
+        boosts = self._detect_filipino_emotion_keywords_batch(texts)
+        scores = [self._apply_keyword_boosts(e, t, b) for e, t, b in zip(embeddings, texts, boosts)]
+        top = [max(s.items(), key=lambda x: x[1]) for s in scores]
+
+        if use_ensemble:
+            llm_emotions = self._get_llm_emotions_batch(texts, scores)
+            return [self._combine_votes(label, score, llm) for (label, score), llm in zip(top, llm_emotions)]
+
+        final = [label for label, _ in top]
+        low = [i for i, (_, score) in enumerate(top) if score < 0.65]
+        if low and self.groq_client and self.groq_model:
+            verified = self._get_llm_emotions_batch([texts[i] for i in low], [scores[i] for i in low])
+            for i, label in zip(low, verified):
+                final[i] = label or final[i]
+        return final
+
+
+    # ===================== Async API =====================
+    # Same behaviour as the sync methods above, but upstream HF/Groq calls use async
+    # clients bounded by the worker-wide semaphore so they never block the event loop.
+
+    async def _agroq_chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """One AsyncGroq chat completion under the upstream semaphore; returns the content."""
+        async with _get_upstream_semaphore():
+            response = await self.async_groq_client.chat.completions.create(
+                messages=messages,
+                model=self.groq_model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **({"timeout": timeout} if timeout is not None else {})
+            )
+        return response.choices[0].message.content
+
+    async def _atranslate_text(self, text: str, detection: Optional[Dict] = None) -> str:
+        """Async variant of _translate_text."""
+        if not self.async_groq_client or not self.groq_model:
+            return text
+        if _is_confident_english(detection or detect_language(text)):
+            return text
+        cached = TranslationCache.get(text) if CACHE_AVAILABLE else None
+        if cached is not None:
+            return cached
+        try:
+            content = await self._agroq_chat(self._translation_messages(text), temperature=0.1, max_tokens=200)
+            translated = self._clean_translation(content, text)
+            if CACHE_AVAILABLE:
+                TranslationCache.set(text, translated)
+            return translated
+        except Exception as e:
+            print(f"Translation error: {e}")
+            return text
+
+    async def _atranslate_batch(self, texts: list, chunk_size: int = 8) -> list:
+        """Async variant of _translate_batch; chunks are translated concurrently."""
+        if not texts:
+            return []
+        if not self.async_groq_client or not self.groq_model:
+            return list(texts)
+
+        results = [None] * len(texts)
+        to_translate = self._pending_translations(texts, results)
+
+        async def _run_chunk(chunk):
+            try:
+                content = await self._agroq_chat(
+                    self._batch_translation_messages(chunk), temperature=0.1, max_tokens=2000
+                )
+                parsed_ids = set()
+                missing = self._apply_batch_translation(content, chunk, results, parsed_ids)
+                self._store_translations(chunk, parsed_ids, results)
+            except Exception as e:
+                print(f"Batch translation failed: {e}, falling back to per-item translations")
+                missing = chunk
+            translations = await asyncio.gather(*(self._atranslate_text(t) for _, t in missing))
+            for (idx, _), translated in zip(missing, translations):
+                results[idx] = translated
+
+        await asyncio.gather(*(
+            _run_chunk(to_translate[start:start + chunk_size])
+            for start in range(0, len(to_translate), chunk_size)
+        ))
+
+        return [r if r is not None else texts[i] for i, r in enumerate(results)]
+
+    async def _aclassify_remote_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Async multi-input HF Inference API classification (one request for all texts)."""
+        if self.hf_client is None:
+            raise RuntimeError("HF Inference API client is not configured (HF_TOKEN missing)")
+        if self._async_http is None:
+            self._async_http = httpx.AsyncClient(timeout=30)
+
+        async with _get_upstream_semaphore():
+            response = await self._async_http.post(
+                f"{HF_INFERENCE_URL}/{self.model_name}",
+                headers={"Authorization": f"Bearer {os.environ.get('HF_TOKEN')}"},
+                json={
+                    "inputs": texts if len(texts) > 1 else texts[0],
+                    "parameters": {"top_k": len(self.label_names)},
+                },
+            )
+        response.raise_for_status()
+        payload = response.json()
+        # A single input may come back as a flat list of {label, score}
+        if len(texts) == 1 and payload and isinstance(payload[0], dict):
+            payload = [payload]
+        if not (isinstance(payload, list) and len(payload) == len(texts)
+                and all(isinstance(row, list) for row in payload)):
+            raise ValueError("HF classification returned an unexpected shape")
+        return [{item['label'].lower(): item['score'] for item in row} for row in payload]
+
+    async def _aclassify_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Async variant of _classify_batch. The local model runs on the micro-batcher
+        thread (awaited without blocking the loop) or in a worker thread."""
+        if not texts:
+            return []
+        if self.backend == "local":
+            try:
+                if EMOTION_LOCAL_MICROBATCH:
+                    futures = self._local.get_microbatcher().submit_many(texts)
+                    raw = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+                    return self._map_local_labels(list(raw))
+                return await asyncio.to_thread(self._classify_local, texts)
+            except Exception as e:
+                if not self.remote_fallback:
+                    raise
+                print(f"Local emotion classifier failed: {e}, falling back to HF Inference API")
+        try:
+            return await self._aclassify_remote_batch(texts)
+        except Exception as e:
+            if len(texts) == 1:
+                raise
+            print(f"Batched HF classification failed: {e}, falling back to per-item requests")
+            rows = await asyncio.gather(*(self._aclassify_remote_batch([t]) for t in texts))
+            return [row[0] for row in rows]
+
+    async def aget_embedding(
+        self,
+        text: str,
+        translate_if_needed: bool = True,
+        context: Optional[EmotionAnalysisContext] = None,
+    ) -> List[float]:
+        """Async variant of get_embedding."""
+        if context is not None and context.embedding is not None:
+            return context.embedding
+
+        embedding = None
+        if CACHE_AVAILABLE:
+            cached_emotion = MessageCache.get_cached_emotion_analysis(
+                text, EMOTION_MODEL_VERSION, EMBEDDING_CACHE_MODE, read_through=False
+            )
+            if cached_emotion and 'vector' in cached_emotion:
+                print(f"✅ Cache hit for emotion embedding")
+                embedding = cached_emotion['vector']
+
+        if embedding is None:
+            processed_text = await self._atranslate_text(text) if translate_if_needed else text
+            try:
+                embedding = self._reweight((await self._aclassify_batch([processed_text]))[0])
+                if self._cache_embedding(text, embedding):
+                    print(f"💾 Cached emotion embedding")
+            except Exception as e:
+                print(f"Emotion embedding error: {e}")
+                return [0.0] * len(self.label_names)
+
+        if context is not None:
+            context.embedding = embedding
+        return embedding
+
+    async def _aget_llm_emotion_direct(self, text: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Async variant of _get_llm_emotion_direct."""
+        if not self.async_groq_client or not self.groq_model:
+            return None
+        try:
+            content = await self._agroq_chat(
+                [{"role": "user", "content": self._llm_direct_prompt(text)}],
+                temperature=0.1,
+                max_tokens=15,
+                timeout=timeout,
+            )
+            return self._parse_llm_label(content)
+        except Exception as e:
+            print(f"LLM direct prediction failed: {e}")
+        return None
+
+    async def _aget_llm_emotions_batch(
+        self,
+        texts: List[str],
+        classifier_scores: Optional[List[Dict[str, float]]] = None,
+    ) -> List[Optional[str]]:
+        """Async variant of _get_llm_emotions_batch."""
+        if not texts:
+            return []
+        if not self.async_groq_client or not self.groq_model:
+            return [None] * len(texts)
+        try:
+            content = await self._agroq_chat(
+                [{"role": "user", "content": self._llm_batch_prompt(texts, classifier_scores)}],
+                temperature=0.1,
+                max_tokens=20 * len(texts) + 50,
+            )
+        except Exception as e:
+            print(f"Batched LLM emotion prediction failed: {e}")
+            return [None] * len(texts)
+
+        labels = self._parse_llm_batch(content, len(texts))
+        missing = [i for i, label in enumerate(labels) if label is None]
+        if missing:
+            print(f"Batched LLM answer missed {len(missing)}/{len(texts)} items, retrying them individually")
+            retried = await asyncio.gather(*(self._aget_llm_emotion_direct(texts[i]) for i in missing))
+            for i, label in zip(missing, retried):
+                labels[i] = label
+        return labels
+
+    async def aanalyze_text_full(
+        self,
+        text: str,
+        translate_if_needed: bool = True,
+        context: Optional[EmotionAnalysisContext] = None,
+        mode: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None,
+    ) -> Dict:
+        """Async variant of analyze_text_full.
+
+        In ensemble mode with EMOTION_ENSEMBLE_CONCURRENT the classifier and the LLM
+        vote run concurrently and the vote is dropped after EMOTION_LLM_DEADLINE_SECONDS;
+        otherwise the vote runs after the classifier, as in the sync path. The cascade
+        mode decides tier by tier against a running budget and is run in a worker thread.
+        """
+        mode = (mode or EMOTION_ANALYSIS_MODE).lower()
+        if mode == "cascade":
+            return await asyncio.to_thread(
+                self.analyze_text_full, text, translate_if_needed, context, mode, latency_budget_ms
+            )
+
+        cached_result = await self._acached_full_analysis(text, mode)
+        if cached_result is not None:
+            print(f"✅ Cache hit for full emotion analysis")
+            return cached_result
+
+        if context is None:
+            context = EmotionAnalysisContext(text)
+        if context.language is None:
+            context.language = detect_language(text)
+        if context.processed_text is None:
+            context.processed_text = (
+                await self._atranslate_text(text, context.language) if translate_if_needed else text
+            )
+        processed_text = context.processed_text
+
+        llm_task = None
+        if EMOTION_ENSEMBLE_CONCURRENT:
+            deadline_at = time.monotonic() + EMOTION_LLM_DEADLINE_SECONDS
+            llm_task = asyncio.ensure_future(
+                self._aget_llm_emotion_direct(processed_text, timeout=EMOTION_LLM_DEADLINE_SECONDS)
+            )
+
+        embedding = await self.aget_embedding(processed_text, translate_if_needed=False, context=context)
+        scores = {label: score for label, score in zip(self.label_names, embedding)}
+        # Classifier vector is memoized on the context, so this makes no upstream call
+        boosted = self.get_emotion_scores(processed_text, translate_if_needed=False, context=context)
+        top_emotion, top_score = max(boosted.items(), key=lambda x: x[1])
+
+        if llm_task is None:
+            llm_emotion = await self._aget_llm_emotion_direct(processed_text)
+        else:
+            try:
+                llm_emotion = await asyncio.wait_for(llm_task, timeout=max(0.0, deadline_at - time.monotonic()))
+            except asyncio.TimeoutError:
+                print("LLM emotion vote missed its deadline, using classifier answer")
+                llm_emotion = None
+
+        context.answered_by = "llm" if llm_emotion else "classifier"
+        dominant_emotion = self._combine_votes(top_emotion, top_score, llm_emotion)
+
+        result = {
+            "original_text": text,
+            "processed_text": processed_text if processed_text != text else None,
+            "embedding": embedding,
+            "emotion_scores": scores,
+            "dominant_emotion": dominant_emotion,
+            "dominant_score": scores.get(dominant_emotion, 0.0),
+            "answered_by": context.answered_by,
+            "language": context.language
+        }
+        if self._cache_full_analysis(text, result, mode):
+            print(f"💾 Cached full emotion analysis")
+        return result
+
+    async def aanalyze_texts_full(
+        self,
+        texts: list,
+        translate_if_needed: bool = True,
+        batch_size: Optional[int] = None,
+    ) -> list:
+        """Async variant of analyze_texts_full; chunks are processed concurrently."""
+        results = [None] * len(texts)
+        to_process_idx = []
+        to_process_texts = []
+        for i, t in enumerate(texts):
+            cached_result = await self._acached_full_analysis(t, "batch")
+            if cached_result is not None:
+                print(f"✅ Cache hit for full emotion analysis (batch) for index {i}")
+                results[i] = cached_result
+                continue
+            to_process_idx.append(i)
+            to_process_texts.append(t)
+
+        if not to_process_texts:
+            return results
+
+        if translate_if_needed:
+            processed_texts = await self._atranslate_batch(to_process_texts)
+        else:
+            processed_texts = list(to_process_texts)
+        keyword_boosts = self._detect_filipino_emotion_keywords_batch(processed_texts)
+
+        async def _run_chunk(chunk_idx, chunk_texts, chunk_boosts):
+            try:
+                embeddings = self._reweight_batch(await self._aclassify_batch(chunk_texts))
+                llm_emotions = await self._aget_llm_emotions_batch(
+                    chunk_texts, [dict(zip(self.label_names, e)) for e in embeddings]
+                )
+            except Exception as e:
+                print(f"Batch analysis failed for indices {chunk_idx}: {e}")
+                for i in chunk_idx:
+                    results[i] = self._failed_analysis(texts[i])
+                return
+
+            chunk_results = []
+            for i, processed_text, embedding, llm_emotion, boosts in zip(
+                chunk_idx, chunk_texts, embeddings, llm_emotions, chunk_boosts
+            ):
+                try:
+                    chunk_results.append(
+                        (i, self._build_batch_result(texts[i], processed_text, embedding, llm_emotion, boosts))
+                    )
+                except Exception as e:
+                    print(f"Batch analysis failed at index {i}: {e}")
+                    results[i] = self._failed_analysis(texts[i])
+
+            computed.extend(chunk_results)
+
+        max_batch = max(1, batch_size or EMOTION_MAX_BATCH_SIZE)
+        computed = []
+        await asyncio.gather(*(
+            _run_chunk(
+                to_process_idx[start:start + max_batch],
+                processed_texts[start:start + max_batch],
+                keyword_boosts[start:start + max_batch],
+            )
+            for start in range(0, len(processed_texts), max_batch)
+        ))
+
+        interpretations = await ainterpretations_batch([result for _, result in computed])
+        for (i, result), interp in zip(computed, interpretations):
+            result["interpretation"] = interp
+            self._cache_full_analysis(texts[i], result, "batch")
+            results[i] = result
+        return results
 
 
 # Global instance for backward compatibility
@@ -680,16 +1800,17 @@ def get_pipeline() -> EmotionEmbedder:
         _emotion_pipeline = EmotionEmbedder()
     return _emotion_pipeline
 
-def interpretation(emotion_data, dominant_emotion: str = None) -> str:
-    """
-    Provide human-readable interpretation of emotion analysis results using Groq LLM.
-    
-    Args:
-        emotion_data: Either a dictionary of emotion scores OR full emotion analysis result
-        dominant_emotion: The dominant emotion (optional, will be calculated if not provided)
-        
-    Returns:
-        Human-readable interpretation string
+def _prepare_interpretation(
+    emotion_data,
+    dominant_emotion: str = None,
+    context: Optional[EmotionAnalysisContext] = None,
+) -> Dict:
+    """Resolve scores and build the Groq prompt for interpretation().
+
+    Returns {"error": str} when the input cannot be interpreted, otherwise
+    {"prompt": Optional[str], "facts": Optional[str], "secondary_emotions": list,
+    "fallback": str}; "prompt" and "facts" are None when there is no original text
+    to explain. "facts" is the per-item block reused by the batched prompt.
     """
     # Handle different input formats
     if isinstance(emotion_data, dict):
@@ -703,15 +1824,15 @@ def interpretation(emotion_data, dominant_emotion: str = None) -> str:
                 emotion_scores = emotion_data["emotion_scores"]
                 dominant_emotion = emotion_data.get("dominant_emotion", dominant_emotion)
             else:
-                return f"Unable to analyze emotions: {emotion_data.get('error', 'Unknown error')}"
+                return {"error": f"Unable to analyze emotions: {emotion_data.get('error', 'Unknown error')}"}
         else:
             # Assume it's just emotion scores
             emotion_scores = emotion_data
     else:
-        return "Unable to analyze emotions from the provided data."
+        return {"error": "Unable to analyze emotions from the provided data."}
     
     if not emotion_scores:
-        return "Unable to analyze emotions from the provided text."
+        return {"error": "Unable to analyze emotions from the provided text."}
     
     if not dominant_emotion:
         dominant_emotion = max(emotion_scores.items(), key=lambda x: x[1])[0]
@@ -731,17 +1852,16 @@ def interpretation(emotion_data, dominant_emotion: str = None) -> str:
     sorted_emotions = sorted(emotion_scores.items(), key=lambda x: x[1], reverse=True)
     secondary_emotions = [emotion for emotion, score in sorted_emotions[1:3] if score > 0.1]
 
-    # Get Groq client from pipeline
-    from services.emotion_pipeline import get_pipeline
-    pipeline = get_pipeline()
-    groq_client = getattr(pipeline, "groq_client", None)
-    groq_model = getattr(pipeline, "groq_model", None)
-    
     # Extract text and context information
     text = emotion_data.get("original_text") if isinstance(emotion_data, dict) and "original_text" in emotion_data else None
     user_context = emotion_data.get("user_context") if isinstance(emotion_data, dict) else None
     analysis_method = emotion_data.get("analysis_method") if isinstance(emotion_data, dict) else None
     processed_text = emotion_data.get("processed_text") if isinstance(emotion_data, dict) else None
+    keyword_boosts = None
+    if context is not None:
+        if processed_text is None and context.processed_text != context.text:
+            processed_text = context.processed_text
+        keyword_boosts = context.keyword_boosts
     
     # Build context information
     context_lines = []
@@ -754,17 +1874,23 @@ def interpretation(emotion_data, dominant_emotion: str = None) -> str:
     if secondary_emotions:
         secondary_str = ', '.join([f"{e} ({emotion_scores[e]:.2f})" for e in secondary_emotions])
         context_lines.append(f"Secondary emotions: {secondary_str}")
+    if keyword_boosts:
+        keyword_emotions = [e for e, boost in keyword_boosts.items() if boost > 0]
+        if keyword_emotions:
+            context_lines.append(f"Filipino emotion keywords matched for: {', '.join(keyword_emotions)}")
     
     context_str = "\n".join(context_lines) if context_lines else "No additional context"
     
-    # Use Groq LLM to generate interpretation
-    if groq_client and groq_model and text:
-        prompt = f"""You are an emotion analysis interpreter. Provide a brief, natural explanation of the emotion detected in the text.
-
-Text: "{text}"
+    prompt = None
+    facts = None
+    if text:
+        facts = f"""Text: "{text}"
 Dominant Emotion: {dominant_emotion}
 Confidence Score: {dominant_score:.2f} ({confidence})
-{context_str}
+{context_str}"""
+        prompt = f"""You are an emotion analysis interpreter. Provide a brief, natural explanation of the emotion detected in the text.
+
+{facts}
 
 Generate a concise interpretation that explains:
 1. Why this emotion was detected in the text
@@ -774,68 +1900,445 @@ Generate a concise interpretation that explains:
 Format your response as: "[Your explanation here]"
 Keep it brief and insightful (1 sentence max).
 """
+    
+    # Local template interpretation: used for the "local" engine and whenever Groq is unavailable or fails
+    # local_interpretation already lists the secondary emotions
+    fallback = ""
+    if text:
+        fallback = local_interpretation(text, emotion_scores, dominant_emotion, confidence, secondary_emotions)
+    else:
+        fallback = f"Emotional patterns consistent with {dominant_emotion}."
+        if secondary_emotions:
+            fallback += f" Secondary emotions detected: {', '.join(secondary_emotions)}."
+
+    return {"prompt": prompt, "facts": facts, "secondary_emotions": secondary_emotions, "fallback": fallback}
+
+
+def _finish_interpretation(interpretation_text: str, prepared: Dict) -> Optional[str]:
+    """Append secondary emotions to an LLM interpretation; None if the LLM returned nothing."""
+    interpretation_text = interpretation_text.strip()
+    if not interpretation_text:
+        return None
+    # Add secondary emotions if present
+    if prepared["secondary_emotions"]:
+        interpretation_text += f" Secondary emotions detected: {', '.join(prepared['secondary_emotions'])}."
+    return interpretation_text
+
+
+def interpretation(
+    emotion_data,
+    dominant_emotion: str = None,
+    context: Optional[EmotionAnalysisContext] = None,
+    engine: Optional[str] = None,
+) -> str:
+    """
+    Provide human-readable interpretation of emotion analysis results using Groq LLM.
+    
+    Args:
+        emotion_data: Either a dictionary of emotion scores OR full emotion analysis result
+        dominant_emotion: The dominant emotion (optional, will be calculated if not provided)
+        context: Optional request-scoped memo from analyze_text_full; supplies the
+            translation and matched keyword boosts without recomputing them
+        engine: "llm", "local" or "auto" (defaults to EMOTION_INTERPRETATION_ENGINE)
         
+    Returns:
+        Human-readable interpretation string
+    """
+    prepared = _prepare_interpretation(emotion_data, dominant_emotion, context)
+    if "error" in prepared:
+        return prepared["error"]
+    if _use_local_interpretation(engine):
+        return prepared["fallback"]
+
+    # Get Groq client from pipeline
+    pipeline = get_pipeline()
+    groq_client = getattr(pipeline, "groq_client", None)
+    groq_model = getattr(pipeline, "groq_model", None)
+    
+    # Use Groq LLM to generate interpretation
+    if groq_client and groq_model and prepared["prompt"]:
         try:
-            response = groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=groq_model,
-                temperature=0.3,
-                max_tokens=150
-            )
-            interpretation_text = response.choices[0].message.content.strip()
+            with _llm_interpretation_slot():
+                response = groq_client.chat.completions.create(
+                    messages=[{"role": "user", "content": prepared["prompt"]}],
+                    model=groq_model,
+                    temperature=0.3,
+                    max_tokens=150
+                )
+            interpretation_text = _finish_interpretation(response.choices[0].message.content, prepared)
             if interpretation_text:
-                # Add secondary emotions if present
-                if secondary_emotions:
-                    interpretation_text += f" Secondary emotions detected: {', '.join(secondary_emotions)}."
                 return interpretation_text
         except Exception as e:
             print(f"Groq interpretation error: {e}")
     
-    # Fallback if Groq is unavailable or fails
-    fallback = ""
-    if text:
-        fallback = f"The text '{text}' shows emotional patterns consistent with {dominant_emotion}."
-    else:
-        fallback = f"Emotional patterns consistent with {dominant_emotion}."
-    if secondary_emotions:
-        fallback += f" Secondary emotions: {', '.join(secondary_emotions)}."
-    return fallback
+    return prepared["fallback"]
+
+async def ainterpretation(
+    emotion_data,
+    dominant_emotion: str = None,
+    context: Optional[EmotionAnalysisContext] = None,
+    engine: Optional[str] = None,
+) -> str:
+    """Async variant of interpretation() using the pipeline's AsyncGroq client."""
+    prepared = _prepare_interpretation(emotion_data, dominant_emotion, context)
+    if "error" in prepared:
+        return prepared["error"]
+    if _use_local_interpretation(engine):
+        return prepared["fallback"]
+
+    pipeline = get_pipeline()
+    if pipeline.async_groq_client and pipeline.groq_model and prepared["prompt"]:
+        try:
+            with _llm_interpretation_slot():
+                content = await pipeline._agroq_chat(
+                    [{"role": "user", "content": prepared["prompt"]}], temperature=0.3, max_tokens=150
+                )
+            interpretation_text = _finish_interpretation(content, prepared)
+            if interpretation_text:
+                return interpretation_text
+        except Exception as e:
+            print(f"Groq interpretation error: {e}")
+
+    return prepared["fallback"]
+
+
+def _interpretation_batch_prompt(facts: List[str]) -> str:
+    """One prompt asking for an interpretation of every item, returned as JSON by id."""
+    items_block = "\n\n".join(f"Item {i}:\n{item}" for i, item in enumerate(facts))
+    return f"""You are an emotion analysis interpreter. For EACH item below, provide a brief, natural explanation of the emotion detected in its text.
+
+{items_block}
+
+For every item explain why the emotion was detected, which specific words or phrases contribute
+to it, and the overall emotional tone. Keep each brief and insightful (1 sentence max).
+
+Return EXACTLY valid JSON: [{{"id": <id>, "interpretation": "..."}}, ...] with the original ids.
+JSON:"""
+
 
-def analyze_emotion(text: str, user_name: str = None) -> Dict:
+def _parse_interpretation_batch(content: str, count: int) -> List[Optional[str]]:
+    """Parse [{"id", "interpretation"}] into a list by id; missing items stay None."""
+    import json
+    texts: List[Optional[str]] = [None] * count
+    content = content.strip()
+    start, end = content.find("["), content.rfind("]")
+    try:
+        parsed = json.loads(content[start:end + 1] if 0 <= start < end else content)
+    except Exception:
+        return texts
+    if isinstance(parsed, list):
+        for item in parsed:
+            try:
+                item_id = int(item.get("id"))
+                if 0 <= item_id < count:
+                    texts[item_id] = str(item.get("interpretation") or "")
+            except Exception:
+                continue
+    return texts
+
+
+def _prepare_interpretations(
+    emotion_data_list: List,
+    contexts: Optional[List[Optional[EmotionAnalysisContext]]] = None,
+) -> Tuple[List[Optional[str]], List[Dict], List[int]]:
+    """Prepare every item; returns (results pre-filled where no LLM call is needed, prepared, ids to generate)."""
+    contexts = contexts or [None] * len(emotion_data_list)
+    results: List[Optional[str]] = [None] * len(emotion_data_list)
+    prepared_items, pending = [], []
+    for idx, (emotion_data, context) in enumerate(zip(emotion_data_list, contexts)):
+        prepared = _prepare_interpretation(emotion_data, None, context)
+        prepared_items.append(prepared)
+        if "error" in prepared:
+            results[idx] = prepared["error"]
+        elif prepared["facts"] is None:
+            results[idx] = prepared["fallback"]
+        else:
+            pending.append(idx)
+    return results, prepared_items, pending
+
+
+def _apply_interpretation_batch(content: str, chunk: List[int], prepared_items: List[Dict], results: List[Optional[str]]):
+    for idx, generated in zip(chunk, _parse_interpretation_batch(content, len(chunk))):
+        results[idx] = _finish_interpretation(generated or "", prepared_items[idx]) or prepared_items[idx]["fallback"]
+
+
+def interpretations_batch(
+    emotion_data_list: List,
+    contexts: Optional[List[Optional[EmotionAnalysisContext]]] = None,
+    batch_size: Optional[int] = None,
+    engine: Optional[str] = None,
+) -> List[str]:
     """
-    Analyze emotion using the complete pipeline with LLM fallback.
+    Batch variant of interpretation(): one Groq completion per `batch_size` items.
     
     Args:
-        text: Text to analyze
-        user_name: Optional user name for context
+        emotion_data_list: Analysis results (with "original_text") or score dicts
+        contexts: Optional per-item request contexts
+        batch_size: Items per completion (defaults to EMOTION_INTERPRETATION_BATCH_SIZE)
+        engine: "llm", "local" or "auto" (defaults to EMOTION_INTERPRETATION_ENGINE)
         
     Returns:
-        Dictionary with analysis results
+        One interpretation string per item, in input order. Items the model
+        skips get the same template fallback interpretation() uses.
+    """
+    results, prepared_items, pending = _prepare_interpretations(emotion_data_list, contexts)
+    if _use_local_interpretation(engine):
+        return [r if r is not None else p["fallback"] for r, p in zip(results, prepared_items)]
+    pipeline = get_pipeline()
+    size = max(1, batch_size or EMOTION_INTERPRETATION_BATCH_SIZE)
+    for start in range(0, len(pending), size):
+        chunk = pending[start:start + size]
+        content = ""
+        if pipeline.groq_client and pipeline.groq_model:
+            try:
+                with _llm_interpretation_slot(len(chunk)):
+                    response = pipeline.groq_client.chat.completions.create(
+                        messages=[{"role": "user", "content": _interpretation_batch_prompt([prepared_items[i]["facts"] for i in chunk])}],
+                        model=pipeline.groq_model,
+                        temperature=0.3,
+                        max_tokens=80 * len(chunk) + 50
+                    )
+                content = response.choices[0].message.content
+            except Exception as e:
+                print(f"Groq batch interpretation error: {e}")
+        _apply_interpretation_batch(content, chunk, prepared_items, results)
+    return results
+
+
+async def ainterpretations_batch(
+    emotion_data_list: List,
+    contexts: Optional[List[Optional[EmotionAnalysisContext]]] = None,
+    batch_size: Optional[int] = None,
+    engine: Optional[str] = None,
+) -> List[str]:
+    """Async variant of interpretations_batch; chunks are generated concurrently."""
+    results, prepared_items, pending = _prepare_interpretations(emotion_data_list, contexts)
+    if _use_local_interpretation(engine):
+        return [r if r is not None else p["fallback"] for r, p in zip(results, prepared_items)]
+    pipeline = get_pipeline()
+    size = max(1, batch_size or EMOTION_INTERPRETATION_BATCH_SIZE)
+
+    async def _run_chunk(chunk):
+        content = ""
+        if pipeline.async_groq_client and pipeline.groq_model:
+            try:
+                with _llm_interpretation_slot(len(chunk)):
+                    content = await pipeline._agroq_chat(
+                        [{"role": "user", "content": _interpretation_batch_prompt([prepared_items[i]["facts"] for i in chunk])}],
+                        temperature=0.3,
+                        max_tokens=80 * len(chunk) + 50,
+                    )
+            except Exception as e:
+                print(f"Groq batch interpretation error: {e}")
+        _apply_interpretation_batch(content, chunk, prepared_items, results)
+
+    await asyncio.gather(*(_run_chunk(pending[start:start + size]) for start in range(0, len(pending), size)))
+    return results
+
+
+# ===================== Lazy interpretations =====================
+# With lazy_interpretation=True the analysis is returned at once with an
+# "interpretation_handle"; the text is generated in the background and stored in
+# Redis (in-process when Redis is unavailable) for get_interpretation(handle).
+
+_local_interpretations: Dict[str, Dict] = {}
+
+
+def _store_interpretation(handle: str, data: Dict):
+    if CACHE_AVAILABLE and MessageCache.cache_interpretation(handle, data):
+        return
+    _local_interpretations[handle] = data
+
+
+def get_interpretation(handle: str) -> Dict:
+    """Status of a lazily generated interpretation: {"status": "pending"|"ready"|"unknown", "interpretation"}."""
+    data = MessageCache.get_cached_interpretation(handle) if CACHE_AVAILABLE else None
+    if data is None:
+        data = _local_interpretations.get(handle)
+    if data is None:
+        return {"handle": handle, "status": "unknown", "interpretation": None}
+    return {"handle": handle, **data}
+
+
+def _new_interpretation_handle() -> str:
+    import uuid
+    handle = uuid.uuid4().hex
+    _store_interpretation(handle, {"status": "pending", "interpretation": None})
+    return handle
+
+
+def _publish_interpretation_handle(text: str, mode: Optional[str], handle: str):
+    """Let lazy requests from other workers that waited on this text's lock share the handle."""
+    if CACHE_AVAILABLE:
+        MessageCache.publish_interpretation_handle(text, EMOTION_MODEL_VERSION, _lock_mode(mode), handle)
+
+
+def _complete_interpretation(
+    handle: str, text: str, analysis: Dict, interpretation_text: str, mode: Optional[str] = None
+):
+    _store_interpretation(handle, {"status": "ready", "interpretation": interpretation_text})
+    get_pipeline()._cache_full_analysis(text, {**analysis, "interpretation": interpretation_text}, mode)
+
+
+def _schedule_interpretation(
+    text: str, analysis: Dict, context: Optional[EmotionAnalysisContext], mode: Optional[str] = None
+) -> str:
+    """Generate the interpretation on a worker thread; returns its handle."""
+    handle = _new_interpretation_handle()
+    _publish_interpretation_handle(text, mode, handle)
+
+    def _run():
+        interpretation_text = interpretation(analysis["emotion_scores"], analysis["dominant_emotion"], context=context)
+        _complete_interpretation(handle, text, analysis, interpretation_text, mode)
+
+    _interpretation_executor.submit(_run)
+    return handle
+
+
+def _aschedule_interpretation(
+    text: str, analysis: Dict, context: Optional[EmotionAnalysisContext], mode: Optional[str] = None
+) -> str:
+    """Async variant of _schedule_interpretation using a task on the running loop."""
+    handle = _new_interpretation_handle()
+    _publish_interpretation_handle(text, mode, handle)
+
+    async def _run():
+        interpretation_text = await ainterpretation(analysis["emotion_scores"], analysis["dominant_emotion"], context=context)
+        _complete_interpretation(handle, text, analysis, interpretation_text, mode)
+
+    task = asyncio.ensure_future(_run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return handle
+
+
+def _pipeline_result(analysis: Dict, interpretation_text: str, user_name: Optional[str]) -> Dict:
+    """Shape an analyze_text_full result into the analyze_emotion response."""
+    return {
+        "pipeline_success": True,
+        "original_text": analysis["original_text"],
+        "processed_text": analysis["processed_text"],
+        "emotion_scores": analysis["emotion_scores"],
+        "dominant_emotion": analysis["dominant_emotion"],
+        "dominant_score": analysis["dominant_score"],
+        "embedding": analysis["embedding"],
+        "interpretation": interpretation_text,
+        "user_context": user_name,
+        "analysis_method": "classifier_with_llm_fallback",
+        "answered_by": analysis.get("answered_by"),
+        "language": analysis.get("language")
+    }
+
+
+def _single_flight_key(
+    text: str,
+    mode: Optional[str],
+    lazy_interpretation: bool = False,
+    interpretation_engine: Optional[str] = None,
+) -> str:
+    """In-process coalescing key: content hash plus the analysis and interpretation modes."""
+    import hashlib
+    content_hash = hashlib.sha256(text.encode()).hexdigest()
+    engine = (interpretation_engine or EMOTION_INTERPRETATION_ENGINE).lower()
+    return f"{content_hash}:{(mode or EMOTION_ANALYSIS_MODE).lower()}:{'lazy' if lazy_interpretation else 'full'}:{engine}"
+
+
+def _lock_mode(mode: Optional[str]) -> str:
+    return (mode or EMOTION_ANALYSIS_MODE).lower()
+
+
+def _peer_pipeline_result(
+    text: str,
+    mode: Optional[str] = None,
+    read_through: bool = True,
+    lazy_interpretation: bool = False,
+    interpretation_engine: Optional[str] = None,
+) -> Optional[Dict]:
+    """A finished analyze_emotion result another worker left in the cache, if any.
+
+    An analysis without an interpretation is still usable when the caller wants the
+    template engine (filled in here) or a lazy result (sharing the holder's handle).
     """
+    cached = EmotionEmbedder._cached_full_analysis(text, mode, read_through)
+    if cached is None:
+        return None
+    if cached.get("interpretation"):
+        return _pipeline_result(cached, cached["interpretation"], None)
+    if _use_local_interpretation(interpretation_engine):
+        return _pipeline_result(
+            cached,
+            interpretation(cached["emotion_scores"], cached["dominant_emotion"], engine=interpretation_engine),
+            None,
+        )
+    if lazy_interpretation:
+        handle = MessageCache.get_published_interpretation_handle(text, EMOTION_MODEL_VERSION, _lock_mode(mode))
+        if handle:
+            return _lazy_pipeline_result(cached, handle, None)
+    return None
+
+
+@contextlib.contextmanager
+def _holding_emotion_lock(text: str, mode: Optional[str], token: Optional[str]):
+    """Keep a held cross-worker lock alive while the body runs, then release it."""
+    if not token:
+        yield
+        return
+    args = (text, EMOTION_MODEL_VERSION, _lock_mode(mode))
+    stopped = threading.Event()
+
+    def _heartbeat():
+        while not stopped.wait(max(1.0, EMOTION_LOCK_TTL / 3)):
+            if not MessageCache.refresh_emotion_lock(*args, token):
+                return
+
+    threading.Thread(target=_heartbeat, name="emotion-lock-heartbeat", daemon=True).start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        MessageCache.release_emotion_lock(*args, token)
+
+
+def _analyze_emotion_once(
+    text: str,
+    user_name: str = None,
+    mode: Optional[str] = None,
+    latency_budget_ms: Optional[float] = None,
+    lazy_interpretation: bool = False,
+    interpretation_engine: Optional[str] = None,
+) -> Dict:
+    """Run the full pipeline for one text without any coalescing."""
     try:
         pipeline = get_pipeline()
+        context = EmotionAnalysisContext(text)
         
         # Use the full analysis method which includes get_final_emotion
-        analysis = pipeline.analyze_text_full(text, translate_if_needed=True)
+        analysis = pipeline.analyze_text_full(
+            text,
+            translate_if_needed=True,
+            context=context,
+            mode=mode,
+            latency_budget_ms=latency_budget_ms,
+        )
         
-        # Add interpretation
-        interpretation_text = interpretation(
+        if (lazy_interpretation and not analysis.get("interpretation")
+                and not _use_local_interpretation(interpretation_engine)):
+            return _lazy_pipeline_result(
+                analysis, _schedule_interpretation(text, analysis, context, mode), user_name
+            )
+
+        # Add interpretation (reused when the analysis came from the cache)
+        interpretation_text = analysis.get("interpretation") or interpretation(
             analysis["emotion_scores"], 
-            analysis["dominant_emotion"]
+            analysis["dominant_emotion"],
+            context=context,
+            engine=interpretation_engine
         )
+        # Template interpretations are cheap to redo; only LLM ones are worth caching
+        if analysis.get("answered_by") != "cache" and not _use_local_interpretation(interpretation_engine):
+            pipeline._cache_full_analysis(text, {**analysis, "interpretation": interpretation_text}, mode)
         
-        return {
-            "pipeline_success": True,
-            "original_text": analysis["original_text"],
-            "processed_text": analysis["processed_text"],
-            "emotion_scores": analysis["emotion_scores"],
-            "dominant_emotion": analysis["dominant_emotion"],
-            "dominant_score": analysis["dominant_score"],
-            "embedding": analysis["embedding"],
-            "interpretation": interpretation_text,
-            "user_context": user_name,
-            "analysis_method": "classifier_with_llm_fallback"
-        }
+        return _pipeline_result(analysis, interpretation_text, user_name)
         
     except Exception as e:
         return {
@@ -845,6 +2348,89 @@ def analyze_emotion(text: str, user_name: str = None) -> Dict:
         }
 
 
+def _analyze_emotion_across_workers(
+    text: str,
+    mode: Optional[str],
+    latency_budget_ms: Optional[float],
+    lazy_interpretation: bool = False,
+    interpretation_engine: Optional[str] = None,
+) -> Dict:
+    """Compute under the Redis lock, or wait for the worker that holds it."""
+    if not CACHE_AVAILABLE:
+        return _analyze_emotion_once(text, None, mode, latency_budget_ms, lazy_interpretation, interpretation_engine)
+
+    lock_args = (text, EMOTION_MODEL_VERSION, _lock_mode(mode))
+    token = MessageCache.acquire_emotion_lock(*lock_args)
+    if token is None:
+        waited_until = time.monotonic() + EMOTION_LOCK_WAIT_SECONDS
+        while time.monotonic() < waited_until and MessageCache.is_emotion_locked(*lock_args):
+            time.sleep(EMOTION_LOCK_POLL_SECONDS)
+        peer_result = _peer_pipeline_result(text, mode, True, lazy_interpretation, interpretation_engine)
+        if peer_result is not None:
+            print(f"✅ Reused emotion analysis computed by another worker")
+            return peer_result
+        token = MessageCache.acquire_emotion_lock(*lock_args)
+    with _holding_emotion_lock(text, mode, token):
+        return _analyze_emotion_once(text, None, mode, latency_budget_ms, lazy_interpretation, interpretation_engine)
+
+
+def _lazy_pipeline_result(analysis: Dict, handle: str, user_name: Optional[str]) -> Dict:
+    """analyze_emotion response whose interpretation is still being generated."""
+    result = _pipeline_result(analysis, None, user_name)
+    result["interpretation_handle"] = handle
+    result["interpretation_status"] = "pending"
+    return result
+
+
+def analyze_emotion(
+    text: str,
+    user_name: str = None,
+    mode: Optional[str] = None,
+    latency_budget_ms: Optional[float] = None,
+    lazy_interpretation: bool = False,
+    interpretation_engine: Optional[str] = None,
+) -> Dict:
+    """
+    Analyze emotion using the complete pipeline with LLM fallback.
+
+    Identical texts analyzed at the same time share one computation: the first
+    caller runs the pipeline and the others wait on its result.
+    
+    Args:
+        text: Text to analyze
+        user_name: Optional user name for context
+        mode: "ensemble" or "cascade" (defaults to EMOTION_ANALYSIS_MODE)
+        latency_budget_ms: Per-request latency budget for the cascade mode
+        lazy_interpretation: Return without waiting for the interpretation; the result
+            carries an "interpretation_handle" for get_interpretation()
+        interpretation_engine: "llm", "local" or "auto" (defaults to EMOTION_INTERPRETATION_ENGINE)
+        
+    Returns:
+        Dictionary with analysis results
+    """
+    if not EMOTION_SINGLE_FLIGHT:
+        return _analyze_emotion_once(text, user_name, mode, latency_budget_ms, lazy_interpretation, interpretation_engine)
+
+    key = _single_flight_key(text, mode, lazy_interpretation, interpretation_engine)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight[key] = future
+
+    if is_leader:
+        try:
+            future.set_result(_analyze_emotion_across_workers(text, mode, latency_budget_ms, lazy_interpretation, interpretation_engine))
+        except Exception as e:
+            future.set_result({"pipeline_success": False, "error": str(e)})
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+
+    return {**future.result(), "user_context": user_name}
+
+
 def analyze_emotions(texts: list, user_name: str = None) -> list:
     """Batch variant: analyze multiple texts using the pipeline's batch analyzer.
 
@@ -859,4 +2445,123 @@ def analyze_emotions(texts: list, user_name: str = None) -> list:
         results = []
         for t in texts:
             results.append(analyze_emotion(t, user_name=user_name))
-        return results
\ No newline at end of file
+        return results
+
+
+async def _aanalyze_emotion_once(
+    text: str,
+    user_name: str = None,
+    mode: Optional[str] = None,
+    latency_budget_ms: Optional[float] = None,
+    lazy_interpretation: bool = False,
+    interpretation_engine: Optional[str] = None,
+) -> Dict:
+    """Async variant of _analyze_emotion_once."""
+    try:
+        pipeline = get_pipeline()
+        context = EmotionAnalysisContext(text)
+        analysis = await pipeline.aanalyze_text_full(
+            text,
+            translate_if_needed=True,
+            context=context,
+            mode=mode,
+            latency_budget_ms=latency_budget_ms,
+        )
+        if (lazy_interpretation and not analysis.get("interpretation")
+                and not _use_local_interpretation(interpretation_engine)):
+            return _lazy_pipeline_result(
+                analysis, _aschedule_interpretation(text, analysis, context, mode), user_name
+            )
+        interpretation_text = analysis.get("interpretation") or await ainterpretation(
+            analysis["emotion_scores"],
+            analysis["dominant_emotion"],
+            context=context,
+            engine=interpretation_engine
+        )
+        # Template interpretations are cheap to redo; only LLM ones are worth caching
+        if analysis.get("answered_by") != "cache" and not _use_local_interpretation(interpretation_engine):
+            pipeline._cache_full_analysis(text, {**analysis, "interpretation": interpretation_text}, mode)
+        return _pipeline_result(analysis, interpretation_text, user_name)
+    except Exception as e:
+        return {
+            "pipeline_success": False,
+            "error": str(e),
+            "user_context": user_name
+        }
+
+
+async def _aanalyze_emotion_across_workers(
+    text: str,
+    mode: Optional[str],
+    latency_budget_ms: Optional[float],
+    lazy_interpretation: bool = False,
+    interpretation_engine: Optional[str] = None,
+) -> Dict:
+    """Async variant of _analyze_emotion_across_workers."""
+    if not CACHE_AVAILABLE:
+        return await _aanalyze_emotion_once(text, None, mode, latency_budget_ms, lazy_interpretation, interpretation_engine)
+
+    lock_args = (text, EMOTION_MODEL_VERSION, _lock_mode(mode))
+    token = MessageCache.acquire_emotion_lock(*lock_args)
+    if token is None:
+        waited_until = time.monotonic() + EMOTION_LOCK_WAIT_SECONDS
+        while time.monotonic() < waited_until and MessageCache.is_emotion_locked(*lock_args):
+            await asyncio.sleep(EMOTION_LOCK_POLL_SECONDS)
+        # The peer writes Redis before releasing its lock, so skip the blocking store read
+        peer_result = _peer_pipeline_result(text, mode, False, lazy_interpretation, interpretation_engine)
+        if peer_result is not None:
+            print(f"✅ Reused emotion analysis computed by another worker")
+            return peer_result
+        token = MessageCache.acquire_emotion_lock(*lock_args)
+    with _holding_emotion_lock(text, mode, token):
+        return await _aanalyze_emotion_once(text, None, mode, latency_budget_ms, lazy_interpretation, interpretation_engine)
+
+
+async def aanalyze_emotion(
+    text: str,
+    user_name: str = None,
+    mode: Optional[str] = None,
+    latency_budget_ms: Optional[float] = None,
+    lazy_interpretation: bool = False,
+    interpretation_engine: Optional[str] = None,
+) -> Dict:
+    """Async variant of analyze_emotion for use inside async request handlers."""
+    if not EMOTION_SINGLE_FLIGHT:
+        return await _aanalyze_emotion_once(text, user_name, mode, latency_budget_ms, lazy_interpretation, interpretation_engine)
+
+    key = _single_flight_key(text, mode, lazy_interpretation, interpretation_engine)
+    future = _ainflight.get(key)
+    if future is None:
+        future = asyncio.get_running_loop().create_future()
+        _ainflight[key] = future
+        try:
+            result = await _aanalyze_emotion_across_workers(text, mode, latency_budget_ms, lazy_interpretation, interpretation_engine)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            result = {"pipeline_success": False, "error": str(e)}
+        finally:
+            _ainflight.pop(key, None)
+        future.set_result(result)
+    else:
+        try:
+            # shield: a cancelled follower must not cancel the leader's shared future
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The leader's request was cancelled; compute for this caller instead
+            result = await _aanalyze_emotion_once(text, None, mode, latency_budget_ms, lazy_interpretation, interpretation_engine)
+
+    return {**result, "user_context": user_name}
+
+
+async def aanalyze_emotions(texts: list, user_name: str = None) -> list:
+    """Async variant of analyze_emotions."""
+    try:
+        pipeline = get_pipeline()
+        return await pipeline.aanalyze_texts_full(texts, translate_if_needed=True)
+    except Exception as e:
+        print(f"aanalyze_emotions error: {e}")
+        return list(await asyncio.gather(*(aanalyze_emotion(t, user_name=user_name) for t in texts)))
@@ -0,0 +1,124 @@
+"""
+Template-based local interpretation engine.
+
+Builds an explanation of an emotion analysis from the score vector, secondary
+emotions, matched Filipino lexicon keywords and punctuation/intensity cues,
+without a Groq round trip. Output follows the LLM interpretation format: one
+explanatory sentence, then the secondary emotions.
+"""
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from services.emotion_lexicon import get_emotion_lexicon
+
+# (what the emotion signals, overall tone)
+EMOTION_DESCRIPTIONS = {
+    "anger": ("frustration or irritation", "an annoyed, frustrated tone"),
+    "disgust": ("revulsion or distaste", "a repulsed, put-off tone"),
+    "fear": ("worry or anxiety", "an anxious, uneasy tone"),
+    "joy": ("happiness or excitement", "an upbeat, positive tone"),
+    "neutral": ("no strong emotion", "a matter-of-fact tone"),
+    "sadness": ("sadness or disappointment", "a downcast, disappointed tone"),
+    "surprise": ("shock or amazement", "a surprised, taken-aback tone"),
+}
+
+_EXCLAMATIONS = re.compile(r"!{2,}")
+_QUESTIONS = re.compile(r"\?{2,}")
+_INTERROBANG = re.compile(r"[!?]*(\?!|!\?)[!?]*")
+_CAPS_WORD = re.compile(r"\b[A-Z]{3,}\b")
+_STRETCHED = re.compile(r"\b\w*(\w)\1{2,}\w*\b")
+_ELLIPSIS = re.compile(r"(\.{3,}|…)\s*$")
+
+
+def _join(items: List[str]) -> str:
+    """'a', 'a and b', 'a, b and c'."""
+    if len(items) <= 1:
+        return "".join(items)
+    return ", ".join(items[:-1]) + f" and {items[-1]}"
+
+
+def _quote_list(items: List[str], limit: int = 3) -> str:
+    return _join([f"'{item}'" for item in items[:limit]])
+
+
+def intensity_cues(text: str) -> List[str]:
+    """Punctuation and typography cues that raise or colour emotional intensity."""
+    cues = []
+    if _INTERROBANG.search(text):
+        cues.append("mixed '?!' punctuation")
+    else:
+        if _EXCLAMATIONS.search(text):
+            cues.append("repeated exclamation marks")
+        if _QUESTIONS.search(text):
+            cues.append("repeated question marks")
+    caps = _CAPS_WORD.findall(text)
+    if caps:
+        cues.append(f"all-caps {_quote_list(caps, 2)}")
+    stretched = [m.group(0) for m in _STRETCHED.finditer(text) if not m.group(0).isdigit()]
+    if stretched:
+        cues.append(f"stretched spelling like {_quote_list(stretched, 2)}")
+    if any(unicodedata.category(ch) == "So" for ch in text):
+        cues.append("emoji")
+    if _ELLIPSIS.search(text.strip()):
+        cues.append("a trailing ellipsis")
+    return cues
+
+
+def _strip_wildcard(term: str) -> str:
+    return term[:-1] if term.endswith("*") else term
+
+
+def local_interpretation(
+    text: str,
+    emotion_scores: Dict[str, float],
+    dominant_emotion: str,
+    confidence: str,
+    secondary_emotions: List[str],
+    matched_keywords: Optional[Dict[str, List[str]]] = None,
+) -> str:
+    """
+    Explain an emotion analysis from local signals only.
+
+    Args:
+        text: Original message text
+        emotion_scores: Emotion label -> score
+        dominant_emotion: Final label of the analysis
+        confidence: Confidence wording for the dominant score ("confident", ...)
+        secondary_emotions: Runner-up emotions worth mentioning
+        matched_keywords: Lexicon terms per emotion; matched against text when omitted
+
+    Returns:
+        Interpretation string in the same shape as the LLM interpretation
+    """
+    if matched_keywords is None:
+        matched_keywords = get_emotion_lexicon().matches(text)
+    signal, tone = EMOTION_DESCRIPTIONS.get(dominant_emotion, ("this emotion", "a mixed tone"))
+    score = emotion_scores.get(dominant_emotion, 0.0)
+
+    keywords = [_strip_wildcard(t) for t in matched_keywords.get(dominant_emotion, [])]
+    if keywords:
+        evidence = f"{_quote_list(keywords)} {'signals' if len(keywords) == 1 else 'signal'} {signal}"
+    elif dominant_emotion == "neutral":
+        evidence = "no strong emotional words stand out"
+    else:
+        other = [
+            _strip_wildcard(t)
+            for emotion in secondary_emotions
+            for t in matched_keywords.get(emotion, [])
+        ]
+        evidence = f"the overall wording suggests {signal}"
+        if other:
+            evidence += f", alongside {_quote_list(other, 2)}"
+
+    cues = intensity_cues(text)
+    if cues and dominant_emotion != "neutral":
+        evidence += f", and {_join(cues)} {'raise' if len(cues) > 1 else 'raises'} the intensity"
+
+    interpretation_text = (
+        f"The message reads as {dominant_emotion} ({score:.2f}, {confidence}): {evidence}, "
+        f"giving {tone}."
+    )
+    if secondary_emotions:
+        interpretation_text += f" Secondary emotions detected: {', '.join(secondary_emotions)}."
+    return interpretation_text
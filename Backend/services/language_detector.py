@@ -0,0 +1,177 @@
+"""
+Offline English vs. Filipino/Taglish detector.
+
+A character n-gram naive Bayes model, trained from the EMOTERA Taglish tweets by
+utilities/train_language_detector.py and stored as a small JSON file. It is used
+to skip the Groq translation round trip for text that is already English.
+"""
+import os
+import re
+import csv
+import json
+import math
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LANGUAGE_MODEL_PATH = os.getenv(
+    "LANGUAGE_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons", "taglish_detector.v1.json"),
+)
+
+NGRAM_ORDERS = (1, 2, 3, 4)
+
+# Filipino function words used to weakly label the training tweets; the n-gram model
+# then generalizes to spellings and affixes (nakaka-, -ng, mag-) the list never names
+FILIPINO_MARKERS = {
+    "ang", "ng", "mga", "sa", "na", "ay", "ko", "mo", "ka", "kami", "kayo", "sila", "siya",
+    "ako", "ikaw", "natin", "namin", "nila", "niya", "yung", "yun", "lang", "naman", "kasi",
+    "pa", "po", "din", "rin", "daw", "raw", "nga", "ba", "hindi", "wala", "may", "dito",
+    "diyan", "doon", "talaga", "pero", "kung", "para", "ito", "iyan", "ano", "bakit",
+    "sana", "nang", "pag", "tapos", "kaya", "eh", "e", "di", "baha", "ulan", "sobra", "grabe",
+}
+
+_URL_OR_MENTION = re.compile(r"(https?://\S+|www\.\S+|[@#]\w+|\bRT\b)")
+_NON_LETTERS = re.compile(r"[^a-zñ' ]+")
+_WORD = re.compile(r"[a-zñ']+")
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and drop URLs, mentions, hashtags, digits and punctuation."""
+    text = _URL_OR_MENTION.sub(" ", text)
+    text = _NON_LETTERS.sub(" ", text.lower())
+    return " ".join(text.split())
+
+
+def _ngrams(text: str) -> Iterable[str]:
+    padded = f" {text} "
+    for n in NGRAM_ORDERS:
+        for i in range(len(padded) - n + 1):
+            yield padded[i:i + n]
+
+
+def weak_label(text: str) -> Optional[str]:
+    """Heuristic "en"/"tl" label from Filipino function words, None when ambiguous."""
+    words = _WORD.findall(_normalize(text))
+    if len(words) < 3:
+        return None
+    ratio = sum(1 for w in words if w in FILIPINO_MARKERS) / len(words)
+    if ratio == 0.0:
+        return "en"
+    if ratio >= 0.15:
+        return "tl"
+    return None
+
+
+class LanguageDetector:
+    """Two-class ("en", "tl") character n-gram naive Bayes."""
+
+    def __init__(self, log_priors: Dict[str, float], log_probs: Dict[str, Dict[str, float]],
+                 unseen: Dict[str, float], version: str = "inline"):
+        """
+        Args:
+            log_priors: Log prior per language
+            log_probs: Per-language log probability of each kept n-gram
+            unseen: Per-language log probability for n-grams outside the vocabulary
+            version: Model version string
+        """
+        self.version = version
+        self.log_priors = log_priors
+        self.log_probs = log_probs
+        self.unseen = unseen
+        self.languages = list(log_priors.keys())
+
+    @classmethod
+    def train(cls, samples: List[Tuple[str, str]], max_features: int = 6000,
+              version: str = "inline") -> "LanguageDetector":
+        """Fit from (text, language) pairs with add-one smoothing over the top n-grams."""
+        counts: Dict[str, Counter] = {}
+        docs: Counter = Counter()
+        for text, lang in samples:
+            counts.setdefault(lang, Counter()).update(_ngrams(_normalize(text)))
+            docs[lang] += 1
+
+        vocab = set()
+        for lang_counts in counts.values():
+            vocab.update(gram for gram, _ in lang_counts.most_common(max_features))
+
+        total_docs = sum(docs.values())
+        log_priors, log_probs, unseen = {}, {}, {}
+        for lang, lang_counts in counts.items():
+            denom = sum(lang_counts[g] for g in vocab) + len(vocab) + 1
+            log_priors[lang] = math.log(docs[lang] / total_docs)
+            log_probs[lang] = {g: math.log((lang_counts[g] + 1) / denom) for g in vocab}
+            unseen[lang] = math.log(1 / denom)
+        return cls(log_priors, log_probs, unseen, version=version)
+
+    @classmethod
+    def from_file(cls, path: str) -> "LanguageDetector":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["log_priors"], data["log_probs"], data["unseen"], version=data.get("version", "unknown"))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.version,
+                "ngram_orders": list(NGRAM_ORDERS),
+                "log_priors": self.log_priors,
+                "unseen": self.unseen,
+                "log_probs": {
+                    lang: {g: round(p, 4) for g, p in probs.items()}
+                    for lang, probs in self.log_probs.items()
+                },
+            }, f, ensure_ascii=False)
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        """Return (language, confidence); ("unknown", 0.0) when there are no letters."""
+        normalized = _normalize(text)
+        if not normalized:
+            return "unknown", 0.0
+
+        scores = dict(self.log_priors)
+        for gram in _ngrams(normalized):
+            for lang in self.languages:
+                scores[lang] += self.log_probs[lang].get(gram, self.unseen[lang])
+
+        best = max(scores, key=scores.get)
+        # Softmax over the class log-likelihoods
+        top = scores[best]
+        total = sum(math.exp(s - top) for s in scores.values())
+        return best, 1.0 / total
+
+    def detect_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        return [self.detect(text) for text in texts]
+
+
+def load_emotera_samples(tsv_path: str) -> List[Tuple[str, str]]:
+    """Weakly labelled (tweet, language) pairs from the EMOTERA TSV."""
+    samples = []
+    with open(tsv_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f, delimiter="\t"):
+            tweet = row.get("tweet") or ""
+            label = weak_label(tweet)
+            if label:
+                samples.append((tweet, label))
+    return samples
+
+
+_detector: Optional[LanguageDetector] = None
+_detector_loaded = False
+_detector_lock = threading.Lock()
+
+
+def get_language_detector() -> Optional[LanguageDetector]:
+    """Process-wide detector, or None when no trained model file is present."""
+    global _detector, _detector_loaded
+    if not _detector_loaded:
+        with _detector_lock:
+            if not _detector_loaded:
+                try:
+                    _detector = LanguageDetector.from_file(LANGUAGE_MODEL_PATH)
+                    print(f"🌐 Loaded language detector {_detector.version}")
+                except Exception as e:
+                    print(f"⚠️ Language detector unavailable ({e}), every text will be translated")
+                    _detector = None
+                _detector_loaded = True
+    return _detector
@@ -20,7 +20,8 @@ from telethon.errors import (
     SessionPasswordNeededError,
     PhoneCodeInvalidError,
 )
-from services.RAGPipeline import rag
+from services.RAGPipeline import rag, SEMANTIC_MODEL_VERSION
+from services.emotion_pipeline import EMOTION_MODEL_VERSION, EMOTION_ANALYSIS_MODE
 from model.message import Message
 from core.db_connection import engine
 from sqlmodel import Session, select
@@ -174,6 +175,17 @@ async def save_messages_to_db(messages: list, phone_number: str, embeddings: lis
                     sem_vector = [0.0] * 1024
                 else:
                     sem_vector = sem_embed.tolist() if hasattr(sem_embed, "tolist") else list(sem_embed)
+                # Zero vectors are embedding failures; leave them unversioned so re-analysis picks them up
+                semantic_version = SEMANTIC_MODEL_VERSION if any(sem_vector) else None
+                emotion_version = None
+                if isinstance(emo_out, dict) and "vector" not in emo_out and "embedding" in emo_out:
+                    # Batch analyses use the analyze_text_full shape
+                    emo_out = {
+                        **emo_out,
+                        "vector": emo_out["embedding"],
+                        "labels": emo_out.get("emotion_scores"),
+                        "top": emo_out.get("dominant_emotion"),
+                    }
                 if not isinstance(emo_out, dict) or "vector" not in emo_out:
                     print(f"ERROR - Invalid emotion output: {emo_out}")
                     emo_vector = [0.0] * 7
@@ -181,7 +193,10 @@ async def save_messages_to_db(messages: list, phone_number: str, embeddings: lis
                     top_emotion = "neutral"
                     interpretation_text = "Unable to analyze emotion for this message."
                 else:
+                    # Lexicon-answered cascade results carry no classifier vector; store them
+                    # without one and unversioned, so re-analysis fills the vector in
                     emo_vector = emo_out["vector"]
+                    emotion_version = EMOTION_MODEL_VERSION if emo_vector and any(emo_vector) else None
                     emo_labels = emo_out["labels"]
                     top_emotion = emo_out["top"]
                     interpretation_text = emo_out.get("interpretation", "No interpretation available.")
@@ -210,7 +225,10 @@ async def save_messages_to_db(messages: list, phone_number: str, embeddings: lis
                     Emotion_labels=emo_labels,
                     Detected_emotion=top_emotion,
                     Interpretation=interpretation_text,
-                    Contact_id=msg_data.get("Contact_id")
+                    Contact_id=msg_data.get("Contact_id"),
+                    Emotion_model_version=emotion_version,
+                    Semantic_model_version=semantic_version,
+                    Analyzed_at=datetime.utcnow()
                 )
                 session.add(message)
                 message_ids.append(message_id)
@@ -304,24 +322,15 @@ async def get_contact_messages(phone_number: str , contact_data: dict = None) ->
     message_ids = []
     if message_texts:
         try:
-            # Create embeddings in batch - FIXED: Ensure this returns actual numeric vectors
+            # Create embeddings in batch (chunked multi-input requests; failures are zero vectors)
             print(f"DEBUG - Creating embeddings for {len(message_texts)} messages")
-            embedding_vectors = []
-            for text in message_texts:
-                try:
-                    embed = rag._embed(text)  # This now returns numpy array
-                    print(f"DEBUG - Embedding type for '{text[:50]}...': {type(embed)}")
-                    embedding_vectors.append(embed)
-                except Exception as e:
-                    print(f"ERROR - Failed to create embedding for text '{text[:50]}...': {e}")
-                    # Create a default embedding vector
-                    embedding_vectors.append([0.0] * 1024)
+            embedding_vectors = list(rag.embed_batch(message_texts))
             
             # Create emotion outputs using the new method with interpretations
             # Use batch analysis for all messages (translation + embedding + interpretation)
-            from services.emotion_pipeline import analyze_emotions
+            from services.emotion_pipeline import aanalyze_emotions
             try:
-                emotion_outputs = analyze_emotions(message_texts)
+                emotion_outputs = await aanalyze_emotions(message_texts)
                 if not isinstance(emotion_outputs, list):
                     # Defensive: ensure we have a list of results
                     emotion_outputs = [emotion_outputs]
@@ -358,16 +367,17 @@ async def get_contact_messages(phone_number: str , contact_data: dict = None) ->
                             "sender": msg["from"],
                             "receiver": msg["to"],
                             "date": msg["date"],
-                            "message_id": msg_id
+                            "message_id": msg_id,
+                            "contact_id": user.id
                         }
-                        rag_documents.append((message_texts[i], metadata))
+                        rag_documents.append((message_texts[i], metadata, embedding))
                     except IndexError:
                         print(f"Warning: No message_id for index {i}")
                         continue
                         
                 # Bulk add to RAG system. Enrich metadata so RAG can generate replies
                 # in the voice of the app user (`app_user_id` / `app_user_display_name`).
-                for doc, metadata in rag_documents:
+                for doc, metadata, embedding in rag_documents:
                     try:
                         # Attach the app user id (phone number) and resolve a display name
                         metadata["app_user_id"] = phone_number
@@ -376,7 +386,7 @@ async def get_contact_messages(phone_number: str , contact_data: dict = None) ->
                         metadata["is_user_message"] = (metadata.get("sender") == metadata.get("app_user_display_name"))
                     except Exception as _e:
                         print(f"Warning: failed to enrich RAG metadata: {_e}")
-                    rag.add_document(doc, metadata=metadata)
+                    rag.add_document(doc, metadata=metadata, semantic_embedding=embedding)
                     
         except Exception as e:
             print(f"ERROR - Failed to process embeddings: {e}")
@@ -456,6 +466,8 @@ async def get_latest_message_from_db(user_id: str, contact_id: int, db: Optional
             "emotion_embedding": embedding,
             "interpretation": latest_message.Interpretation,
             "contact_id": latest_message.Contact_id,
+            "emotion_model_version": latest_message.Emotion_model_version,
+            "emotion_stale": latest_message.Emotion_model_version != EMOTION_MODEL_VERSION,
         }
     finally:
         if local_db and db:
@@ -535,40 +547,41 @@ async def append_latest_contact_message(user_id: str, contact_id: int, db: Sessi
         except Exception:
             latest_msg = new_messages[-1]
 
-        embeddings = []
         emotions = []
 
         # We will only analyze and save the single latest message
         msgs_to_process = [latest_msg]
+        embeddings = list(rag.embed_batch([msg["text"] for msg in msgs_to_process]))
 
         for msg in msgs_to_process:
-            try:
-                embedding = rag._embed(msg["text"])
-            except Exception as e:
-                print(f"ERROR - Failed to create embedding: {e}")
-                embedding = [0.0] * 1024
-            embeddings.append(embedding)
-            
             # Check cache first for emotion analysis
-            cached_emotion = MessageCache.get_cached_emotion_analysis(msg["text"])
-            if cached_emotion:
+            # Only a cached analysis that already carries its interpretation can skip the pipeline
+            cached_emotion = MessageCache.get_cached_emotion_analysis(
+                msg["text"], EMOTION_MODEL_VERSION, EMOTION_ANALYSIS_MODE
+            )
+            if cached_emotion and cached_emotion.get("interpretation"):
                 print(f"✅ Cache hit for emotion analysis in append_latest")
                 emotions.append(cached_emotion)
                 continue
             
             try:
-                emotion_data = rag.get_emotion_data(msg["text"])
-                from services.emotion_pipeline import analyze_emotion, interpretation
-                emotion_analysis = analyze_emotion(msg["text"])
+                # Single analysis pass: the DB fields and the interpretation both come
+                # from the same analyze_emotion result instead of analyzing twice
+                from services.emotion_pipeline import aanalyze_emotion
+                emotion_analysis = await aanalyze_emotion(msg["text"])
                 if emotion_analysis.get("pipeline_success"):
-                    interpretation_text = interpretation(emotion_analysis)
-                    emotion_data["interpretation"] = interpretation_text
+                    emotion_data = {
+                        "vector": emotion_analysis["embedding"],
+                        "labels": emotion_analysis["emotion_scores"],
+                        "top": emotion_analysis["dominant_emotion"],
+                        "original_text": emotion_analysis["original_text"],
+                        "processed_text": emotion_analysis.get("processed_text"),
+                        "interpretation": emotion_analysis["interpretation"],
+                    }
                 else:
+                    emotion_data = rag.get_emotion_data(msg["text"])
                     emotion_data["interpretation"] = "Failed to analyze emotion for this message."
-                
-                # Cache the emotion analysis result
-                MessageCache.cache_emotion_analysis(msg["text"], emotion_data)
-                print(f"💾 Cached emotion analysis in append_latest")
+                # aanalyze_emotion caches its own (versioned) result; failures are not cached
                 
             except Exception as e:
                 print(f"ERROR - Failed to analyze emotion: {e}")
@@ -669,19 +682,12 @@ async def get_contact_messages_by_id(user_id: str, contact_id: int, db: Session
         message_ids = []
         if message_texts:
             try:
-                embedding_vectors = []
-                for text in message_texts:
-                    try:
-                        embed = rag._embed(text)
-                        embedding_vectors.append(embed)
-                    except Exception as e:
-                        print(f"ERROR - Failed to create embedding for text '{text[:50]}...': {e}")
-                        embedding_vectors.append([0.0] * 1024)
+                embedding_vectors = list(rag.embed_batch(message_texts))
 
                 # Use batched analysis for these messages
-                from services.emotion_pipeline import analyze_emotions
+                from services.emotion_pipeline import aanalyze_emotions
                 try:
-                    emotion_outputs = analyze_emotions(message_texts)
+                    emotion_outputs = await aanalyze_emotions(message_texts)
                     if not isinstance(emotion_outputs, list):
                         emotion_outputs = [emotion_outputs]
                 except Exception as e:
@@ -689,7 +695,9 @@ async def get_contact_messages_by_id(user_id: str, contact_id: int, db: Session
                     # Fallback to per-message analysis maintaining cache checks
                     emotion_outputs = []
                     for text in message_texts:
-                        cached_emotion = MessageCache.get_cached_emotion_analysis(text)
+                        cached_emotion = MessageCache.get_cached_emotion_analysis(
+                            text, EMOTION_MODEL_VERSION, "batch"
+                        )
                         if cached_emotion:
                             emotion_outputs.append(cached_emotion)
                             continue
@@ -718,18 +726,19 @@ async def get_contact_messages_by_id(user_id: str, contact_id: int, db: Session
                                 "receiver": msg["to"],
                                 "date": msg["date"],
                                 "message_id": msg_id,
-                                "app_user_id": user_id
+                                "app_user_id": user_id,
+                                "contact_id": contact_id
                             }
-                            rag_documents.append((message_texts[i], metadata))
+                            rag_documents.append((message_texts[i], metadata, embedding))
                         except IndexError:
                             continue
-                    for doc, metadata in rag_documents:
+                    for doc, metadata, embedding in rag_documents:
                         try:
                             metadata["app_user_display_name"] = _resolve_display_name_for_user(metadata.get("app_user_id", user_id))
                             metadata["is_user_message"] = (metadata.get("sender") == metadata.get("app_user_display_name"))
                         except Exception as _e:
                             print(f"Warning: failed to enrich RAG metadata: {_e}")
-                        rag.add_document(doc, metadata=metadata)
+                        rag.add_document(doc, metadata=metadata, semantic_embedding=embedding)
             except Exception as e:
                 print(f"ERROR - Failed to process embeddings: {e}")
 
@@ -0,0 +1,300 @@
+"""
+Postgres (pgvector) retrieval over the messages table.
+
+Every message row already stores its Semantic_Embedding (1024-d) and
+Emotion_Embedding (7-d), so instead of keeping a per-worker copy in memory the
+weighted similarity used by SimpleRAG can run in the database:
+
+    score = (1 - EMOTION_WEIGHT) * cos(semantic) + EMOTION_WEIGHT * cos(emotion)
+
+An approximate index can only order by a single distance, so candidates are the
+union of the nearest rows by semantic distance and by emotion distance (each
+served by its own HNSW/IVFFlat index), and only those are re-scored with the
+combined formula. Rows are restricted to the caller's UserId/Contact_id and to
+vectors produced by the current model versions, so all workers share one
+persistent, consistent index. pgvector applies those filters after the index
+scan, so a scope small enough (RAG_PGVECTOR_EXACT_MAX_ROWS) is scored exactly
+through the (UserId, Contact_id) index instead, and larger ones use iterative
+index scans where pgvector supports them.
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+from core.db_connection import engine
+
+RAG_PGVECTOR_INDEX = os.getenv("RAG_PGVECTOR_INDEX", "hnsw").strip().lower()  # hnsw | ivfflat
+RAG_PGVECTOR_OVERFETCH = int(os.getenv("RAG_PGVECTOR_OVERFETCH", "5"))  # candidates per index = initial_k * this
+RAG_HNSW_M = int(os.getenv("RAG_HNSW_M", "16"))
+RAG_HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "64"))
+RAG_HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "100"))
+RAG_IVFFLAT_LISTS = int(os.getenv("RAG_IVFFLAT_LISTS", "100"))  # ~rows/1000 up to 1M rows
+RAG_IVFFLAT_PROBES = int(os.getenv("RAG_IVFFLAT_PROBES", "10"))
+# pgvector >= 0.8 can keep scanning a filtered index until enough rows match
+# (off, relaxed_order, strict_order). Empty means relaxed_order when the installed
+# pgvector supports it, since per-user filters are applied after the index scan.
+RAG_PGVECTOR_ITERATIVE_SCAN = os.getenv("RAG_PGVECTOR_ITERATIVE_SCAN", "").strip().lower()
+# Scopes with at most this many rows are scored exactly through the
+# (UserId, Contact_id) index instead of the approximate vector indexes
+RAG_PGVECTOR_EXACT_MAX_ROWS = int(os.getenv("RAG_PGVECTOR_EXACT_MAX_ROWS", "20000"))
+
+# Arbitrary constant so only one worker builds the indexes at a time
+_INDEX_LOCK_KEY = 7302201
+_indexes_checked = False
+_indexes_lock = threading.Lock()
+_pgvector_version: Optional[tuple] = None
+
+
+def _vector_literal(vector: Sequence[float]) -> str:
+    return "[" + ",".join(f"{float(v):.7g}" for v in vector) + "]"
+
+
+def _index_definitions() -> List[tuple]:
+    """(index name, CREATE INDEX statement) for every index search_messages relies on."""
+    if RAG_PGVECTOR_INDEX == "ivfflat":
+        options = f"WITH (lists = {RAG_IVFFLAT_LISTS})"
+    else:
+        options = f"WITH (m = {RAG_HNSW_M}, ef_construction = {RAG_HNSW_EF_CONSTRUCTION})"
+    method = "ivfflat" if RAG_PGVECTOR_INDEX == "ivfflat" else "hnsw"
+    return [
+        (
+            f"ix_messages_semantic_{method}",
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_messages_semantic_{method}" '
+            f'ON messages USING {method} ("Semantic_Embedding" vector_cosine_ops) {options}',
+        ),
+        (
+            f"ix_messages_emotion_{method}",
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_messages_emotion_{method}" '
+            f'ON messages USING {method} ("Emotion_Embedding" vector_cosine_ops) {options}',
+        ),
+        (
+            "ix_messages_UserId_Contact_id",
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_messages_UserId_Contact_id" '
+            'ON messages ("UserId", "Contact_id")',
+        ),
+    ]
+
+
+def _index_is_valid(conn, name: str) -> Optional[bool]:
+    """pg_index.indisvalid for an index on messages, or None if it does not exist."""
+    return conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND i.indrelid = 'messages'::regclass"
+        ),
+        {"name": name},
+    ).scalar()
+
+
+def ensure_vector_indexes() -> bool:
+    """
+    Create the vector and filter indexes, repairing any left INVALID.
+
+    Run at startup (main.py, in the background) or with
+    utilities/build_vector_indexes.py, never from a search request. Indexes are
+    built CONCURRENTLY so ingestion keeps writing, and under an advisory lock so
+    only one worker builds them. A failed concurrent build leaves an INVALID index
+    that IF NOT EXISTS would skip forever, so invalid ones are dropped and rebuilt.
+    IVFFlat picks its centroids from the rows present at build time; drop and
+    rebuild it after large imports.
+
+    Returns:
+        True if all indexes exist and are valid, False otherwise
+    """
+    global _indexes_checked
+    if _indexes_checked:
+        return True
+    with _indexes_lock:
+        if _indexes_checked:
+            return True
+        try:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+                if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _INDEX_LOCK_KEY}).scalar():
+                    # Another worker is building them; searches still work meanwhile
+                    print("⏳ Vector indexes are being built by another worker")
+                    return False
+                try:
+                    for name, statement in _index_definitions():
+                        if _index_is_valid(conn, name) is False:
+                            print(f"🔧 Rebuilding invalid index {name}")
+                            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+                        conn.execute(text(statement))
+                        if not _index_is_valid(conn, name):
+                            print(f"Warning: index {name} is not valid after building it")
+                            return False
+                finally:
+                    conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _INDEX_LOCK_KEY})
+            _indexes_checked = True
+            print(f"🗂️ pgvector {RAG_PGVECTOR_INDEX} indexes ready on messages")
+            return True
+        except Exception as e:
+            print(f"Warning: could not create vector indexes: {e}")
+            return False
+
+
+def _installed_pgvector_version(conn) -> tuple:
+    """Installed pgvector version as a tuple of ints, looked up once per process."""
+    global _pgvector_version
+    if _pgvector_version is None:
+        version = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+        try:
+            _pgvector_version = tuple(int(part) for part in (version or "0").split(".")[:3])
+        except ValueError:
+            _pgvector_version = (0,)
+    return _pgvector_version
+
+
+def _search_settings(conn) -> List[str]:
+    # SET LOCAL takes no bind parameters; every value here is an int or a checked keyword
+    if RAG_PGVECTOR_INDEX == "ivfflat":
+        settings = [f"SET LOCAL ivfflat.probes = {RAG_IVFFLAT_PROBES}"]
+        prefix = "ivfflat"
+    else:
+        settings = [f"SET LOCAL hnsw.ef_search = {RAG_HNSW_EF_SEARCH}"]
+        prefix = "hnsw"
+    iterative_scan = RAG_PGVECTOR_ITERATIVE_SCAN
+    if not iterative_scan and _installed_pgvector_version(conn) >= (0, 8):
+        iterative_scan = "relaxed_order"
+    if iterative_scan in {"off", "relaxed_order", "strict_order"}:
+        if prefix == "hnsw" or iterative_scan != "strict_order":
+            settings.append(f"SET LOCAL {prefix}.iterative_scan = {iterative_scan}")
+    return settings
+
+
+def search_messages(
+    semantic_embedding: Sequence[float],
+    emotion_embedding: Sequence[float],
+    top_k: int = 10,
+    user_id: Optional[str] = None,
+    contact_id: Optional[int] = None,
+    emotion_weight: float = 0.3,
+    semantic_version: Optional[str] = None,
+    emotion_version: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Top messages by combined semantic + emotion cosine similarity.
+
+    Args:
+        semantic_embedding: Query semantic vector (1024-d)
+        emotion_embedding: Query emotion vector (7-d)
+        top_k: Number of results to return
+        user_id: Only search messages imported by this app user
+        contact_id: Only search messages with this contact
+        emotion_weight: Weight of the emotion similarity (EMOTION_WEIGHT)
+        semantic_version: Only rows whose Semantic_Embedding came from this model
+        emotion_version: Rows whose Emotion_Embedding came from another pipeline
+            contribute no emotion similarity
+
+    Returns:
+        List of {"content", "score", "metadata"} dicts, best first, like SimpleRAG.search
+    """
+    semantic = np.asarray(semantic_embedding, dtype=np.float32).reshape(-1)
+    emotion = np.asarray(emotion_embedding, dtype=np.float32).reshape(-1)
+    if top_k <= 0 or not semantic.any():
+        # Cosine distance to a zero vector is undefined
+        return []
+    use_emotion = bool(emotion.any())
+
+    filters = ['"Semantic_Embedding" IS NOT NULL']
+    params = {
+        "semantic": _vector_literal(semantic),
+        "emotion": _vector_literal(emotion) if use_emotion else None,
+        "emotion_weight": float(emotion_weight),
+        "emotion_version": emotion_version,
+        "candidates": max(top_k, top_k * RAG_PGVECTOR_OVERFETCH),
+        "top_k": top_k,
+    }
+    if semantic_version is not None:
+        filters.append('"Semantic_model_version" = :semantic_version')
+        params["semantic_version"] = semantic_version
+    if user_id is not None:
+        filters.append('"UserId" = :user_id')
+        params["user_id"] = user_id
+    if contact_id is not None:
+        filters.append('"Contact_id" = :contact_id')
+        params["contact_id"] = contact_id
+    where = " AND ".join(filters)
+
+    def emotion_usable(prefix: str = "") -> str:
+        condition = f'{prefix}"Emotion_Embedding" IS NOT NULL'
+        if emotion_version is not None:
+            condition += f' AND {prefix}"Emotion_model_version" = :emotion_version'
+        return condition
+
+    if use_emotion:
+        emotion_score = (
+            f'CASE WHEN {emotion_usable("m.")} '
+            f'THEN 1 - (m."Emotion_Embedding" <=> CAST(:emotion AS vector)) ELSE 0 END'
+        )
+    else:
+        emotion_score = "0"
+    select = (
+        f'SELECT m."MessageId", m."MessageContent", m."Sender", m."Receiver", m."DateSent", '
+        f'm."UserId", m."Contact_id", m."Detected_emotion", '
+        f'(1 - :emotion_weight) * (1 - (m."Semantic_Embedding" <=> CAST(:semantic AS vector))) '
+        f'+ :emotion_weight * {emotion_score} AS score '
+    )
+
+    # Exact: score every row in the scope, found through the (UserId, Contact_id) index.
+    # The ORDER BY is on the combined score, so the vector indexes are not used.
+    exact_query = text(f'{select}FROM messages m WHERE {where} ORDER BY score DESC LIMIT :top_k')
+
+    # Approximate: union of the nearest rows by each distance, re-scored. The
+    # scope filter is applied after the index scan, hence the iterative scan setting.
+    candidate_queries = [
+        f'(SELECT "MessageId" FROM messages WHERE {where} '
+        f'ORDER BY "Semantic_Embedding" <=> CAST(:semantic AS vector) LIMIT :candidates)'
+    ]
+    if use_emotion:
+        candidate_queries.append(
+            f'(SELECT "MessageId" FROM messages WHERE {where} AND {emotion_usable()} '
+            f'ORDER BY "Emotion_Embedding" <=> CAST(:emotion AS vector) LIMIT :candidates)'
+        )
+    ann_query = text(
+        f'WITH candidates AS ({" UNION ".join(candidate_queries)}) '
+        f'{select}'
+        f'FROM messages m JOIN candidates c ON c."MessageId" = m."MessageId" '
+        f'ORDER BY score DESC LIMIT :top_k'
+    )
+    scope_size_query = text(
+        f'SELECT count(*) FROM (SELECT 1 FROM messages WHERE {where} LIMIT :exact_max) scoped'
+    )
+
+    try:
+        with engine.begin() as conn:
+            exact = False
+            if user_id is not None and RAG_PGVECTOR_EXACT_MAX_ROWS > 0:
+                scoped_rows = conn.execute(
+                    scope_size_query, {**params, "exact_max": RAG_PGVECTOR_EXACT_MAX_ROWS + 1}
+                ).scalar()
+                exact = scoped_rows <= RAG_PGVECTOR_EXACT_MAX_ROWS
+            if exact:
+                rows = conn.execute(exact_query, params).mappings().all()
+            else:
+                for setting in _search_settings(conn):
+                    conn.execute(text(setting))
+                rows = conn.execute(ann_query, params).mappings().all()
+    except Exception as e:
+        print(f"pgvector search error: {e}")
+        return []
+
+    return [
+        {
+            "content": row["MessageContent"],
+            "score": float(row["score"]),
+            "metadata": {
+                "sender": row["Sender"],
+                "receiver": row["Receiver"],
+                "date": row["DateSent"].isoformat() if row["DateSent"] else None,
+                "message_id": row["MessageId"],
+                "app_user_id": row["UserId"],
+                "contact_id": row["Contact_id"],
+                "detected_emotion": row["Detected_emotion"],
+            },
+        }
+        for row in rows
+    ]
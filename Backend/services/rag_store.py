@@ -0,0 +1,226 @@
+"""
+Bounded in-memory document store for SimpleRAG.
+
+Documents are partitioned per (app user, contact) so a search only scans the
+caller's own conversations. Each partition keeps its vectors in contiguous,
+L2-normalized float32 matrices (cosine similarity is one matrix-vector product).
+
+Memory is bounded three ways:
+  - per-partition cap: the oldest documents of a partition are dropped first
+  - TTL: partitions not written or searched for RAG_PARTITION_TTL_SECONDS expire
+  - global budget: least recently used partitions are evicted until the store
+    fits in RAG_MEMORY_BUDGET_MB
+Evicted documents are still in the messages table (see RAG_RETRIEVAL_BACKEND=pgvector).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+RAG_MEMORY_BUDGET_MB = float(os.getenv("RAG_MEMORY_BUDGET_MB", "128"))  # per worker process
+RAG_PARTITION_MAX_DOCUMENTS = int(os.getenv("RAG_PARTITION_MAX_DOCUMENTS", "2000"))
+RAG_PARTITION_TTL_SECONDS = float(os.getenv("RAG_PARTITION_TTL_SECONDS", "21600"))  # 0 disables the TTL
+PARTITION_INITIAL_CAPACITY = 64  # rows preallocated per partition (doubles as needed)
+
+PartitionKey = Tuple[Optional[str], Optional[Hashable]]
+
+
+class DocumentPartition:
+    """Documents of one (app user, contact) pair plus their vector matrices."""
+
+    def __init__(self, key: PartitionKey, semantic_dim: int, emotion_dim: int):
+        self.key = key
+        self.documents: List[Dict] = []
+        self.semantic = np.zeros((PARTITION_INITIAL_CAPACITY, semantic_dim), dtype=np.float32)
+        self.emotion = np.zeros((PARTITION_INITIAL_CAPACITY, emotion_dim), dtype=np.float32)
+        self.text_bytes = 0
+        self.last_access = time.monotonic()
+
+    @property
+    def nbytes(self) -> int:
+        """Allocated matrix bytes plus the UTF-8 size of the stored texts (an estimate)."""
+        return self.semantic.nbytes + self.emotion.nbytes + self.text_bytes
+
+    def append(self, content: str, metadata: Dict, semantic: np.ndarray, emotion: np.ndarray):
+        row = len(self.documents)
+        if row == self.semantic.shape[0]:
+            # Grow into new arrays; searches holding the old ones keep reading them safely
+            self.semantic = self._resized(self.semantic, row * 2, 0, row)
+            self.emotion = self._resized(self.emotion, row * 2, 0, row)
+        self.semantic[row] = semantic
+        self.emotion[row] = emotion
+        self.documents.append({"content": content, "metadata": metadata})
+        self.text_bytes += len(content.encode("utf-8"))
+
+    def drop_oldest(self, count: int):
+        """Remove the `count` oldest documents (copy-on-write like append)."""
+        count = min(count, len(self.documents))
+        if count <= 0:
+            return
+        n = len(self.documents)
+        remaining = n - count
+        # Release capacity too, keeping headroom for further appends
+        capacity = min(self.semantic.shape[0], max(PARTITION_INITIAL_CAPACITY, remaining + remaining // 4))
+        self.semantic = self._resized(self.semantic, capacity, count, n)
+        self.emotion = self._resized(self.emotion, capacity, count, n)
+        dropped, self.documents = self.documents[:count], self.documents[count:]
+        self.text_bytes -= sum(len(doc["content"].encode("utf-8")) for doc in dropped)
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, List[Dict]]:
+        """Consistent (semantic, emotion, documents) views for a search outside the store lock."""
+        n = len(self.documents)
+        return self.semantic[:n], self.emotion[:n], self.documents[:n]
+
+    @staticmethod
+    def _resized(matrix: np.ndarray, capacity: int, start: int, stop: int) -> np.ndarray:
+        resized = np.zeros((capacity, matrix.shape[1]), dtype=matrix.dtype)
+        resized[:stop - start] = matrix[start:stop]
+        return resized
+
+
+class PartitionedDocumentStore:
+    """LRU/TTL-bounded collection of DocumentPartitions keyed by (app_user_id, contact_id)."""
+
+    def __init__(
+        self,
+        semantic_dim: int,
+        emotion_dim: int,
+        memory_budget_mb: Optional[float] = None,
+        max_documents_per_partition: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            semantic_dim: Semantic embedding dimension
+            emotion_dim: Emotion embedding dimension
+            memory_budget_mb: Global budget for all partitions (default RAG_MEMORY_BUDGET_MB)
+            max_documents_per_partition: Cap per partition (default RAG_PARTITION_MAX_DOCUMENTS)
+            ttl_seconds: Idle time before a partition expires; 0 disables (default RAG_PARTITION_TTL_SECONDS)
+        """
+        self.semantic_dim = semantic_dim
+        self.emotion_dim = emotion_dim
+        budget_mb = RAG_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb
+        self.memory_budget_bytes = int(budget_mb * 1024 * 1024)
+        self.max_documents_per_partition = max(1, max_documents_per_partition or RAG_PARTITION_MAX_DOCUMENTS)
+        self.ttl_seconds = RAG_PARTITION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        # Least recently used first
+        self._partitions: "OrderedDict[PartitionKey, DocumentPartition]" = OrderedDict()
+        self._by_user: Dict[Optional[str], set] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._evictions = {"partitions_expired": 0, "partitions_evicted": 0, "documents_dropped": 0}
+
+    @staticmethod
+    def partition_key(metadata: Optional[Dict]) -> PartitionKey:
+        metadata = metadata or {}
+        user_id = metadata.get("app_user_id")
+        return (str(user_id) if user_id is not None else None, metadata.get("contact_id"))
+
+    def add(self, content: str, metadata: Optional[Dict], semantic: np.ndarray, emotion: np.ndarray):
+        """Append a document (normalized vectors) to its partition and enforce the limits."""
+        metadata = metadata or {}
+        key = self.partition_key(metadata)
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                partition = DocumentPartition(key, self.semantic_dim, self.emotion_dim)
+                self._partitions[key] = partition
+                self._by_user.setdefault(key[0], set()).add(key)
+                self._total_bytes += partition.nbytes
+
+            before = partition.nbytes
+            if len(partition.documents) >= self.max_documents_per_partition:
+                # Drop a slice at once so the copy is amortized over many appends
+                overflow = len(partition.documents) - self.max_documents_per_partition + 1
+                drop = max(overflow, self.max_documents_per_partition // 10)
+                partition.drop_oldest(drop)
+                self._evictions["documents_dropped"] += drop
+            partition.append(content, metadata, semantic, emotion)
+            self._total_bytes += partition.nbytes - before
+            self._touch_locked(partition)
+            self._evict_locked(keep=key)
+
+    def partitions_for(
+        self, user_id: Optional[str] = None, contact_id: Optional[Hashable] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray, List[Dict]]]:
+        """
+        Snapshots of the partitions a search may scan.
+
+        Args:
+            user_id: Only this app user's partitions; None scans every partition
+            contact_id: Only the partition for this contact (with user_id)
+
+        Returns:
+            List of (semantic, emotion, documents) snapshots
+        """
+        with self._lock:
+            self._evict_locked()
+            if user_id is None:
+                partitions = list(self._partitions.values())
+            else:
+                keys = self._by_user.get(str(user_id), ())
+                partitions = [
+                    self._partitions[key] for key in keys
+                    if contact_id is None or key[1] == contact_id
+                ]
+                for partition in partitions:
+                    self._touch_locked(partition)
+            return [partition.snapshot() for partition in partitions if partition.documents]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(partition.documents) for partition in self._partitions.values())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "partitions": len(self._partitions),
+                "documents": sum(len(partition.documents) for partition in self._partitions.values()),
+                "memory_mb": round(self._total_bytes / (1024 * 1024), 2),
+                "memory_budget_mb": round(self.memory_budget_bytes / (1024 * 1024), 2),
+                **self._evictions,
+            }
+
+    def _touch_locked(self, partition: DocumentPartition):
+        partition.last_access = time.monotonic()
+        self._partitions.move_to_end(partition.key)
+
+    def _remove_locked(self, key: PartitionKey):
+        partition = self._partitions.pop(key)
+        self._total_bytes -= partition.nbytes
+        user_keys = self._by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._by_user[key[0]]
+
+    def _evict_locked(self, keep: Optional[PartitionKey] = None):
+        # Expire idle partitions (the LRU end holds the least recently used)
+        if self.ttl_seconds > 0:
+            cutoff = time.monotonic() - self.ttl_seconds
+            while self._partitions:
+                key, partition = next(iter(self._partitions.items()))
+                if partition.last_access >= cutoff:
+                    break
+                self._remove_locked(key)
+                self._evictions["partitions_expired"] += 1
+
+        # Evict least recently used partitions until the store fits in the budget
+        while self._total_bytes > self.memory_budget_bytes:
+            victim = next((key for key in self._partitions if key != keep), None)
+            if victim is None:
+                break
+            self._remove_locked(victim)
+            self._evictions["partitions_evicted"] += 1
+
+        # A single partition larger than the whole budget loses its oldest rows
+        if keep in self._partitions and self._total_bytes > self.memory_budget_bytes:
+            partition = self._partitions[keep]
+            before = partition.nbytes
+            drop = max(1, len(partition.documents) // 4)
+            partition.drop_oldest(drop)
+            self._total_bytes += partition.nbytes - before
+            self._evictions["documents_dropped"] += drop
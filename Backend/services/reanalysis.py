@@ -0,0 +1,274 @@
+"""
+Incremental re-analysis of stored messages.
+
+Every message row records which emotion pipeline (EMOTION_MODEL_VERSION) and which
+semantic embedding model (SEMANTIC_MODEL_VERSION) produced its vectors. After an
+upgrade this job walks only the stale rows in MessageId order, re-analyzes them in
+bulk batches and updates them in place, so a model change never needs a synchronous
+backfill. The job is throttled, runs on one worker at a time (Redis lock), and
+checkpoints its cursor and progress in Redis so it can be paused and resumed.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_
+from sqlmodel import Session, select
+
+from core.db_connection import engine
+from model.message import Message
+from services.cache import MessageCache
+from services.emotion_pipeline import EMOTION_MODEL_VERSION, get_pipeline
+
+REANALYSIS_JOB_NAME = "message_reanalysis"
+REANALYSIS_BATCH_SIZE = int(os.getenv("REANALYSIS_BATCH_SIZE", "64"))
+REANALYSIS_MAX_ROWS_PER_SECOND = float(os.getenv("REANALYSIS_MAX_ROWS_PER_SECOND", "10"))
+REANALYSIS_LOCK_TTL = int(os.getenv("REANALYSIS_LOCK_TTL", "600"))  # must exceed one batch
+
+_job_thread: Optional[threading.Thread] = None
+_stop_event = threading.Event()
+
+
+def _semantic_model_version() -> str:
+    # RAGPipeline builds the embedding clients on import; only load it when needed
+    from services.RAGPipeline import SEMANTIC_MODEL_VERSION
+    return SEMANTIC_MODEL_VERSION
+
+
+def _emotion_stale():
+    return Message.Emotion_model_version.is_distinct_from(EMOTION_MODEL_VERSION)
+
+
+def _semantic_stale(semantic_version: str):
+    return Message.Semantic_model_version.is_distinct_from(semantic_version)
+
+
+def count_stale_messages() -> Dict[str, int]:
+    """Rows whose emotion or semantic vectors were not produced by the current versions."""
+    semantic_version = _semantic_model_version()
+    with Session(engine) as session:
+        emotion = session.exec(select(func.count()).select_from(Message).where(_emotion_stale())).one()
+        semantic = session.exec(
+            select(func.count()).select_from(Message).where(_semantic_stale(semantic_version))
+        ).one()
+        total = session.exec(
+            select(func.count()).select_from(Message).where(
+                or_(_emotion_stale(), _semantic_stale(semantic_version))
+            )
+        ).one()
+    return {"emotion": emotion, "semantic": semantic, "total": total}
+
+
+class ReanalysisJob:
+    """Re-analyze stale message rows in throttled bulk batches."""
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        max_rows_per_second: Optional[float] = None,
+        limit: Optional[int] = None,
+    ):
+        """
+        Args:
+            batch_size: Rows per analysis/update batch (default REANALYSIS_BATCH_SIZE)
+            max_rows_per_second: Throttle; 0 disables it (default REANALYSIS_MAX_ROWS_PER_SECOND)
+            limit: Stop after this many rows in this run (the checkpoint is kept)
+        """
+        self.batch_size = max(1, batch_size or REANALYSIS_BATCH_SIZE)
+        self.max_rows_per_second = (
+            REANALYSIS_MAX_ROWS_PER_SECOND if max_rows_per_second is None else max_rows_per_second
+        )
+        self.limit = limit
+        self.semantic_version = _semantic_model_version()
+
+    def _initial_progress(self) -> Dict:
+        """Resume the previous run's checkpoint if it targeted the same versions."""
+        previous = MessageCache.get_job_progress(REANALYSIS_JOB_NAME)
+        if (
+            previous
+            and previous.get("status") != "completed"
+            and previous.get("emotion_version") == EMOTION_MODEL_VERSION
+            and previous.get("semantic_version") == self.semantic_version
+        ):
+            print(f"🔁 Resuming message re-analysis after {previous.get('cursor')}")
+            return {**previous, "status": "running", "run_started_at": datetime.utcnow()}
+
+        stale = count_stale_messages()
+        return {
+            "status": "running",
+            "emotion_version": EMOTION_MODEL_VERSION,
+            "semantic_version": self.semantic_version,
+            "cursor": None,
+            "total_stale": stale["total"],
+            "processed": 0,
+            "emotion_updated": 0,
+            "semantic_updated": 0,
+            "failed": 0,
+            "started_at": datetime.utcnow(),
+            "run_started_at": datetime.utcnow(),
+        }
+
+    def _next_batch(self, session: Session, cursor: Optional[str]) -> List[Message]:
+        stmt = select(Message).where(or_(_emotion_stale(), _semantic_stale(self.semantic_version)))
+        if cursor is not None:
+            stmt = stmt.where(Message.MessageId > cursor)
+        return session.exec(stmt.order_by(Message.MessageId).limit(self.batch_size)).all()
+
+    def _process_batch(self, rows: List[Message]) -> Dict[str, int]:
+        """Re-analyze one batch and bulk-update the rows; returns per-batch counters."""
+        counts = {"emotion_updated": 0, "semantic_updated": 0, "failed": 0}
+        updates = {row.MessageId: {"MessageId": row.MessageId} for row in rows}
+
+        emotion_rows = [row for row in rows if row.Emotion_model_version != EMOTION_MODEL_VERSION]
+        if emotion_rows:
+            analyses = get_pipeline().analyze_texts_full([row.MessageContent for row in emotion_rows])
+            for row, analysis in zip(emotion_rows, analyses):
+                # Failed analyses come back as zero vectors; leave those rows stale for the next run
+                if not analysis or not any(analysis["embedding"]):
+                    counts["failed"] += 1
+                    continue
+                updates[row.MessageId].update({
+                    "Emotion_Embedding": analysis["embedding"],
+                    "Emotion_labels": analysis["emotion_scores"],
+                    "Detected_emotion": analysis["dominant_emotion"],
+                    "Interpretation": analysis.get("interpretation") or row.Interpretation,
+                    "Emotion_model_version": EMOTION_MODEL_VERSION,
+                })
+                counts["emotion_updated"] += 1
+
+        semantic_rows = [row for row in rows if row.Semantic_model_version != self.semantic_version]
+        if semantic_rows:
+            from services.RAGPipeline import rag
+            embeddings = rag.embed_batch([row.MessageContent for row in semantic_rows])
+            for row, embedding in zip(semantic_rows, embeddings):
+                if not embedding.any():
+                    counts["failed"] += 1
+                    continue
+                updates[row.MessageId].update({
+                    "Semantic_Embedding": embedding.tolist(),
+                    "Semantic_model_version": self.semantic_version,
+                })
+                counts["semantic_updated"] += 1
+
+        now = datetime.utcnow()
+        mappings = [{**update, "Analyzed_at": now} for update in updates.values() if len(update) > 1]
+        if mappings:
+            with Session(engine) as session:
+                session.bulk_update_mappings(Message, mappings)
+                session.commit()
+        return counts
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> Dict:
+        """Run until no stale rows remain, `limit` is reached or stop_event is set.
+
+        Returns the final progress dict (also stored in Redis under the job name).
+        """
+        token = MessageCache.acquire_job_lock(REANALYSIS_JOB_NAME, REANALYSIS_LOCK_TTL)
+        if token is None:
+            return {"status": "locked", "detail": "Re-analysis is already running on another worker"}
+
+        progress = self._initial_progress()
+        processed_this_run = 0
+        try:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    progress["status"] = "paused"
+                    break
+                if self.limit is not None and processed_this_run >= self.limit:
+                    progress["status"] = "paused"
+                    break
+                if not MessageCache.refresh_job_lock(REANALYSIS_JOB_NAME, token, REANALYSIS_LOCK_TTL):
+                    progress["status"] = "paused"
+                    progress["detail"] = "Lost the job lock"
+                    break
+
+                batch_started = time.monotonic()
+                with Session(engine) as session:
+                    rows = self._next_batch(session, progress["cursor"])
+                    session.expunge_all()
+                if not rows:
+                    progress["status"] = "completed"
+                    progress["cursor"] = None
+                    break
+
+                counts = self._process_batch(rows)
+                for key, value in counts.items():
+                    progress[key] += value
+                progress["processed"] += len(rows)
+                progress["cursor"] = rows[-1].MessageId
+                processed_this_run += len(rows)
+
+                run_seconds = max(1e-6, (datetime.utcnow() - progress["run_started_at"]).total_seconds())
+                rate = processed_this_run / run_seconds
+                remaining = max(0, progress["total_stale"] - progress["processed"])
+                progress.update({
+                    "rows_per_second": round(rate, 2),
+                    "remaining_estimate": remaining,
+                    "eta_seconds": round(remaining / rate) if rate > 0 else None,
+                    "updated_at": datetime.utcnow(),
+                })
+                MessageCache.cache_job_progress(REANALYSIS_JOB_NAME, progress)
+                print(
+                    f"🔄 Re-analyzed {progress['processed']}/{progress['total_stale']} messages "
+                    f"({progress['failed']} failed, {rate:.1f} rows/s)"
+                )
+
+                # Throttle so the job never takes more than its share of the upstream APIs
+                if self.max_rows_per_second > 0:
+                    min_seconds = len(rows) / self.max_rows_per_second
+                    wait = min_seconds - (time.monotonic() - batch_started)
+                    if wait > 0:
+                        if stop_event is not None:
+                            stop_event.wait(wait)
+                        else:
+                            time.sleep(wait)
+        except Exception as e:
+            progress["status"] = "failed"
+            progress["detail"] = str(e)
+            print(f"Message re-analysis failed: {e}")
+        finally:
+            progress["updated_at"] = datetime.utcnow()
+            MessageCache.cache_job_progress(REANALYSIS_JOB_NAME, progress)
+            MessageCache.release_job_lock(REANALYSIS_JOB_NAME, token)
+
+        print(f"✅ Message re-analysis {progress['status']}: {progress['processed']} rows processed")
+        return progress
+
+
+def start_reanalysis(
+    batch_size: Optional[int] = None,
+    max_rows_per_second: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> bool:
+    """Start the job on a background thread of this worker; False if one is already running here."""
+    global _job_thread
+    if _job_thread is not None and _job_thread.is_alive():
+        return False
+    _stop_event.clear()
+    job = ReanalysisJob(batch_size=batch_size, max_rows_per_second=max_rows_per_second, limit=limit)
+    _job_thread = threading.Thread(
+        target=job.run, kwargs={"stop_event": _stop_event}, name="message-reanalysis", daemon=True
+    )
+    _job_thread.start()
+    return True
+
+
+def stop_reanalysis() -> bool:
+    """Ask this worker's job to pause after the current batch; False if none is running here."""
+    if _job_thread is None or not _job_thread.is_alive():
+        return False
+    _stop_event.set()
+    return True
+
+
+def get_reanalysis_progress() -> Dict:
+    """Last reported progress plus the current stale-row counts."""
+    progress = MessageCache.get_job_progress(REANALYSIS_JOB_NAME) or {"status": "never_run"}
+    return {
+        **progress,
+        "current_emotion_version": EMOTION_MODEL_VERSION,
+        "current_semantic_version": _semantic_model_version(),
+        "stale": count_stale_messages(),
+    }
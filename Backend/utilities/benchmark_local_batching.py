@@ -0,0 +1,130 @@
+"""
+Benchmark length-bucketed batching of the local emotion model on EMOTERA.
+
+Compares the previous scheme (input-order chunks of 8, padded to the longest text,
+max_length=512) with AI_inferenece.predict_scores (length buckets, adaptive
+truncation, token budget) and checks that both give the same predictions.
+
+Measured on EMOTERA-All-cleaned.tsv (1145 tweets, token length p50=36 p99=60
+max=73; adaptive max_length settled at 128), --runs 1, torch CPU runtime on one
+Xeon vCPU, with a roberta-large classifier (355M params, 7 labels) using the
+RoBERTa/GPT-2 BPE vocabulary but random weights, since the fine-tuned weights
+could not be downloaded there. Compute per token does not depend on the
+weights, so throughput and padding carry over; re-run with the real AIModel
+for label-level numbers.
+
+    scheme                 throughput    padding   whole set
+    fixed chunks of 8      3.2 texts/s   32.2%     353.1 s
+    length-bucketed        4.9 texts/s    5.1%     231.9 s   (1.52x)
+
+    single-text request    p50 391 ms, p95 502 ms (50 samples)
+    top-1 agreement 1.0000, max |dp| 2.4e-07 between the two schemes
+
+Usage (from Backend/):
+    python -m utilities.benchmark_local_batching [path/to/EMOTERA-All-cleaned.tsv] [--runs 3] [--limit N]
+        [--latency-samples 50]
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+
+import torch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import AI_inferenece
+
+DEFAULT_TSV = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "Evaluations", "Taglish_Dataset", "EMOTERA-All-cleaned.tsv"
+))
+
+
+def load_tweets(tsv_path: str):
+    with open(tsv_path, "r", encoding="utf-8") as f:
+        return [row["tweet"] for row in csv.DictReader(f, delimiter="\t") if row.get("tweet")]
+
+
+def fixed_chunks(texts, batch_size: int = 8):
+    """The pre-bucketing predict_scores: returns (probs [N, C], padded tokens)."""
+    rows, padded = [], 0
+    for i in range(0, len(texts), batch_size):
+        enc = AI_inferenece._tokenizer(
+            texts[i:i + batch_size], return_tensors="pt", truncation=True, max_length=512, padding=True
+        )
+        padded += enc["input_ids"].numel()
+        rows.append(torch.softmax(AI_inferenece._runner(dict(enc)), dim=-1))
+    return torch.cat(rows), padded
+
+
+def bucketed(texts):
+    """Current predict_scores path: returns (probs [N, C], padded tokens)."""
+    features = AI_inferenece._encode(texts)
+    lengths = [len(f["input_ids"]) for f in features]
+    batches = AI_inferenece.plan_batches(
+        lengths, AI_inferenece.LOCAL_BATCH_MAX_ITEMS, AI_inferenece.LOCAL_BATCH_TOKEN_BUDGET
+    )
+    padded = sum(len(idx) * max(lengths[i] for i in idx) for idx in batches)
+    return AI_inferenece._forward_probs(texts), padded
+
+
+def timed(fn, texts, runs: int):
+    best, result = float("inf"), None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn(texts)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def single_text_latency(texts, samples: int):
+    """p50/p95 seconds of predict_scores on one text, as a lone live request sees it."""
+    step = max(1, len(texts) // max(1, samples))
+    latencies = []
+    for text in texts[::step][:samples]:
+        started = time.perf_counter()
+        AI_inferenece.predict_scores([text])
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+    return pct(50), pct(95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local batching on EMOTERA")
+    parser.add_argument("tsv", nargs="?", default=DEFAULT_TSV)
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per scheme (best is reported)")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N tweets (slow CPUs)")
+    parser.add_argument("--latency-samples", type=int, default=50, help="Single-text requests timed for latency")
+    args = parser.parse_args()
+
+    texts = load_tweets(args.tsv)[:args.limit]
+    AI_inferenece.load_local_model()
+    AI_inferenece.predict_scores(texts[:16])  # warm up and seed the length distribution
+
+    lengths = sorted(len(ids) for ids in AI_inferenece._tokenizer(texts, truncation=True, max_length=512)["input_ids"])
+    pct = lambda p: lengths[min(len(lengths) - 1, int(p / 100 * len(lengths)))]
+    print(f"📄 {len(texts)} tweets, token length p50={pct(50)} p90={pct(90)} p99={pct(99)} max={lengths[-1]}")
+    AI_inferenece._encode(texts)  # make sure "auto" has enough observations
+    print(f"✂️ Adaptive max_length: {AI_inferenece.adaptive_max_length()}")
+
+    base_time, (base_probs, base_padded) = timed(fixed_chunks, texts, args.runs)
+    new_time, (new_probs, new_padded) = timed(bucketed, texts, args.runs)
+
+    real_tokens = sum(lengths)
+    print(f"⏱️ fixed chunks of 8 : {len(texts) / base_time:8.1f} texts/s, padding {1 - real_tokens / base_padded:.1%}")
+    print(f"⏱️ length-bucketed   : {len(texts) / new_time:8.1f} texts/s, padding {1 - real_tokens / max(new_padded, real_tokens):.1%}")
+    print(f"🚀 Speedup: {base_time / new_time:.2f}x")
+    print(f"⏱️ whole-set latency  : {base_time:.1f}s -> {new_time:.1f}s")
+    if args.latency_samples > 0:
+        p50, p95 = single_text_latency(texts, args.latency_samples)
+        print(f"⏱️ single-text latency: p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+
+    agreement = (base_probs.argmax(dim=-1) == new_probs.argmax(dim=-1)).float().mean().item()
+    max_diff = (base_probs - new_probs).abs().max().item()
+    print(f"✅ Top-1 agreement {agreement:.4f}, max |Δp| {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Build the pgvector indexes on the messages table (RAG_RETRIEVAL_BACKEND=pgvector).
+
+The API also builds them in the background at startup. Indexes left INVALID by
+a failed concurrent build are dropped and rebuilt. Run this after large imports
+when using IVFFlat (drop its index first so the centroids are retrained).
+
+Usage (from Backend/):
+    python -m utilities.build_vector_indexes
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.pgvector_retrieval import RAG_PGVECTOR_INDEX, ensure_vector_indexes
+
+
+def main():
+    print(f"🗂️ Building pgvector {RAG_PGVECTOR_INDEX} indexes on messages...")
+    if not ensure_vector_indexes():
+        print("❌ Indexes are not ready (see the warnings above)")
+        sys.exit(1)
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Compact the on-disk RAG index (RAG_RETRIEVAL_BACKEND=ann).
+
+Folds the append log into a new generation and switches workers over to it.
+Workers also compact automatically once the log reaches RAG_ANN_COMPACT_ROWS;
+run this after bulk imports or with --force to retrain the IVF/PQ quantizers.
+
+Usage (from Backend/):
+    python -m utilities.compact_rag_index [--index-dir ./rag_index] [--force] [--stats]
+"""
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.ann_index import RAG_ANN_INDEX_DIR, MmapANNIndex
+
+EMBEDDING_DIM = 1024  # BGE-M3, as in services.RAGPipeline
+EMOTION_DIM = 7
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the on-disk RAG index")
+    parser.add_argument("--index-dir", default=RAG_ANN_INDEX_DIR)
+    parser.add_argument("--force", action="store_true", help="Compact and retrain even if the append log is small")
+    parser.add_argument("--stats", action="store_true", help="Only print the index stats")
+    args = parser.parse_args()
+
+    index = MmapANNIndex(args.index_dir, EMBEDDING_DIM, EMOTION_DIM)
+    print(f"📊 Before: {index.stats()}")
+    if args.stats:
+        return
+    result = index.compact(force=args.force)
+    print(f"✅ {result}")
+    print(f"📊 After: {index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Export the local emotion model for CPU serving and check accuracy parity.
+
+Writes <model_dir>/onnx/model.onnx (dynamic batch and sequence axes) and an
+int8 dynamically quantized model.int8.onnx, then runs the EMOTERA tweets through
+the float PyTorch model and each candidate runtime (torch int8, ONNX, ONNX int8).
+It reports top-1 agreement with the float model, accuracy against the EMOTERA
+labels, throughput and the memory each runtime adds. Exits non-zero when a
+runtime falls below --min-agreement.
+
+Select the runtime at startup with LOCAL_INFERENCE_RUNTIME=torch|int8|onnx
+(and LOCAL_ONNX_MODEL=model.onnx|model.int8.onnx).
+
+Usage (from Backend/):
+    python -m utilities.export_local_model [--model-dir ../AIModel] [--skip-export] [--limit 500]
+"""
+import os
+import sys
+import csv
+import gc
+import time
+import argparse
+
+import torch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import AI_inferenece
+from services.emotion_calibration import EMOTERA_LABEL_MAP
+
+DEFAULT_TSV = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "Evaluations", "Taglish_Dataset", "EMOTERA-All-cleaned.tsv"
+))
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def export_onnx(model_dir: str, opset: int = 17):
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out_dir = os.path.join(model_dir, AI_inferenece.ONNX_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+    float_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir, local_files_only=True)
+    model.eval()
+    sample = tokenizer(["export sample", "a slightly longer export sample"], return_tensors="pt", padding=True)
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            float_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    print(f"💾 Exported {float_path}")
+
+    quantize_dynamic(float_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"💾 Quantized {int8_path}")
+
+
+def load_samples(tsv_path: str, id2label, limit=None):
+    """(tweet, gold label or None) pairs; gold is None for emotions the model lacks."""
+    model_labels = {label.lower() for label in id2label.values()}
+    samples = []
+    with open(tsv_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f, delimiter="\t"):
+            if not row.get("tweet"):
+                continue
+            gold = EMOTERA_LABEL_MAP.get((row.get("emotion") or "").strip().lower())
+            samples.append((row["tweet"], gold if gold in model_labels else None))
+    return samples[:limit] if limit else samples
+
+
+def run(runner, tokenizer, texts, batch_size: int = 32) -> torch.Tensor:
+    rows = []
+    for i in range(0, len(texts), batch_size):
+        enc = tokenizer(texts[i:i + batch_size], return_tensors="pt", truncation=True, max_length=512, padding=True)
+        rows.append(torch.softmax(runner(dict(enc)), dim=-1))
+    return torch.cat(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the local emotion model and check parity")
+    parser.add_argument("--model-dir", default=AI_inferenece.MODEL_DIR)
+    parser.add_argument("--tsv", default=DEFAULT_TSV)
+    parser.add_argument("--skip-export", action="store_true", help="Only run the parity check")
+    parser.add_argument("--limit", type=int, default=None, help="Use at most this many tweets")
+    parser.add_argument("--min-agreement", type=float, default=0.98, help="Required top-1 agreement with float")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export_onnx(args.model_dir)
+
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(args.model_dir, local_files_only=True)
+
+    candidates = [("torch", None), ("int8", None), ("onnx", "model.onnx"), ("onnx", "model.int8.onnx")]
+    results, reference, failures = {}, None, []
+    for runtime, onnx_file in candidates:
+        name = f"onnx:{onnx_file}" if onnx_file else runtime
+        gc.collect()
+        before = rss_mb()
+        try:
+            runner, config, _ = AI_inferenece.build_runner(args.model_dir, runtime, onnx_file)
+        except Exception as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+        loaded = rss_mb()
+
+        id2label = {int(k): v.lower() for k, v in config.id2label.items()}
+        if reference is None:
+            samples = load_samples(args.tsv, id2label, args.limit)
+            texts = [text for text, _ in samples]
+            gold = [(i, label) for i, (_, label) in enumerate(samples) if label is not None]
+
+        run(runner, tokenizer, texts[:16])  # warm up
+        started = time.perf_counter()
+        probs = run(runner, tokenizer, texts)
+        elapsed = time.perf_counter() - started
+        predicted = probs.argmax(dim=-1)
+        if reference is None:
+            reference = (probs, predicted)
+
+        agreement = (predicted == reference[1]).float().mean().item()
+        accuracy = sum(1 for i, label in gold if id2label[predicted[i].item()] == label) / max(1, len(gold))
+        results[name] = {
+            "agreement": round(agreement, 4),
+            "max_abs_diff": round((probs - reference[0]).abs().max().item(), 4),
+            "accuracy": round(accuracy, 4),
+            "texts_per_second": round(len(texts) / elapsed, 1),
+            "model_rss_mb": round(loaded - before, 1),
+        }
+        print(f"✅ {name}: {results[name]}")
+        if agreement < args.min_agreement:
+            failures.append(name)
+        del runner
+
+    if failures:
+        print(f"❌ Below {args.min_agreement} top-1 agreement with the float model: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Fit the emotion classifier calibration (per-class bias + temperature) offline.
+
+Runs the configured classifier backend over the labelled EMOTERA tweets, starts
+from the class-prior correction implied by the benchmark CSVs' per-class
+precision/recall, fits on 80% and reports accuracy/macro-F1 against the current
+calibration on the other 20%, then refits on everything and writes a new
+versioned calibration file. Point EMOTION_CALIBRATION_PATH at it to deploy.
+
+Usage (from Backend/):
+    python -m utilities.fit_emotion_calibration --version emotion-calibration-v2 [--no-translate]
+    python -m utilities.fit_emotion_calibration --version emotion-calibration-v2 --priors-only
+"""
+import os
+import sys
+import argparse
+import random
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.emotion_calibration import (
+    EMOTION_CALIBRATION_PATH,
+    EmotionCalibrator,
+    benchmark_prior_bias,
+    evaluate,
+    load_emotera_labelled,
+)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_TSV = os.path.join(ROOT, "Evaluations", "Taglish_Dataset", "EMOTERA-All-cleaned.tsv")
+DEFAULT_BENCHMARKS = [
+    os.path.join(ROOT, "model_comparison_results.csv"),
+    os.path.join(ROOT, "model_comparison_results_dair-ai_emotion.csv"),
+    os.path.join(ROOT, "model_comparison_results_tweet_eval_(emotion).csv"),
+]
+CALIBRATION_DIR = os.path.dirname(EMOTION_CALIBRATION_PATH)
+
+
+def classify(texts, translate: bool, batch_size: int = 32) -> np.ndarray:
+    """Raw (uncalibrated) classifier scores for texts, in HF_LABELS order."""
+    from services.emotion_pipeline import get_pipeline
+    pipeline = get_pipeline()
+    rows = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        if translate:
+            chunk = pipeline._translate_batch(chunk)
+        for scores in pipeline._classify_batch(chunk):
+            rows.append([scores.get(label, 0.0) for label in pipeline.label_names])
+        print(f"🔎 Classified {min(start + batch_size, len(texts))}/{len(texts)}")
+    return np.array(rows)
+
+
+def main():
+    from services.emotion_pipeline import HF_MODEL, HF_LABELS
+
+    parser = argparse.ArgumentParser(description="Fit emotion classifier calibration")
+    parser.add_argument("--version", required=True, help="Version string stored in the file and model version")
+    parser.add_argument("--tsv", default=DEFAULT_TSV, help="EMOTERA TSV with emotion/tweet columns")
+    parser.add_argument("--benchmarks", nargs="*", default=DEFAULT_BENCHMARKS, help="Benchmark result CSVs")
+    parser.add_argument("--output", default=None, help="Defaults to services/calibration/<version>.json")
+    parser.add_argument("--no-translate", action="store_true", help="Classify tweets without translating first")
+    parser.add_argument("--priors-only", action="store_true", help="Use only the benchmark priors (no classifier calls)")
+    parser.add_argument("--l2", type=float, default=0.01, help="Pull towards the benchmark priors")
+    parser.add_argument("--limit", type=int, default=None, help="Use at most this many tweets")
+    args = parser.parse_args()
+
+    labels = list(HF_LABELS)
+    output = args.output or os.path.join(CALIBRATION_DIR, f"{args.version}.json")
+    prior = benchmark_prior_bias(args.benchmarks, HF_MODEL, labels)
+    if prior is None:
+        print(f"⚠️ No benchmark rows for {HF_MODEL}, starting from zero bias")
+    else:
+        print(f"📊 Benchmark prior bias: {dict(zip(labels, prior.round(3)))}")
+
+    if args.priors_only:
+        if prior is None:
+            sys.exit("No priors to write")
+        calibrator = EmotionCalibrator(labels, prior, 1.0, args.version, {
+            "model": HF_MODEL,
+            "fitted_on": {"benchmarks": [os.path.basename(p) for p in args.benchmarks]},
+        })
+        calibrator.save(output)
+        print(f"💾 Saved {args.version} to {output}")
+        return
+
+    samples = load_emotera_labelled(args.tsv, labels)
+    random.Random(13).shuffle(samples)
+    if args.limit:
+        samples = samples[:args.limit]
+    print(f"📄 {len(samples)} labelled tweets")
+    scores = classify([text for text, _ in samples], translate=not args.no_translate)
+    targets = np.array([label for _, label in samples])
+
+    split = int(len(samples) * 0.8)
+    current = EmotionCalibrator.from_file(EMOTION_CALIBRATION_PATH).reorder(labels)
+    holdout_fit = EmotionCalibrator.fit(scores[:split], targets[:split], labels, prior_bias=prior, l2=args.l2)
+    report = {
+        "raw": evaluate(None, scores[split:], targets[split:]),
+        current.version: evaluate(current, scores[split:], targets[split:]),
+        args.version: evaluate(holdout_fit, scores[split:], targets[split:]),
+    }
+    for name, metrics in report.items():
+        print(f"✅ Holdout {name}: {metrics}")
+
+    calibrator = EmotionCalibrator.fit(scores, targets, labels, prior_bias=prior, l2=args.l2, version=args.version)
+    calibrator.metadata = {
+        "model": HF_MODEL,
+        "fitted_on": {
+            "emotera_samples": len(samples),
+            "translated": not args.no_translate,
+            "benchmarks": [os.path.basename(p) for p in args.benchmarks],
+        },
+        "holdout": report,
+    }
+    calibrator.save(output)
+    print(f"💾 Saved {args.version} (temperature {calibrator.temperature:.3f}) to {output}")
+
+
+if __name__ == "__main__":
+    main()
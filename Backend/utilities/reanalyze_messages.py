@@ -0,0 +1,43 @@
+"""
+Re-analyze stored messages whose vectors came from an older model/pipeline version.
+
+Resumes from the last checkpoint, so it can be interrupted (Ctrl+C) and re-run.
+
+Usage (from Backend/):
+    python -m utilities.reanalyze_messages [--batch-size 64] [--rate 10] [--limit N] [--status]
+"""
+import os
+import sys
+import argparse
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.reanalysis import ReanalysisJob, get_reanalysis_progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per bulk batch")
+    parser.add_argument("--rate", type=float, default=None, help="Max rows per second (0 = unthrottled)")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many rows")
+    parser.add_argument("--status", action="store_true", help="Only print progress and stale counts")
+    args = parser.parse_args()
+
+    if args.status:
+        print(get_reanalysis_progress())
+        return
+
+    stop_event = threading.Event()
+    job = ReanalysisJob(batch_size=args.batch_size, max_rows_per_second=args.rate, limit=args.limit)
+    try:
+        progress = job.run(stop_event=stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+        print("⏸️ Interrupted; the checkpoint is saved and the next run resumes from it")
+        return
+    print(progress)
+
+
+if __name__ == "__main__":
+    main()
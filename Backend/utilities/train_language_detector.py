@@ -0,0 +1,39 @@
+"""
+Train the offline English vs. Taglish detector used to skip translation.
+
+Usage (from Backend/):
+    python -m utilities.train_language_detector [path/to/EMOTERA-All-cleaned.tsv]
+"""
+import os
+import sys
+import random
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.language_detector import LanguageDetector, LANGUAGE_MODEL_PATH, load_emotera_samples
+
+DEFAULT_TSV = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "Evaluations", "Taglish_Dataset", "EMOTERA-All-cleaned.tsv"
+))
+MODEL_VERSION = "taglish-detector-v1"
+
+
+def main(tsv_path: str = DEFAULT_TSV, output_path: str = LANGUAGE_MODEL_PATH):
+    samples = load_emotera_samples(tsv_path)
+    counts = {lang: sum(1 for _, l in samples if l == lang) for lang in ("en", "tl")}
+    print(f"📄 {len(samples)} weakly labelled tweets: {counts}")
+
+    # Hold out 20% to report accuracy against the weak labels
+    random.Random(13).shuffle(samples)
+    split = int(len(samples) * 0.8)
+    holdout = LanguageDetector.train(samples[:split], version=MODEL_VERSION)
+    correct = sum(1 for text, lang in samples[split:] if holdout.detect(text)[0] == lang)
+    print(f"✅ Holdout accuracy: {correct / max(1, len(samples) - split):.3f}")
+
+    detector = LanguageDetector.train(samples, version=MODEL_VERSION)
+    detector.save(output_path)
+    print(f"💾 Saved {MODEL_VERSION} to {output_path}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])